@@ -0,0 +1,26 @@
+"""backup verification
+
+Revision ID: 3f0b8c5e1d27
+Revises: 9a6e13d7f852
+Create Date: 2026-10-19 19:12:37.804119
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '3f0b8c5e1d27'
+down_revision = '9a6e13d7f852'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+def upgrade():
+    with op.batch_alter_table("backup_info") as batch_op:
+        batch_op.add_column(sa.Column('verified', sa.Boolean, nullable=True))
+        batch_op.add_column(sa.Column('verified_on', sa.Float, nullable=True))
+
+def downgrade():
+    with op.batch_alter_table("backup_info") as batch_op:
+        batch_op.drop_column('verified_on')
+        batch_op.drop_column('verified')
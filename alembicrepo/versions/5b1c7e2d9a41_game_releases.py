@@ -0,0 +1,28 @@
+"""game releases
+
+Revision ID: 5b1c7e2d9a41
+Revises: 0e35fff276f3
+Create Date: 2026-10-19 09:12:40.318254
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '5b1c7e2d9a41'
+down_revision = '0e35fff276f3'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+def upgrade():
+    op.create_table('game_release',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('commit_sha', sa.String(40), nullable=False, index=True),
+        sa.Column('build', sa.String(16), nullable=False),
+        sa.Column('released_on', sa.DateTime, nullable=False),
+        sa.Column('discovered_on', sa.DateTime, nullable=False),
+    )
+
+def downgrade():
+    op.drop_table('game_release')
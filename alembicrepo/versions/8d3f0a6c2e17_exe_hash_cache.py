@@ -0,0 +1,29 @@
+"""exe hash cache
+
+Revision ID: 8d3f0a6c2e17
+Revises: 5b1c7e2d9a41
+Create Date: 2026-10-19 10:05:12.842091
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '8d3f0a6c2e17'
+down_revision = '5b1c7e2d9a41'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+def upgrade():
+    op.create_table('exe_hash',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('path', sa.String(1024), nullable=False, unique=True,
+            index=True),
+        sa.Column('size', sa.Integer, nullable=False),
+        sa.Column('modified_on', sa.Float, nullable=False),
+        sa.Column('sha256', sa.String(64), nullable=False),
+    )
+
+def downgrade():
+    op.drop_table('exe_hash')
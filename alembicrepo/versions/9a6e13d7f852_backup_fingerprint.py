@@ -0,0 +1,25 @@
+"""backup fingerprint
+
+Revision ID: 9a6e13d7f852
+Revises: e2a94f7c3b60
+Create Date: 2026-10-19 17:41:09.527316
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '9a6e13d7f852'
+down_revision = 'e2a94f7c3b60'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+def upgrade():
+    with op.batch_alter_table("backup_info") as batch_op:
+        batch_op.add_column(sa.Column('fingerprint', sa.String(64),
+            nullable=True))
+
+def downgrade():
+    with op.batch_alter_table("backup_info") as batch_op:
+        batch_op.drop_column('fingerprint')
@@ -0,0 +1,33 @@
+"""save dir stats
+
+Revision ID: c47e19b05d28
+Revises: 8d3f0a6c2e17
+Create Date: 2026-10-19 11:21:37.504118
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'c47e19b05d28'
+down_revision = '8d3f0a6c2e17'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+def upgrade():
+    op.create_table('save_dir_stat',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('path', sa.String(1024), nullable=False, unique=True,
+            index=True),
+        sa.Column('modified_on', sa.Float, nullable=False),
+        sa.Column('size', sa.Integer, nullable=False),
+        sa.Column('file_count', sa.Integer, nullable=False),
+        sa.Column('characters', sa.Integer, nullable=False),
+        sa.Column('is_world', sa.Boolean, nullable=False),
+        sa.Column('last_modified', sa.Float),
+        sa.Column('subdirs', sa.Text, nullable=False),
+    )
+
+def downgrade():
+    op.drop_table('save_dir_stat')
@@ -0,0 +1,34 @@
+"""backup info
+
+Revision ID: e2a94f7c3b60
+Revises: c47e19b05d28
+Create Date: 2026-10-19 14:02:51.318604
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'e2a94f7c3b60'
+down_revision = 'c47e19b05d28'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+def upgrade():
+    op.create_table('backup_info',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('path', sa.String(1024), nullable=False, unique=True,
+            index=True),
+        sa.Column('size', sa.Integer, nullable=False),
+        sa.Column('modified_on', sa.Float, nullable=False),
+        sa.Column('worlds', sa.Integer, nullable=False),
+        sa.Column('characters', sa.Integer, nullable=False),
+        sa.Column('uncompressed_size', sa.Integer, nullable=False),
+        sa.Column('compressed_size', sa.Integer, nullable=False),
+        sa.Column('base_name', sa.String(256)),
+        sa.Column('build', sa.String(16)),
+    )
+
+def downgrade():
+    op.drop_table('backup_info')
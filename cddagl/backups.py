@@ -0,0 +1,1926 @@
+import base64
+import bz2
+import hashlib
+import json
+import logging
+import lzma
+import os
+import shutil
+import stat
+import struct
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+import zlib
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed, FIRST_EXCEPTION
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+import cddagl.constants as cons
+from cddagl.snapshots import (
+    SnapshotReader, SnapshotEntry, is_snapshot, get_chunks_dir, chunk_path, read_snapshot,
+    chunk_boundaries, member_target, replace_file, read_chunk
+)
+
+logger = logging.getLogger('cddagl')
+
+ZIP_CODECS = {
+    'stored': zipfile.ZIP_STORED,
+    'deflate': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA
+}
+
+TarEntry = namedtuple('TarEntry', 'filename file_size')
+
+# {backup path: ((size, mtime), plan)} of the backups browsed last, see
+# cached_restore_plan
+restore_plan_cache = OrderedDict()
+restore_plan_cache_lock = threading.Lock()
+
+
+def available_codecs():
+    """List the backup codecs usable with the installed modules."""
+    return [codec for codec in cons.BACKUP_CODECS
+        if codec != 'zstd' or zstandard is not None]
+
+
+def codec_level(codec, level):
+    """Clamp a compression level to the range of codec.
+
+    Returns None for codecs without levels.
+    """
+    if codec not in cons.BACKUP_CODEC_LEVELS:
+        return None
+
+    minimum, maximum, default = cons.BACKUP_CODEC_LEVELS[codec]
+    if level is None:
+        return default
+
+    return max(minimum, min(maximum, level))
+
+
+def split_backup_name(filename):
+    """Split a backup file name in its name and its extension.
+
+    Returns (filename, None) when the file is not a backup.
+    """
+    filename_lower = filename.lower()
+    for ext in cons.BACKUP_EXTENSIONS:
+        if filename_lower.endswith(ext):
+            return filename[:-len(ext)], ext
+
+    return filename, None
+
+
+def is_incompressible(arcname, data):
+    """Tell if compressing a member is a waste of time.
+
+    Members are detected by their extension, or by deflating a sample at the
+    fastest level.
+    """
+    if os.path.splitext(arcname)[1].lower() in cons.INCOMPRESSIBLE_EXTENSIONS:
+        return True
+
+    if len(data) < 4096:
+        return False
+
+    sample = data[:cons.BACKUP_PROBE_SIZE]
+    return len(zlib.compress(sample, 1)) > len(sample) * cons.BACKUP_PROBE_RATIO
+
+
+# Zip records written by RawZipWriter, see the APPNOTE of the zip format.
+# Only the public zipfile API is used to read archives back.
+ZIP_LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+ZIP_LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+ZIP_CENTRAL_HEADER = struct.Struct('<4s4B4HL2L5H2L')
+ZIP_CENTRAL_HEADER_SIGNATURE = b'PK\x01\x02'
+ZIP_END_RECORD = struct.Struct('<4s4H2LH')
+ZIP_END_RECORD_SIGNATURE = b'PK\x05\x06'
+ZIP64_END_RECORD = struct.Struct('<4sQ2H2L4Q')
+ZIP64_END_RECORD_SIGNATURE = b'PK\x06\x06'
+ZIP64_END_LOCATOR = struct.Struct('<4sLQL')
+ZIP64_END_LOCATOR_SIGNATURE = b'PK\x06\x07'
+ZIP64_EXTRA_ID = 0x0001
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP64_COUNT_LIMIT = 0xFFFF
+
+ZIP_FLAG_LZMA_EOS = 0x02
+ZIP_FLAG_UTF8 = 0x800
+
+ZIP_VERSIONS = {
+    zipfile.ZIP_STORED: 20,
+    zipfile.ZIP_DEFLATED: 20,
+    zipfile.ZIP_BZIP2: 46,
+    zipfile.ZIP_LZMA: 63
+}
+ZIP64_VERSION = 45
+
+# The LZMA properties of the default preset
+LZMA_DICT_SIZE = 8 * 1024 * 1024
+LZMA_LC = 3
+LZMA_LP = 0
+LZMA_PB = 2
+
+
+class LzmaZipCompressor():
+    """Compress a zip member with LZMA. Zip archives expect a small header
+    with the properties of the encoder before the raw LZMA stream."""
+
+    def __init__(self):
+        self.compressor = lzma.LZMACompressor(lzma.FORMAT_RAW, filters=[{
+            'id': lzma.FILTER_LZMA1,
+            'dict_size': LZMA_DICT_SIZE,
+            'lc': LZMA_LC,
+            'lp': LZMA_LP,
+            'pb': LZMA_PB
+        }])
+
+        properties = struct.pack('<BL', (LZMA_PB * 5 + LZMA_LP) * 9 + LZMA_LC,
+            LZMA_DICT_SIZE)
+        self.header = struct.pack('<BBH', 9, 4, len(properties)) + properties
+
+    def compress(self, data):
+        compressed = self.compressor.compress(data)
+        if self.header is not None:
+            compressed = self.header + compressed
+            self.header = None
+        return compressed
+
+    def flush(self):
+        return self.compress(b'') + self.compressor.flush()
+
+
+def zip_compressor(compress_type, level=None):
+    """Return a compressor for a zip member, None for stored members."""
+    if compress_type == zipfile.ZIP_DEFLATED:
+        return zlib.compressobj(-1 if level is None else level, zlib.DEFLATED,
+            -15)
+    if compress_type == zipfile.ZIP_BZIP2:
+        return bz2.BZ2Compressor(9 if level is None else level)
+    if compress_type == zipfile.ZIP_LZMA:
+        return LzmaZipCompressor()
+
+    return None
+
+
+def zip_dos_time(date_time):
+    year, month, day, hour, minute, second = date_time[:6]
+    return (hour << 11 | minute << 5 | second // 2,
+        (year - 1980) << 9 | month << 5 | day)
+
+
+def zip_filename(zinfo):
+    """Return the encoded name of a member and its flag bits."""
+    try:
+        return zinfo.filename.encode('ascii'), zinfo.flag_bits
+    except UnicodeEncodeError:
+        return zinfo.filename.encode('utf8'), zinfo.flag_bits | ZIP_FLAG_UTF8
+
+
+def zip_version(zinfo, zip64):
+    version = ZIP_VERSIONS.get(zinfo.compress_type, 20)
+    if zip64:
+        version = max(version, ZIP64_VERSION)
+    return version
+
+
+def zip_local_header(zinfo, zip64):
+    filename, flag_bits = zip_filename(zinfo)
+    dos_time, dos_date = zip_dos_time(zinfo.date_time)
+
+    file_size = zinfo.file_size
+    compress_size = zinfo.compress_size
+    extra = b''
+    if zip64:
+        extra = struct.pack('<2H2Q', ZIP64_EXTRA_ID, 16, file_size,
+            compress_size)
+        file_size = compress_size = ZIP64_LIMIT
+
+    return ZIP_LOCAL_HEADER.pack(ZIP_LOCAL_HEADER_SIGNATURE,
+        zip_version(zinfo, zip64), 0, flag_bits, zinfo.compress_type,
+        dos_time, dos_date, zinfo.CRC, compress_size, file_size,
+        len(filename), len(extra)) + filename + extra
+
+
+def zip_central_header(zinfo):
+    filename, flag_bits = zip_filename(zinfo)
+    dos_time, dos_date = zip_dos_time(zinfo.date_time)
+
+    file_size = zinfo.file_size
+    compress_size = zinfo.compress_size
+    header_offset = zinfo.header_offset
+
+    # Only the values which do not fit go in the zip64 extra field
+    zip64_values = []
+    if file_size >= ZIP64_LIMIT:
+        zip64_values.append(file_size)
+        file_size = ZIP64_LIMIT
+    if compress_size >= ZIP64_LIMIT:
+        zip64_values.append(compress_size)
+        compress_size = ZIP64_LIMIT
+    if header_offset >= ZIP64_LIMIT:
+        zip64_values.append(header_offset)
+        header_offset = ZIP64_LIMIT
+
+    extra = b''
+    if len(zip64_values) > 0:
+        extra = struct.pack('<2H{0}Q'.format(len(zip64_values)),
+            ZIP64_EXTRA_ID, 8 * len(zip64_values), *zip64_values)
+
+    version = zip_version(zinfo, len(zip64_values) > 0)
+    return ZIP_CENTRAL_HEADER.pack(ZIP_CENTRAL_HEADER_SIGNATURE, version,
+        zinfo.create_system, version, 0, flag_bits, zinfo.compress_type,
+        dos_time, dos_date, zinfo.CRC, compress_size, file_size,
+        len(filename), len(extra), 0, 0, zinfo.internal_attr,
+        zinfo.external_attr, header_offset) + filename + extra
+
+
+class RawZipWriter():
+    """Zip archive writer which accepts members compressed elsewhere.
+
+    Members are compressed in worker threads and only their already
+    compressed bytes go through this writer, which appends them one after
+    another to the archive. The zip records are written here rather than by
+    zipfile, whose writer cannot take compressed data.
+    """
+
+    def __init__(self, path):
+        self.fp = open(path, 'wb')
+        self.infos = []
+
+    def write_compressed(self, zinfo, data):
+        zinfo.header_offset = self.fp.tell()
+
+        zip64 = (zinfo.file_size >= ZIP64_LIMIT
+            or zinfo.compress_size >= ZIP64_LIMIT)
+        self.fp.write(zip_local_header(zinfo, zip64))
+        self.fp.write(data)
+
+        self.infos.append(zinfo)
+
+    def write_file(self, path, arcname, compress_type=zipfile.ZIP_DEFLATED,
+            level=None):
+        """Compress a file while reading it, for files too large to be
+        compressed in memory."""
+        zinfo = zipfile.ZipInfo.from_file(path, arcname,
+            strict_timestamps=False)
+        zinfo.compress_type = compress_type
+        if compress_type == zipfile.ZIP_LZMA:
+            zinfo.flag_bits |= ZIP_FLAG_LZMA_EOS
+
+        # The sizes and CRC are only known at the end, the local header is
+        # written again once they are. Like zipfile, leave room for zip64
+        # sizes when the file gets close to the limit.
+        zip64 = zinfo.file_size * 1.05 >= ZIP64_LIMIT
+        zinfo.header_offset = self.fp.tell()
+        zinfo.compress_size = 0
+        zinfo.CRC = 0
+        self.fp.write(zip_local_header(zinfo, zip64))
+
+        compressor = zip_compressor(compress_type, level)
+        crc = 0
+        file_size = 0
+        compress_size = 0
+        try:
+            with open(path, 'rb') as member_file:
+                for data in iter(lambda: member_file.read(
+                        cons.COPY_BUFFER_SIZE), b''):
+                    crc = zlib.crc32(data, crc)
+                    file_size += len(data)
+                    if compressor is not None:
+                        data = compressor.compress(data)
+                    self.fp.write(data)
+                    compress_size += len(data)
+
+            if compressor is not None:
+                data = compressor.flush()
+                self.fp.write(data)
+                compress_size += len(data)
+
+            if not zip64 and (file_size >= ZIP64_LIMIT
+                    or compress_size >= ZIP64_LIMIT):
+                raise OSError('{0} grew too large while being backed '
+                    'up'.format(path))
+        except BaseException:
+            # Drop what was written of the member
+            self.fp.seek(zinfo.header_offset)
+            self.fp.truncate()
+            raise
+
+        zinfo.file_size = file_size
+        zinfo.compress_size = compress_size
+        zinfo.CRC = crc
+
+        end = self.fp.tell()
+        self.fp.seek(zinfo.header_offset)
+        self.fp.write(zip_local_header(zinfo, zip64))
+        self.fp.seek(end)
+
+        self.infos.append(zinfo)
+
+        return zinfo
+
+    def write_data(self, arcname, data):
+        zinfo = zipfile.ZipInfo(arcname, time.localtime()[:6])
+        zinfo.file_size = len(data)
+        zinfo.CRC = zlib.crc32(data)
+        zinfo.external_attr = 0o600 << 16
+
+        compressor = zip_compressor(zipfile.ZIP_DEFLATED)
+        zinfo, compressed = set_compressed(zinfo, zipfile.ZIP_DEFLATED,
+            compressor.compress(data) + compressor.flush())
+        self.write_compressed(zinfo, compressed)
+
+    def close(self):
+        if self.fp is None:
+            return
+
+        try:
+            central_offset = self.fp.tell()
+            for zinfo in self.infos:
+                self.fp.write(zip_central_header(zinfo))
+            central_size = self.fp.tell() - central_offset
+
+            count = len(self.infos)
+            if (count > ZIP64_COUNT_LIMIT or central_offset >= ZIP64_LIMIT
+                    or central_size >= ZIP64_LIMIT):
+                end_offset = self.fp.tell()
+                self.fp.write(ZIP64_END_RECORD.pack(ZIP64_END_RECORD_SIGNATURE,
+                    ZIP64_END_RECORD.size - 12, ZIP64_VERSION, ZIP64_VERSION,
+                    0, 0, count, count, central_size, central_offset))
+                self.fp.write(ZIP64_END_LOCATOR.pack(
+                    ZIP64_END_LOCATOR_SIGNATURE, 0, end_offset, 1))
+
+                count = min(count, ZIP64_COUNT_LIMIT)
+                central_offset = min(central_offset, ZIP64_LIMIT)
+                central_size = min(central_size, ZIP64_LIMIT)
+
+            self.fp.write(ZIP_END_RECORD.pack(ZIP_END_RECORD_SIGNATURE, 0, 0,
+                count, count, central_size, central_offset, 0))
+        finally:
+            self.fp.close()
+            self.fp = None
+
+
+def read_raw_member(fp, zinfo):
+    """Read the compressed data of a member from an open zip file.
+
+    Returns None when the local header of the member cannot be found.
+    """
+    fp.seek(zinfo.header_offset)
+    header = fp.read(ZIP_LOCAL_HEADER.size)
+    if (len(header) != ZIP_LOCAL_HEADER.size
+            or header[0:4] != ZIP_LOCAL_HEADER_SIGNATURE):
+        return None
+
+    fields = ZIP_LOCAL_HEADER.unpack(header)
+    filename_length, extra_length = fields[-2:]
+    fp.seek(filename_length + extra_length, os.SEEK_CUR)
+
+    data = fp.read(zinfo.compress_size)
+    if len(data) != zinfo.compress_size:
+        return None
+
+    return data
+
+
+def compress_file(path, arcname, compress_type=zipfile.ZIP_DEFLATED,
+        level=None, previous=None):
+    """Read and compress a whole file.
+
+    Incompressible files are stored instead. previous is an optional (file,
+    ZipInfo) tuple for the same member in an older backup. When the content
+    of the file did not change, the compressed data of that member is copied
+    instead of compressing the file again.
+
+    Returns the ZipInfo describing the member along with its compressed data.
+    """
+    zinfo = zipfile.ZipInfo.from_file(path, arcname, strict_timestamps=False)
+
+    with open(path, 'rb') as member_file:
+        data = member_file.read()
+
+    zinfo.file_size = len(data)
+    zinfo.CRC = zlib.crc32(data)
+
+    if compress_type != zipfile.ZIP_STORED and is_incompressible(arcname,
+            data):
+        compress_type = zipfile.ZIP_STORED
+
+    if previous is not None:
+        previous_file, previous_info = previous
+        if (previous_info.CRC == zinfo.CRC
+                and previous_info.file_size == zinfo.file_size
+                and previous_info.compress_type == compress_type):
+            compressed = read_raw_member(previous_file, previous_info)
+            if compressed is not None:
+                return set_compressed(zinfo, compress_type, compressed)
+
+    # zlib, bz2 and lzma release the GIL while compressing, which lets the
+    # workers use every core
+    compressor = zip_compressor(compress_type, level)
+    if compressor is None:
+        return set_compressed(zinfo, zipfile.ZIP_STORED, data)
+
+    compressed = compressor.compress(data) + compressor.flush()
+    if len(compressed) >= len(data):
+        return set_compressed(zinfo, zipfile.ZIP_STORED, data)
+
+    return set_compressed(zinfo, compress_type, compressed)
+
+
+def set_compressed(zinfo, compress_type, compressed):
+    zinfo.compress_type = compress_type
+    zinfo.compress_size = len(compressed)
+    if compress_type == zipfile.ZIP_LZMA:
+        # The LZMA stream ends with an end of stream marker
+        zinfo.flag_bits |= ZIP_FLAG_LZMA_EOS
+
+    return zinfo, compressed
+
+
+def compress_batch(members, compress_type=zipfile.ZIP_DEFLATED, level=None,
+        previous_path=None, previous_infos=None):
+    """Compress a batch of members.
+
+    previous_infos lists, for each member, the ZipInfo of the same member in
+    the previous_path backup or None.
+    """
+    if previous_infos is None or all(info is None for info in previous_infos):
+        previous_path = None
+        previous_infos = [None] * len(members)
+
+    previous_file = None
+    if previous_path is not None:
+        try:
+            previous_file = open(previous_path, 'rb')
+        except OSError as e:
+            logger.warning('Could not open previous backup {0}: {1}'.format(
+                previous_path, e))
+
+    results = []
+
+    for member, previous_info in zip(members, previous_infos):
+        path, arcname, size, mtime = member
+        previous = None
+        if previous_file is not None and previous_info is not None:
+            previous = (previous_file, previous_info)
+
+        try:
+            results.append(compress_file(path, arcname, compress_type, level,
+                previous))
+        except OSError as e:
+            # The game or the user might have removed the file since it was
+            # found
+            logger.warning('Could not backup {0}: {1}'.format(path, e))
+            results.append(None)
+
+    if previous_file is not None:
+        previous_file.close()
+
+    return results
+
+
+def batch_members(members):
+    """Group members in compression tasks.
+
+    Tiny files are grouped together so that each task is worth sending to a
+    worker. Large files are streamed by the writer itself instead of being
+    loaded in memory.
+
+    Yields (members, streamed) tuples.
+    """
+    batch = []
+    batch_size = 0
+
+    for member in members:
+        size = member[2]
+
+        if size >= cons.BACKUP_STREAM_SIZE:
+            if len(batch) > 0:
+                yield batch, False
+                batch = []
+                batch_size = 0
+            yield [member], True
+            continue
+
+        batch.append(member)
+        batch_size += size
+
+        if (len(batch) >= cons.BACKUP_BATCH_FILES
+                or batch_size >= cons.BACKUP_BATCH_SIZE):
+            yield batch, False
+            batch = []
+            batch_size = 0
+
+    if len(batch) > 0:
+        yield batch, False
+
+
+def settled_members(members, min_age, max_wait, unsettled=None,
+        interrupted=None):
+    """Hold back the members modified less than min_age seconds ago, which
+    the game might still be writing.
+
+    They are yielded last, once they were left alone for min_age seconds,
+    with their new size and mtime. The members still changing after max_wait
+    seconds are added to unsettled instead, the backup is then incomplete.
+    """
+    min_age_ns = int(min_age * 1e9)
+
+    pending = []
+    for member in members:
+        if member[3] > time.time_ns() - min_age_ns:
+            pending.append(member)
+            continue
+
+        yield member
+
+    deadline = time.monotonic() + max_wait
+    while len(pending) > 0:
+        settled_before = time.time_ns() - min_age_ns
+
+        still_pending = []
+        for member in pending:
+            path, arcname, size, mtime = member
+            try:
+                member_stat = os.stat(path)
+            except FileNotFoundError:
+                # The game removed it, it is not part of the saves anymore
+                continue
+
+            if member_stat.st_mtime_ns > settled_before:
+                still_pending.append(member)
+            else:
+                yield (path, arcname, member_stat.st_size,
+                    member_stat.st_mtime_ns)
+        pending = still_pending
+
+        if len(pending) == 0:
+            break
+        if (time.monotonic() >= deadline
+                or (interrupted is not None and interrupted())):
+            for member in pending:
+                logger.info('{0} is still being written, the backup is '
+                    'incomplete'.format(member[0]))
+            if unsettled is not None:
+                unsettled.extend(pending)
+            return
+
+        time.sleep(1)
+
+
+def get_pending_dir(backup_dir):
+    return os.path.join(backup_dir, cons.PENDING_BACKUPS_DIR)
+
+
+def capture_saves(save_dir, base_dir, backup_dir, name, single=False,
+        skip_unchanged=False):
+    """Capture save_dir as hard links to be compressed in a backup later.
+
+    Capturing only adds directory entries, it takes a fraction of the time of
+    a backup. The game replaces its save files instead of writing in them, so
+    the captured files keep their content while the game runs.
+
+    Returns the directory of the capture, which mirrors base_dir, or None
+    when save_dir is not inside base_dir. Raises OSError when the files
+    cannot be linked, on file systems without hard links for instance.
+    """
+    save_path = os.path.relpath(save_dir, base_dir)
+    if save_path.startswith(os.pardir):
+        return None
+
+    # Named after the time of the capture so they are compressed in order
+    capture_dir = os.path.join(get_pending_dir(backup_dir),
+        '{0:016x}'.format(time.time_ns()))
+    os.makedirs(capture_dir)
+
+    try:
+        for path, arcname, size, mtime in iter_backup_members(save_dir,
+                base_dir):
+            target = os.path.join(capture_dir, arcname)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.link(path, target)
+
+        # Written last, captures without it are incomplete
+        with open(os.path.join(capture_dir, cons.PENDING_BACKUP_INFO), 'w',
+                encoding='utf8') as info_file:
+            json.dump({'name': name, 'single': single, 'save_path': save_path,
+                'skip_unchanged': skip_unchanged}, info_file)
+    except OSError:
+        shutil.rmtree(capture_dir, ignore_errors=True)
+        raise
+
+    return capture_dir
+
+
+def list_pending_backups(backup_dir):
+    """List the captures waiting to be compressed, oldest first.
+
+    Returns a list of (capture directory, info) where info has the name,
+    single and skip_unchanged values given to capture_saves and the
+    save_path inside the capture.
+    """
+    pending = []
+    try:
+        with os.scandir(get_pending_dir(backup_dir)) as it:
+            for entry in it:
+                if not entry.is_dir():
+                    continue
+                try:
+                    with open(os.path.join(entry.path,
+                            cons.PENDING_BACKUP_INFO), 'r',
+                            encoding='utf8') as info_file:
+                        info = json.load(info_file)
+                except (OSError, ValueError) as e:
+                    logger.warning('Skipping incomplete capture {0}: {1}'.format(
+                        entry.path, e))
+                    continue
+                pending.append((entry.path, info))
+    except OSError:
+        return []
+
+    return sorted(pending)
+
+
+def remove_pending_backup(capture_dir):
+    shutil.rmtree(capture_dir, ignore_errors=True)
+
+
+def iter_backup_members(save_dir, base_dir):
+    """Walk save_dir and yield (path, arcname, size, mtime) tuples as they are
+    found.
+
+    Member names are relative to base_dir. Being a generator, this lets
+    write_backup start compressing with the first file found instead of
+    waiting for the whole tree to be walked.
+    """
+    next_scans = deque([save_dir])
+
+    while len(next_scans) > 0:
+        scan_dir = next_scans.popleft()
+        try:
+            with os.scandir(scan_dir) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            next_scans.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            entry_stat = entry.stat()
+                            yield (entry.path,
+                                os.path.relpath(entry.path, base_dir),
+                                entry_stat.st_size, entry_stat.st_mtime_ns)
+                    except OSError as e:
+                        logger.warning('Could not backup {0}: {1}'.format(
+                            entry.path, e))
+        except OSError as e:
+            logger.warning('Could not scan {0}: {1}'.format(scan_dir, e))
+
+
+def saves_fingerprint(members):
+    """Hash the names, sizes and mtimes of backup members.
+
+    Saves with the same fingerprint as a backup were not touched since, they
+    do not need to be backed up again.
+    """
+    fingerprint = hashlib.sha256()
+    for arcname, size, mtime in sorted((arcname.replace(os.sep, '/'), size,
+            mtime) for path, arcname, size, mtime in members):
+        fingerprint.update('{0}\0{1}\0{2}\n'.format(arcname, size,
+            mtime).encode('utf8'))
+
+    return fingerprint.hexdigest()
+
+
+def saves_unchanged(members, backup_path):
+    """Check whether members have the content of the files of a backup.
+
+    The game rewrites files with the same content when saving, so their
+    fingerprint changes. The files are only read when the backup has the
+    same file names and sizes.
+    """
+    try:
+        infos = {info.filename: info for backup_path, infos
+            in restore_plan(backup_path) for info in infos
+            if not info.filename.endswith('/')}
+    except (OSError, ValueError, KeyError, TypeError, zipfile.BadZipFile) as e:
+        logger.warning('Could not read backup {0}: {1}'.format(backup_path, e))
+        return False
+
+    if len(infos) != len(members):
+        return False
+
+    for path, arcname, size, mtime in members:
+        info = infos.get(arcname.replace(os.sep, '/'))
+        if info is None or info.file_size != size:
+            return False
+
+    try:
+        return all(member_unchanged(path, infos[arcname.replace(os.sep, '/')])
+            for path, arcname, size, mtime in members)
+    except OSError:
+        return False
+
+
+def read_backup_manifest(backup_path):
+    """Read the manifest of an incremental capable backup.
+
+    The manifest lists every file of the saves when the backup was made as
+    {arcname: [size, mtime, crc]}, along with the file name of the backup it
+    is based on. Returns None for backups without a manifest.
+    """
+    try:
+        with zipfile.ZipFile(backup_path) as zfile:
+            try:
+                data = zfile.read(cons.BACKUP_MANIFEST_NAME)
+            except KeyError:
+                return None
+    except (OSError, zipfile.BadZipFile):
+        return None
+
+    try:
+        manifest = json.loads(data.decode('utf8'))
+    except ValueError:
+        return None
+
+    if not isinstance(manifest, dict) or 'files' not in manifest:
+        return None
+
+    return manifest
+
+
+def backup_base_path(backup_path, manifest):
+    if manifest is None or manifest.get('base') is None:
+        return None
+
+    return os.path.join(os.path.dirname(backup_path), manifest['base'])
+
+
+def list_backups(backup_dir):
+    """List the backup archives of backup_dir, most recent first."""
+    backups = []
+    try:
+        with os.scandir(backup_dir) as it:
+            for entry in it:
+                filename, ext = os.path.splitext(entry.name)
+                if entry.is_file() and ext.lower() == '.zip':
+                    backups.append((entry.stat().st_mtime, entry.path))
+    except OSError:
+        return []
+
+    return [path for mtime, path in sorted(backups, reverse=True)]
+
+
+def find_previous_backup(backup_dir):
+    """Find the most recent backup, or None when there is none."""
+    backups = list_backups(backup_dir)
+    if len(backups) == 0:
+        return None
+
+    return backups[0]
+
+
+def find_backup_base(backup_dir):
+    """Find the backup the next incremental backup should be based on.
+
+    This is the most recent backup with a manifest, unless its chain is
+    already MAX_BACKUP_CHAIN_LENGTH long, in which case a full backup should
+    be made. Returns None when there is no suitable base.
+    """
+    for path in list_backups(backup_dir):
+        manifest = read_backup_manifest(path)
+        if manifest is None:
+            continue
+
+        if manifest.get('depth', 0) + 1 >= cons.MAX_BACKUP_CHAIN_LENGTH:
+            return None
+
+        return path
+
+    return None
+
+
+def find_shard_base(backup_dir):
+    """Find the backup a backup of only some worlds should be based on.
+
+    The other worlds are taken from that backup, so it has to be the most
+    recent one and have a manifest. Returns None when a full backup should be
+    made instead.
+    """
+    previous_path = find_previous_backup(backup_dir)
+    if previous_path is None:
+        return None
+
+    manifest = read_backup_manifest(previous_path)
+    if (manifest is None
+            or manifest.get('depth', 0) + 1 >= cons.MAX_BACKUP_CHAIN_LENGTH):
+        return None
+
+    return previous_path
+
+
+def world_shard(world_dir, base_dir):
+    """Prefix of the member names of a world in a backup."""
+    return os.path.relpath(world_dir, base_dir).replace(os.sep, '/') + '/'
+
+
+def member_world(filename, save_dir_name):
+    """Name of the world a backup member belongs to, None for the files
+    outside of worlds."""
+    parts = filename.split('/')
+    if len(parts) < 3 or parts[0] != save_dir_name:
+        return None
+
+    return parts[1]
+
+
+def backup_worlds(plan, save_dir_name):
+    """List the worlds of a restore plan."""
+    worlds = set()
+    for backup_path, infos in plan:
+        for info in infos:
+            world = member_world(info.filename, save_dir_name)
+            if world is not None:
+                worlds.add(world)
+
+    return sorted(worlds)
+
+
+def world_restore_plan(plan, save_dir_name, worlds):
+    """Only keep the members of some worlds in a restore plan."""
+    world_plan = []
+    for backup_path, infos in plan:
+        world_infos = [info for info in infos
+            if member_world(info.filename, save_dir_name) in worlds]
+        if len(world_infos) > 0:
+            world_plan.append((backup_path, world_infos))
+
+    return world_plan
+
+
+def select_members(plan, filenames=(), prefixes=()):
+    """Only keep the members of a restore plan which are in filenames or
+    whose name starts with one of prefixes."""
+    filenames = set(filenames)
+    prefixes = tuple(prefixes)
+
+    selected_plan = []
+    for backup_path, infos in plan:
+        selected_infos = [info for info in infos if info.filename in filenames
+            or (len(prefixes) > 0 and info.filename.startswith(prefixes))]
+        if len(selected_infos) > 0:
+            selected_plan.append((backup_path, selected_infos))
+
+    return selected_plan
+
+
+def character_name(save_file):
+    """Name of the character of a .sav file. The game names these files after
+    the base64 encoded name of the character prefixed with #."""
+    base_name = save_file[:-len('.sav')]
+    if base_name.startswith('#'):
+        encoded = base_name[1:] + '=' * (-(len(base_name) - 1) % 4)
+        for altchars in (None, b'-_'):
+            try:
+                return base64.b64decode(encoded, altchars=altchars,
+                    validate=True).decode('utf8')
+            except (ValueError, UnicodeDecodeError):
+                pass
+
+    return base_name
+
+
+def world_characters(plan, save_dir_name):
+    """Find the characters of each world of a restore plan.
+
+    The files of a character are its .sav file and the files next to it with
+    the same name before the first dot. Returns {world: {member prefix:
+    character name}} where every file of a character starts with the prefix.
+    """
+    characters = {}
+    for backup_path, infos in plan:
+        for info in infos:
+            parts = info.filename.split('/')
+            if (len(parts) == 3 and parts[0] == save_dir_name
+                    and parts[2].endswith('.sav')):
+                prefix = '{0}/{1}/{2}.'.format(parts[0], parts[1],
+                    parts[2][:-len('.sav')])
+                characters.setdefault(parts[1], {})[prefix] = character_name(
+                    parts[2])
+
+    return characters
+
+
+def cached_restore_plan(backup_path):
+    """Same as restore_plan but keeps the plans of the last backups read in
+    memory. Browsing a backup again does not read its central directory, or
+    decompress a whole tar backup, unless the backup file changed."""
+    stat_result = os.stat(backup_path)
+    key = (stat_result.st_size, stat_result.st_mtime_ns)
+
+    with restore_plan_cache_lock:
+        cached = restore_plan_cache.get(backup_path)
+        if cached is not None and cached[0] == key:
+            restore_plan_cache.move_to_end(backup_path)
+            return cached[1]
+
+    plan = restore_plan(backup_path)
+
+    with restore_plan_cache_lock:
+        restore_plan_cache[backup_path] = (key, plan)
+        restore_plan_cache.move_to_end(backup_path)
+        while len(restore_plan_cache) > cons.RESTORE_PLAN_CACHE_SIZE:
+            restore_plan_cache.popitem(last=False)
+
+    return plan
+
+
+def backup_chain(backup_path):
+    """List the backups needed to restore backup_path, newest first.
+
+    Raises FileNotFoundError when a base backup is missing.
+    """
+    chain = [backup_path]
+    manifest = read_backup_manifest(backup_path)
+
+    base_path = backup_base_path(backup_path, manifest)
+    while base_path is not None:
+        if not os.path.isfile(base_path) or base_path in chain:
+            raise FileNotFoundError('Base backup {0} is missing'.format(
+                base_path))
+        chain.append(base_path)
+        base_path = backup_base_path(base_path,
+            read_backup_manifest(base_path))
+
+    return chain
+
+
+def dependent_backups(backup_path):
+    """List the backups directly based on backup_path. They refer to it by
+    file name, so it cannot be renamed or replaced while they exist."""
+    base_name = os.path.basename(backup_path)
+
+    dependents = []
+    for path in list_backups(os.path.dirname(backup_path)):
+        if path == backup_path:
+            continue
+
+        manifest = read_backup_manifest(path)
+        if manifest is not None and manifest.get('base') == base_name:
+            dependents.append(path)
+
+    return dependents
+
+
+def required_backups(backup_paths):
+    """Return the paths of every base backup needed by backup_paths."""
+    required = set()
+
+    for backup_path in backup_paths:
+        base_path = backup_base_path(backup_path,
+            read_backup_manifest(backup_path))
+        while base_path is not None and base_path not in required:
+            required.add(base_path)
+            base_path = backup_base_path(base_path,
+                read_backup_manifest(base_path))
+
+    return required
+
+
+def expired_backups(backups, keep_last, keep_hourly=0, keep_daily=0,
+        keep_weekly=0, max_size=0):
+    """Apply a retention policy to backups and return the paths to delete,
+    oldest first.
+
+    backups is a list of dicts with the path, modified timestamp and size of
+    each backup. The keep_last most recent backups are kept, as well as the
+    most recent backup of each of the keep_hourly last hours, keep_daily last
+    days and keep_weekly last weeks which have backups. The oldest of those
+    are then deleted until the kept backups use at most max_size bytes, 0
+    being no limit. The most recent backup is always kept.
+
+    A backup about to be made can be accounted for with an entry whose path
+    is None. It takes a slot like any other backup but is never returned.
+    """
+    backups = sorted(backups, key=lambda backup: backup['modified'],
+        reverse=True)
+
+    kept = set(range(min(max(keep_last, 1), len(backups))))
+
+    tiers = (
+        (keep_hourly, lambda date: (date.year, date.month, date.day, date.hour)),
+        (keep_daily, lambda date: (date.year, date.month, date.day)),
+        (keep_weekly, lambda date: date.isocalendar()[:2])
+    )
+    for count, period_key in tiers:
+        periods = set()
+        for index, backup in enumerate(backups):
+            if len(periods) >= count:
+                break
+
+            key = period_key(datetime.fromtimestamp(backup['modified']))
+            if key not in periods:
+                periods.add(key)
+                kept.add(index)
+
+    if max_size > 0:
+        kept_size = sum(backups[index]['size'] for index in kept)
+        for index in sorted(kept, reverse=True):
+            if kept_size <= max_size or index == 0:
+                break
+            kept.remove(index)
+            kept_size -= backups[index]['size']
+
+    return [backup['path'] for index, backup in reversed(list(enumerate(backups)))
+        if index not in kept and backup['path'] is not None]
+
+
+def restore_plan(backup_path):
+    """Find where each file of a backup has to be extracted from.
+
+    Returns a list of (backup path, [ZipInfo]) for the backup and the bases
+    it depends on. Backups without a manifest are restored as a whole.
+    """
+    if is_snapshot(backup_path):
+        chunks_dir = get_chunks_dir(os.path.dirname(backup_path))
+        with SnapshotReader(backup_path) as reader:
+            entries = reader.infolist()
+        for entry in entries:
+            for chunk_id, compress_size in entry.chunks:
+                if not os.path.isfile(chunk_path(chunks_dir, chunk_id)):
+                    raise FileNotFoundError('Chunk {0} of {1} is missing'.format(
+                        chunk_id, backup_path))
+        return [(backup_path, entries)]
+
+    if backup_path.lower().endswith(cons.BACKUP_TAR_ZST_EXT):
+        with TarZstReader(backup_path) as reader:
+            return [(backup_path, reader.infolist())]
+
+    chain = backup_chain(backup_path)
+    manifest = read_backup_manifest(backup_path)
+
+    plan = []
+    if manifest is None:
+        with zipfile.ZipFile(backup_path) as zfile:
+            plan.append((backup_path, [info for info in zfile.infolist()
+                if info.filename != cons.BACKUP_MANIFEST_NAME]))
+        return plan
+
+    remaining = set(manifest['files'])
+    for chain_path in chain:
+        if len(remaining) == 0:
+            break
+
+        with zipfile.ZipFile(chain_path) as zfile:
+            infos = []
+            for info in zfile.infolist():
+                if info.filename in remaining:
+                    remaining.discard(info.filename)
+                    infos.append(info)
+        if len(infos) > 0:
+            plan.append((chain_path, infos))
+
+    if len(remaining) > 0:
+        raise FileNotFoundError('{0} files of {1} are missing from its base '
+            'backups'.format(len(remaining), backup_path))
+
+    return plan
+
+
+def zip_date_time(mtime):
+    """Convert an mtime in nanoseconds to a zip member date_time."""
+    date_time = time.localtime(mtime / 1e9)[:6]
+    if date_time[0] < 1980:
+        return (1980, 1, 1, 0, 0, 0)
+
+    # Zip timestamps have a two seconds resolution
+    return date_time[:5] + (date_time[5] // 2 * 2,)
+
+
+def read_previous_members(previous_path):
+    """Index the members of a previous backup which can be copied as is.
+
+    Returns {arcname: (ZipInfo, mtime)}, where mtime comes from the manifest
+    when the backup has one and is None otherwise.
+    """
+    try:
+        with zipfile.ZipFile(previous_path) as zfile:
+            infos = zfile.infolist()
+    except (OSError, zipfile.BadZipFile) as e:
+        logger.warning('Could not read previous backup {0}: {1}'.format(
+            previous_path, e))
+        return {}
+
+    manifest = read_backup_manifest(previous_path)
+    mtimes = {}
+    if manifest is not None:
+        mtimes = {name: values[1] for name, values
+            in manifest['files'].items()}
+
+    return {
+        info.filename: (info, mtimes.get(info.filename))
+        for info in infos
+        # Encrypted members cannot be copied
+        if not info.flag_bits & 0x01
+            and info.filename != cons.BACKUP_MANIFEST_NAME
+    }
+
+
+def open_backup(backup_path):
+    """Open a zip backup or a snapshot for extraction."""
+    if is_snapshot(backup_path):
+        return SnapshotReader(backup_path)
+    if backup_path.lower().endswith(cons.BACKUP_TAR_ZST_EXT):
+        return TarZstReader(backup_path)
+
+    return zipfile.ZipFile(backup_path)
+
+
+def extraction_tasks(plan):
+    """Group the members of a restore plan in extraction tasks.
+
+    Tar backups can only be read in sequence, all their members are one task.
+    Members of the other backups are grouped like for compression.
+
+    Yields (backup path, [infos]) tuples.
+    """
+    for backup_path, infos in plan:
+        if backup_path.lower().endswith(cons.BACKUP_TAR_ZST_EXT):
+            yield backup_path, infos
+            continue
+
+        batch = []
+        batch_size = 0
+        for info in infos:
+            batch.append(info)
+            batch_size += info.file_size
+
+            if (len(batch) >= cons.BACKUP_BATCH_FILES
+                    or batch_size >= cons.BACKUP_BATCH_SIZE):
+                yield backup_path, batch
+                batch = []
+                batch_size = 0
+
+        if len(batch) > 0:
+            yield backup_path, batch
+
+
+def extract_member(handle, info, path):
+    """Extract a member of an opened backup in path, replacing the file
+    already there instead of writing in it."""
+    if not isinstance(handle, zipfile.ZipFile):
+        return handle.extract(info, path)
+
+    target = member_target(path, info.filename)
+    if info.is_dir():
+        os.makedirs(target, exist_ok=True)
+        return target
+
+    with handle.open(info) as source:
+        replace_file(target, iter(lambda: source.read(cons.COPY_BUFFER_SIZE), b''))
+
+    return target
+
+
+def extract_backup(plan, path, progress=None, interrupted=None):
+    """Extract the members of a restore plan in path with a pool of workers.
+
+    Each worker opens its own handle on the backups so members are inflated
+    in parallel. progress is called like for write_backup.
+
+    Returns False when interrupted.
+    """
+    tasks = deque(extraction_tasks(plan))
+    tasks_lock = threading.Lock()
+
+    processed_size = 0
+    processed_files = 0
+    last_name = None
+
+    # Workers would race to create the same directories
+    directories = set()
+    for backup_path, infos in plan:
+        for info in infos:
+            directories.add(os.path.dirname(member_target(path, info.filename)))
+    for directory in sorted(directories):
+        os.makedirs(directory, exist_ok=True)
+
+    def worker():
+        nonlocal processed_size, processed_files, last_name
+
+        handles = {}
+        try:
+            while True:
+                with tasks_lock:
+                    if len(tasks) == 0:
+                        return True
+                    backup_path, infos = tasks.popleft()
+
+                handle = handles.get(backup_path)
+                if handle is None:
+                    handle = open_backup(backup_path)
+                    handles[backup_path] = handle
+
+                for info in infos:
+                    if interrupted is not None and interrupted():
+                        return False
+
+                    extract_member(handle, info, path)
+
+                    with tasks_lock:
+                        processed_size += info.file_size
+                        processed_files += 1
+                        last_name = info.filename
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+    max_workers = max(1, min(os.cpu_count() or 1, cons.MAX_BACKUP_WORKERS,
+        len(tasks)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(worker) for i in range(max_workers)]
+
+        while True:
+            done, not_done = wait(futures,
+                timeout=cons.BACKUP_PROGRESS_INTERVAL,
+                return_when=FIRST_EXCEPTION)
+
+            if any(future.exception() is not None for future in done):
+                # Stop the other workers before raising the error
+                with tasks_lock:
+                    tasks.clear()
+                break
+
+            if len(not_done) == 0:
+                break
+
+            if progress is not None:
+                with tasks_lock:
+                    values = (processed_size, processed_files, last_name)
+                progress(*values)
+
+    # Raises the first error of a worker
+    completed = all([future.result() for future in futures])
+
+    if completed and progress is not None:
+        progress(processed_size, processed_files, None)
+
+    return completed
+
+
+def read_fully(member_file, interrupted=None):
+    """Read a file object to its end, returns False when interrupted."""
+    while True:
+        if interrupted is not None and interrupted():
+            return False
+        if len(member_file.read(cons.COPY_BUFFER_SIZE)) == 0:
+            return True
+
+
+def verify_backup(backup_path, interrupted=None, verified_chunks=None):
+    """Read a whole backup to check that it can still be restored.
+
+    Zip members are checked against their CRC, snapshot chunks against their
+    SHA-256 and tar.zst backups against their zstd checksum. verified_chunks
+    is an optional set of the snapshot chunks already checked, which are not
+    read again.
+
+    Returns True when the backup is readable, False when it is corrupted and
+    None when it could not be verified or when interrupted.
+    """
+    if not os.path.isfile(backup_path):
+        return None
+
+    try:
+        if is_snapshot(backup_path):
+            chunks_dir = get_chunks_dir(os.path.dirname(backup_path))
+            for entry in read_snapshot(backup_path):
+                for chunk_id, compress_size in entry.chunks:
+                    if interrupted is not None and interrupted():
+                        return None
+                    if verified_chunks is not None and chunk_id in verified_chunks:
+                        continue
+                    read_chunk(chunks_dir, chunk_id)
+                    if verified_chunks is not None:
+                        verified_chunks.add(chunk_id)
+
+        elif backup_path.lower().endswith(cons.BACKUP_TAR_ZST_EXT):
+            if zstandard is None:
+                return None
+            with open(backup_path, 'rb') as backup_file:
+                reader = zstandard.ZstdDecompressor().stream_reader(backup_file)
+                with tarfile.open(fileobj=reader, mode='r|') as tfile:
+                    for tarinfo in tfile:
+                        if (tarinfo.isfile() and not read_fully(
+                                tfile.extractfile(tarinfo), interrupted)):
+                            return None
+                    # Reach the end of the frame so its checksum is checked
+                    if not read_fully(reader, interrupted):
+                        return None
+
+        else:
+            with zipfile.ZipFile(backup_path) as zfile:
+                for info in zfile.infolist():
+                    if info.is_dir():
+                        continue
+                    with zfile.open(info) as member_file:
+                        if not read_fully(member_file, interrupted):
+                            return None
+
+    except PermissionError as e:
+        logger.warning('Could not verify backup {0}: {1}'.format(backup_path, e))
+        return None
+    except Exception as e:
+        # Any error while reading the backup would also stop its restore
+        logger.warning('Backup {0} is corrupted: {1}'.format(backup_path, e))
+        return False
+
+    return True
+
+
+def verify_backups(backup_paths, verified, interrupted=None, initializer=None):
+    """Verify backups with a pool of workers.
+
+    verified(path, result) is called with the result of verify_backup as each
+    backup is done, from the calling thread. initializer is used like for
+    write_backup. Returns False when interrupted.
+    """
+    verified_chunks = set()
+
+    max_workers = max(1, min(os.cpu_count() or 1, cons.MAX_VERIFY_WORKERS))
+    with ThreadPoolExecutor(max_workers=max_workers,
+            initializer=initializer) as executor:
+        futures = {executor.submit(verify_backup, path, interrupted,
+            verified_chunks): path for path in backup_paths}
+        try:
+            for future in as_completed(futures):
+                if interrupted is not None and interrupted():
+                    return False
+                verified(futures[future], future.result())
+        finally:
+            for future in futures:
+                future.cancel()
+
+    return True
+
+
+def member_unchanged(target, info):
+    """Check whether the file at target has the content of a backup member.
+
+    Zip members are compared on their CRC and snapshot entries on the hashes
+    of their chunks. Tar members do not record a checksum and are always restored.
+    """
+    try:
+        target_stat = os.stat(target)
+    except OSError:
+        return False
+
+    if info.filename.endswith('/'):
+        return stat.S_ISDIR(target_stat.st_mode)
+
+    if not stat.S_ISREG(target_stat.st_mode) or target_stat.st_size != info.file_size:
+        return False
+
+    # The mtime is not trusted, saves can be changed within the resolution
+    # of the file system timestamps
+    if isinstance(info, SnapshotEntry):
+        with open(target, 'rb') as target_file:
+            data = target_file.read()
+        return [hashlib.sha256(data[start:end]).hexdigest() for start, end
+            in chunk_boundaries(data)] == [chunk_id for chunk_id, compress_size
+            in info.chunks]
+
+    if not isinstance(info, zipfile.ZipInfo):
+        return False
+
+    crc = 0
+    with open(target, 'rb') as target_file:
+        while True:
+            data = target_file.read(cons.COPY_BUFFER_SIZE)
+            if len(data) == 0:
+                break
+            crc = zlib.crc32(data, crc)
+
+    return crc == info.CRC
+
+
+def diff_restore_plan(plan, path, interrupted=None, roots=None):
+    """Compare a restore plan with the files already in path.
+
+    Returns (plan, extras, unchanged size, unchanged files) where plan only
+    keeps the members which differ from the files in path and extras lists
+    the files in path which are not in the backup. Extras are looked for in
+    roots, a list of member name prefixes, which defaults to the top
+    directories of the backup, usually save.
+
+    Returns None when interrupted.
+    """
+    targets = {}
+    for backup_path, infos in plan:
+        for info in infos:
+            targets[os.path.normcase(member_target(path, info.filename))] = info
+
+    changed_plan = []
+    unchanged_size = 0
+    unchanged_files = 0
+
+    max_workers = max(1, min(os.cpu_count() or 1, cons.MAX_BACKUP_WORKERS))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for backup_path, infos in plan:
+            if interrupted is not None and interrupted():
+                return None
+
+            changed = []
+            for info, unchanged in zip(infos, executor.map(
+                    lambda info: member_unchanged(member_target(path,
+                    info.filename), info), infos)):
+                if unchanged:
+                    unchanged_size += info.file_size
+                    unchanged_files += 1
+                else:
+                    changed.append(info)
+
+            if len(changed) > 0:
+                changed_plan.append((backup_path, changed))
+
+    extras = []
+    if roots is None:
+        roots = {info.filename.split('/')[0] for backup_path, infos in plan
+            for info in infos}
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(member_target(path, root)):
+            for filename in filenames:
+                target = os.path.join(dirpath, filename)
+                if os.path.normcase(target) not in targets:
+                    extras.append(target)
+
+    return changed_plan, extras, unchanged_size, unchanged_files
+
+
+def remove_extra_files(extras, path, plan):
+    """Delete the files of a restore which are not in the backup and the
+    directories they leave empty."""
+    kept = {os.path.normcase(member_target(path, info.filename))
+        for backup_path, infos in plan for info in infos}
+
+    directories = set()
+    for extra in extras:
+        try:
+            os.remove(extra)
+        except FileNotFoundError:
+            pass
+        directories.add(os.path.dirname(extra))
+
+    # Deepest directories first so their parents can become empty too
+    for directory in sorted(directories, key=len, reverse=True):
+        while (os.path.normcase(directory) != os.path.normcase(path)
+                and directory.startswith(path)
+                and os.path.normcase(directory) not in kept):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                # Not empty
+                break
+            directory = os.path.dirname(directory)
+
+
+def apply_staged_restore(staging_dir, path, plan, extras, full_plan):
+    """Move the members of a differential restore extracted in staging_dir
+    over the files in path, then delete the extra files.
+
+    The staging directory is on the same volume as path, this only renames
+    files. full_plan is the plan of the whole restore, its directories are
+    kept when removing the extra files.
+    """
+    for backup_path, infos in plan:
+        for info in infos:
+            target = member_target(path, info.filename)
+            if info.filename.endswith('/'):
+                os.makedirs(target, exist_ok=True)
+                continue
+
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(member_target(staging_dir, info.filename), target)
+
+    remove_extra_files(extras, path, full_plan)
+
+
+def write_backup(backup_path, members, progress=None, interrupted=None,
+        manifest=False, base_path=None, previous_path=None, codec='deflate',
+        level=None, shards=None, initializer=None):
+    """Write a zip backup of members compressed by a pool of workers.
+
+    members is an iterable of (path, arcname, size, mtime) tuples. Members
+    are written in the order they are given. progress is called with the
+    number of bytes and files processed and the last member name at most once
+    every BACKUP_PROGRESS_INTERVAL seconds.
+
+    When manifest is True, a manifest of the saves is added to the backup.
+    When base_path is also given, files unchanged since that backup are only
+    listed in the manifest and not stored again. When shards, a list of
+    member name prefixes, is also given, members only come from these shards
+    and the files of the base outside of them are kept in the manifest.
+
+    When previous_path is given, members with the same size, mtime and CRC as
+    in that backup have their compressed data copied from it instead of being
+    compressed again. The backup is still a standalone archive.
+
+    codec is one of the ZIP_CODECS and level its compression level.
+
+    initializer is called by each worker before it starts, to lower their
+    priority for instance.
+
+    Returns False when interrupted.
+    """
+    base_files = {}
+    base_depth = -1
+    if base_path is not None:
+        base_manifest = read_backup_manifest(base_path)
+        if base_manifest is not None:
+            base_files = base_manifest['files']
+            base_depth = base_manifest.get('depth', 0)
+        else:
+            base_path = None
+
+    compress_type = ZIP_CODECS[codec]
+    level = codec_level(codec, level)
+
+    previous_members = {}
+    if previous_path is not None:
+        previous_members = read_previous_members(previous_path)
+
+    def previous_info(member):
+        path, arcname, size, mtime = member
+
+        previous = previous_members.get(arcname)
+        if previous is None:
+            return None
+
+        info, previous_mtime = previous
+        if info.file_size != size:
+            return None
+        if previous_mtime is not None:
+            if previous_mtime != mtime:
+                return None
+        elif info.date_time != zip_date_time(mtime):
+            return None
+
+        return info
+
+    files = {}
+    writer = RawZipWriter(backup_path)
+
+    pending = deque()
+    processed_size = 0
+    processed_files = 0
+    last_progress = time.monotonic()
+
+    def write_next():
+        nonlocal processed_size, processed_files
+
+        batch, streamed, future = pending.popleft()
+
+        if streamed:
+            path, arcname, size, mtime = batch[0]
+            try:
+                member_type = compress_type
+                if member_type != zipfile.ZIP_STORED:
+                    with open(path, 'rb') as member_file:
+                        sample = member_file.read(cons.BACKUP_PROBE_SIZE)
+                    if is_incompressible(arcname, sample):
+                        member_type = zipfile.ZIP_STORED
+
+                zinfo = writer.write_file(path, arcname, member_type, level)
+                files[arcname] = [zinfo.file_size, mtime, zinfo.CRC]
+            except OSError as e:
+                logger.warning('Could not backup {0}: {1}'.format(path, e))
+        else:
+            for member, result in zip(batch, future.result()):
+                if result is not None:
+                    zinfo, data = result
+                    writer.write_compressed(zinfo, data)
+                    files[zinfo.filename] = [zinfo.file_size, member[3],
+                        zinfo.CRC]
+
+        processed_size += sum(member[2] for member in batch)
+        processed_files += len(batch)
+
+    def changed_members():
+        nonlocal processed_size, processed_files
+
+        for member in members:
+            path, arcname, size, mtime = member
+            arcname = arcname.replace(os.sep, '/')
+
+            previous = base_files.get(arcname)
+            if (previous is not None and previous[0] == size
+                    and previous[1] == mtime):
+                files[arcname] = previous
+                processed_size += size
+                processed_files += 1
+                continue
+
+            yield (path, arcname, size, mtime)
+
+    max_workers = max(1, min(os.cpu_count() or 1, cons.MAX_BACKUP_WORKERS))
+    with ThreadPoolExecutor(max_workers=max_workers,
+            initializer=initializer) as executor:
+        try:
+            for batch, streamed in batch_members(changed_members()):
+                if interrupted is not None and interrupted():
+                    return False
+
+                future = None
+                if not streamed:
+                    future = executor.submit(compress_batch, batch,
+                        compress_type, level, previous_path,
+                        [previous_info(member) for member in batch])
+                pending.append((batch, streamed, future))
+
+                # Keep a bounded number of compressed batches in memory
+                while (len(pending) > max_workers * 2
+                        or (streamed and len(pending) > 0)):
+                    write_next()
+
+                if progress is not None:
+                    now = time.monotonic()
+                    if now - last_progress >= cons.BACKUP_PROGRESS_INTERVAL:
+                        last_progress = now
+                        progress(processed_size, processed_files,
+                            batch[-1][1])
+
+            while len(pending) > 0:
+                if interrupted is not None and interrupted():
+                    return False
+                write_next()
+
+            if manifest:
+                if shards is not None:
+                    for arcname, values in base_files.items():
+                        if (arcname not in files and not any(
+                                arcname.startswith(shard) for shard in shards)):
+                            files[arcname] = values
+
+                writer.write_data(cons.BACKUP_MANIFEST_NAME, json.dumps({
+                    'base': (os.path.basename(base_path)
+                        if base_path is not None else None),
+                    'depth': base_depth + 1,
+                    'files': files
+                }).encode('utf8'))
+        finally:
+            for batch, streamed, future in pending:
+                if future is not None:
+                    future.cancel()
+            writer.close()
+
+    if progress is not None:
+        progress(processed_size, processed_files, None)
+
+    return True
+
+
+def write_tar_zst_backup(backup_path, members, progress=None,
+        interrupted=None, level=None, initializer=None):
+    """Write a zstd compressed tar backup of members.
+
+    Takes the same members and progress callback as write_backup. zstandard
+    compresses with a thread per core on its own. Its threads cannot be
+    initialized, when initializer is given the backup is compressed in the
+    calling thread instead.
+
+    Returns False when interrupted.
+    """
+    level = codec_level('zstd', level)
+    threads = -1 if initializer is None else 0
+    # The frame checksum lets verify_backup detect corrupted content
+    compressor = zstandard.ZstdCompressor(level=level, threads=threads,
+        write_checksum=True)
+
+    processed_size = 0
+    processed_files = 0
+    last_progress = time.monotonic()
+
+    with open(backup_path, 'wb') as backup_file:
+        with compressor.stream_writer(backup_file, closefd=False) as writer:
+            with tarfile.open(fileobj=writer, mode='w|',
+                    format=tarfile.PAX_FORMAT) as tfile:
+                for path, arcname, size, mtime in members:
+                    if interrupted is not None and interrupted():
+                        return False
+
+                    arcname = arcname.replace(os.sep, '/')
+                    # The tar header is written before the content, a file
+                    # which changes or cannot be read once its header is
+                    # written would corrupt the archive. It is read first.
+                    with tempfile.SpooledTemporaryFile(
+                            max_size=cons.BACKUP_STREAM_SIZE,
+                            dir=os.path.dirname(backup_path)) as spool:
+                        try:
+                            with open(path, 'rb') as member_file:
+                                tarinfo = tfile.gettarinfo(arcname=arcname,
+                                    fileobj=member_file)
+                                shutil.copyfileobj(member_file, spool)
+                        except OSError as e:
+                            logger.warning('Could not backup {0}: {1}'.format(
+                                path, e))
+                        else:
+                            tarinfo.size = spool.tell()
+                            spool.seek(0)
+                            tfile.addfile(tarinfo, spool)
+
+                    processed_size += size
+                    processed_files += 1
+
+                    if progress is not None:
+                        now = time.monotonic()
+                        if (now - last_progress
+                                >= cons.BACKUP_PROGRESS_INTERVAL):
+                            last_progress = now
+                            progress(processed_size, processed_files,
+                                arcname)
+
+    if progress is not None:
+        progress(processed_size, processed_files, None)
+
+    return True
+
+
+class TarZstReader():
+    """Read a zstd compressed tar backup with the subset of the
+    zipfile.ZipFile interface used to restore and list backups.
+
+    Tar archives can only be read in sequence, members have to be extracted
+    in the order given by infolist.
+    """
+
+    def __init__(self, backup_path):
+        if zstandard is None:
+            raise OSError('zstandard is needed to read {0}'.format(
+                backup_path))
+
+        self.backup_path = backup_path
+        self.entries = None
+        self.tfile = None
+        self.backup_file = None
+
+    def open_stream(self):
+        self.close()
+
+        self.backup_file = open(self.backup_path, 'rb')
+        reader = zstandard.ZstdDecompressor().stream_reader(self.backup_file)
+        self.tfile = tarfile.open(fileobj=reader, mode='r|')
+
+    def infolist(self):
+        if self.entries is None:
+            self.open_stream()
+            self.entries = [TarEntry(tarinfo.name, tarinfo.size)
+                for tarinfo in self.tfile if tarinfo.isfile()]
+            self.close()
+
+        return list(self.entries)
+
+    def extract(self, entry, path):
+        if self.tfile is None:
+            self.open_stream()
+
+        while True:
+            # Iterating over the archive would go through the members read
+            # so far again
+            tarinfo = self.tfile.next()
+            if tarinfo is None:
+                break
+
+            if tarinfo.name == entry.filename:
+                target = member_target(path, entry.filename)
+
+                source = self.tfile.extractfile(tarinfo)
+                replace_file(target, iter(lambda: source.read(
+                    cons.COPY_BUFFER_SIZE), b''), int(tarinfo.mtime * 1e9))
+
+                return target
+
+        raise KeyError('{0} is not in {1}'.format(entry.filename,
+            self.backup_path))
+
+    def close(self):
+        if self.tfile is not None:
+            self.tfile.close()
+            self.tfile = None
+        if self.backup_file is not None:
+            self.backup_file.close()
+            self.backup_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+def backup_metadata(members, save_dir_name):
+    """Count the worlds, characters and size of the saves in a backup.
+
+    members is an iterable of (arcname, size). Returns None when a member is
+    not in save_dir_name, which means this is not a backup of these saves.
+    """
+    metadata = {
+        'worlds': 0,
+        'characters': 0,
+        'uncompressed_size': 0
+    }
+    worlds_set = set()
+
+    for arcname, size in members:
+        if arcname == cons.BACKUP_MANIFEST_NAME:
+            continue
+
+        if not arcname.startswith(save_dir_name):
+            return None
+
+        metadata['uncompressed_size'] += size
+
+        path_items = arcname.split('/')
+        if len(path_items) == 3:
+            save_file = path_items[-1]
+            if save_file.endswith('.sav'):
+                metadata['characters'] += 1
+            if save_file in cons.WORLD_FILES:
+                worlds_set.add(path_items[1])
+
+    metadata['worlds'] = len(worlds_set)
+
+    return metadata
+
+
+def read_backup_metadata(backup_path, save_dir_name):
+    """Read the metadata of a backup by going through its content.
+
+    Returns None when the backup is not a backup of save_dir_name.
+    """
+    base_name = None
+
+    try:
+        if is_snapshot(backup_path):
+            members = [(entry.filename, entry.file_size)
+                for entry in read_snapshot(backup_path)]
+        elif backup_path.lower().endswith(cons.BACKUP_TAR_ZST_EXT):
+            with TarZstReader(backup_path) as reader:
+                members = [(entry.filename, entry.file_size)
+                    for entry in reader.infolist()]
+        else:
+            with zipfile.ZipFile(backup_path) as zfile:
+                members = [(info.filename, info.file_size)
+                    for info in zfile.infolist()]
+
+            # Incremental backups list all the saves in their manifest while
+            # only storing the changed files
+            manifest = read_backup_manifest(backup_path)
+            if manifest is not None:
+                if manifest.get('base') is not None:
+                    base_name = split_backup_name(manifest['base'])[0]
+                members = [(name, values[0])
+                    for name, values in manifest['files'].items()]
+
+        metadata = backup_metadata(members, save_dir_name)
+        if metadata is None:
+            return None
+
+        metadata['compressed_size'] = backup_physical_size(backup_path)
+    except (OSError, zipfile.BadZipFile, ValueError, KeyError, TypeError) as e:
+        # Still list broken backups so they can be deleted
+        logger.warning('Could not read backup {0}: {1}'.format(backup_path,
+            e))
+        metadata = {
+            'worlds': 0,
+            'characters': 0,
+            'uncompressed_size': 0,
+            'compressed_size': os.path.getsize(backup_path)
+        }
+
+    metadata['base_name'] = base_name
+
+    return metadata
+
+
+def backup_physical_size(backup_path):
+    """Return the disk space used by a backup.
+
+    The size of a snapshot includes the chunks it uses, some of them being
+    shared with other snapshots.
+    """
+    size = os.path.getsize(backup_path)
+
+    if is_snapshot(backup_path):
+        chunks = dict(chunk for entry in read_snapshot(backup_path)
+            for chunk in entry.chunks)
+        size += sum(chunks.values())
+
+    return size
@@ -2,12 +2,82 @@ MAX_LOG_SIZE = 1024 * 1024
 MAX_LOG_FILES = 5
 
 SAVES_WARNING_SIZE = 150 * 1024 * 1024
+SAVES_SCAN_PROGRESS_INTERVAL = 0.25
+SAVES_WATCHER_DELAY = 2000
 
 READ_BUFFER_SIZE = 16 * 1024
+COPY_BUFFER_SIZE = 1024 * 1024
 
 MAX_GAME_DIRECTORIES = 6
 MAX_SESSION_DIRECTORIES = 20
 
+MAX_INSTALLS_SCAN_WORKERS = 4
+MAX_COPY_WORKERS = 4
+MAX_BACKUP_WORKERS = 8
+
+BACKUP_BATCH_FILES = 64
+BACKUP_BATCH_SIZE = 1024 * 1024
+BACKUP_STREAM_SIZE = 32 * 1024 * 1024
+BACKUP_PROGRESS_INTERVAL = 0.25
+
+# Backups while the game is running start once the saves were left alone for
+# BACKGROUND_BACKUP_DELAY milliseconds. The files modified during the last
+# BACKGROUND_BACKUP_SETTLE_TIME seconds are backed up last, once they settle,
+# waiting at most BACKGROUND_BACKUP_SETTLE_WAIT seconds for them.
+BACKGROUND_BACKUP_DELAY = 30 * 1000
+BACKGROUND_BACKUP_SETTLE_TIME = 5
+BACKGROUND_BACKUP_SETTLE_WAIT = 60
+
+# Remote backups are uploaded in parts of REMOTE_PART_SIZE bytes by
+# MAX_REMOTE_WORKERS workers at once
+MAX_REMOTE_WORKERS = 4
+REMOTE_PART_SIZE = 16 * 1024 * 1024
+REMOTE_DELETE_BATCH = 1000
+REMOTE_RETRIES = 3
+REMOTE_TIMEOUT = 60
+REMOTE_INDEX_NAME = 'cddagl_remote.json'
+REMOTE_UPLOADS_NAME = '.remote_uploads.json'
+
+# Verifying backups mostly reads the disk while the launcher is in use, a
+# couple of workers is enough
+MAX_VERIFY_WORKERS = 2
+
+BACKUP_MANIFEST_NAME = 'cddagl_manifest.json'
+MAX_BACKUP_CHAIN_LENGTH = 10
+
+BACKUP_SNAPSHOT_EXT = '.cddaglsnap'
+BACKUP_TAR_ZST_EXT = '.tar.zst'
+BACKUP_EXTENSIONS = ('.zip', BACKUP_SNAPSHOT_EXT, BACKUP_TAR_ZST_EXT)
+
+# Number of backups whose content is kept in memory while browsing them
+RESTORE_PLAN_CACHE_SIZE = 4
+
+SNAPSHOT_CHUNKS_DIR = '.chunks'
+PENDING_BACKUPS_DIR = '.pending'
+PENDING_BACKUP_INFO = 'pending.json'
+SNAPSHOT_CHUNK_MIN_SIZE = 32 * 1024
+SNAPSHOT_CHUNK_MAX_SIZE = 512 * 1024
+SNAPSHOT_CHUNK_MASK_BITS = 7
+
+# Compression level range and default of each backup codec, codecs without
+# levels are not listed
+BACKUP_CODECS = ('stored', 'deflate', 'bzip2', 'lzma', 'zstd')
+BACKUP_CODEC_LEVELS = {
+    'deflate': (0, 9, 6),
+    'bzip2': (1, 9, 9),
+    'zstd': (1, 22, 3)
+}
+BACKUP_PROBE_SIZE = 64 * 1024
+BACKUP_PROBE_RATIO = 0.9
+INCOMPRESSIBLE_EXTENSIONS = ('.zzip', '.zip', '.gz', '.bz2', '.xz', '.zst',
+    '.7z', '.rar', '.png', '.jpg', '.jpeg', '.ogg', '.mp3')
+
+RELOCATE_STAGING_SUFFIX = '.relocating'
+
+# Differential restores extract the changed files in this directory of the
+# game directory and only move them over the saves once all are extracted
+RESTORE_STAGING_DIR = '.cddagl_restoring'
+
 GITHUB_REST_API_URL = 'https://api.github.com'
 GITHUB_API_VERSION = b'application/vnd.github.v3+json'
 
@@ -17,6 +87,13 @@ GITHUB_XRL_RESET = 'X-RateLimit-Reset'
 CDDA_RELEASE_TAGS = '/repos/CleverRaven/Cataclysm-DDA/git/refs/tags'
 CDDA_RELEASES = '/repos/CleverRaven/Cataclysm-DDA/releases'
 CDDA_RELEASE_BY_TAG = lambda tag: f'/repos/CleverRaven/Cataclysm-DDA/releases/tags/{tag}'
+CDDA_COMMIT_BY_REF = lambda ref: f'/repos/CleverRaven/Cataclysm-DDA/commits/{ref}'
+GITHUB_SHA_MEDIA_TYPE = b'application/vnd.github.sha'
+
+# Releases usually target a branch, their tag has to be resolved to find the
+# commit they were built from. Only that many tags are resolved per refresh
+# to spare the API rate limit.
+MAX_RELEASE_COMMIT_LOOKUPS = 10
 CDDAGL_LATEST_RELEASE = '/repos/Fris0uman/CDDA-Game-Launcher/releases/latest'
 
 CHANGELOG_URL = 'https://api.github.com/search/issues?q=repo%3Acleverraven/Cataclysm-DDA+is%3Apr+is%3Amerged&per_page='
@@ -578,28 +655,6 @@ STABLE_CHANGELOG = '''
 </ul>
 '''
 
-STABLE_SHA256 = {
-    '2d7bbf426572e2b21aede324c8d89c9ad84529a05a4ac99a914f22b2b1e1405e': '0.C',
-    '0454ed2bbc4a6c1c8cca5c360533513eb2a1d975816816d7c13ff60e276d431b': '0.D',
-    '7f914145248cebfd4d1a6d4b1ff932a478504b1e7e4c689aab97b8700e079f61': '0.D',
-    'bdd4f539767fd970beeab271e0e3774ba3022faeff88c6186b389e6bbe84bc75': '0.E',
-    '8adea7b3bc81fa9e4594b19553faeb591846295f47b67110dbd16eed8b37e62b': '0.E',
-    'fb7db2b3cf101e19565ce515c012a089a75f54da541cd458144dc8483b5e59c8': '0.E-1',
-    '1068867549c1a24ae241a886907651508830ccd9c091bad27bacbefabab99acc': '0.E-1',
-    '0ce61cdfc299661382e30da133f7356b4faea38865ec0947139a08f40b595728': '0.E-2',
-    'c9ca51bd1e7549b0820fe736c10b3e73d358700c3460a0227fade59e9754e03d': '0.E-2',
-    '563bd13cff18c4271c43c18568237046d1fd18ae200f7e5cdd969b80e6992967': '0.E-3',
-    'e4874bbb8e0a7b1e52b4dedb99575e2a90bfe84e74c36db58510f9973400077d': '0.E-3',
-    '1f5beb8b3dcb5ca1f704b816864771e2dd8ff38ca435a4abdb9a59e4bb95d099': '0.F',
-    '2794df225787174c6f5d8557d63f434a46a82f562c0395294901fb5d5d10d564': '0.F',
-    '960140f7926267b56ef6933670b7a73d00087bd53149e9e63c48a8631cfbed53': '0.F-1',
-    'c87f226d8b4e6543fbc8527d645cf4342b5e1036e94e16920381d7e5b5b9e34f': '0.F-1',
-    '5da7ebd7ab07ebf755e445440210309eda0ae8f5924026d401b9eb5c52c5b6e7': '0.F-2',
-    '6870353e6d142735dfd21dec1eaf6b39af088daf5eef27b02e53ebb1c9eca684': '0.F-2',
-    '3e0b15543015389c34ad679a931186a1264dbccb010b813f63b6caef2d158dc8': '0.F-3',
-    '59404eeb88539b20c9ffbbcbe86a7e5c20267375975306245862c7fb731a5973': '0.F-3'
-}
-
 CONFIG_BRANCH_KEY = 'branch'
 CONFIG_BRANCH_STABLE = 'stable'
 CONFIG_BRANCH_EXPERIMENTAL = 'experimental'
@@ -61,6 +61,39 @@ def arstrip(value):
         value = value[:-1]
     return value
 
+def read_commit_sha(game_dir):
+    """Return the commit sha written in the VERSION.txt file of a game
+    directory or None when it cannot be found."""
+    version_file = os.path.join(game_dir, 'VERSION.txt')
+    if not os.path.isfile(version_file):
+        return None
+
+    with open(version_file, 'r', encoding='utf8') as read_file:
+        file_content = read_file.read(1024)
+
+    match = re.search(r'commit sha: (?P<commitsha>\S+)', file_content)
+    if match is None:
+        return None
+
+    commit_sha = match.group('commitsha')
+    if len(commit_sha) < 7:
+        return None
+
+    return commit_sha
+
+def release_commit_sha(release):
+    """Return the commit sha a GitHub release was built from or None.
+
+    Only releases targeting a commit have it, most releases target a branch
+    name and their tag has to be resolved to a commit instead.
+    """
+    commit_sha = release.get('target_commitish')
+    if (commit_sha is None
+            or re.fullmatch(r'[0-9a-f]{7,40}', commit_sha) is None):
+        return None
+
+    return commit_sha
+
 def is_64_windows():
     return 'PROGRAMFILES(X86)' in os.environ
 
@@ -86,9 +119,18 @@ def delete_path(path):
     operations dialog
     '''
 
-    # Make sure we have an absolute path first
-    if not os.path.isabs(path):
-        path = os.path.abspath(path)
+    return delete_paths([path])
+
+def delete_paths(paths):
+    ''' Like delete_path for many paths at once. They are all deleted in a
+    single file operation.
+    '''
+
+    # Make sure we have absolute paths first
+    paths = [path if os.path.isabs(path) else os.path.abspath(path)
+        for path in paths]
+    if len(paths) == 0:
+        return True
 
     shellcon = winutils.shellcon
 
@@ -107,7 +149,7 @@ def delete_path(path):
         )
 
     try:
-        return winutils.delete(path, flags)
+        return winutils.delete(paths, flags)
     except com_error:
         return False
 
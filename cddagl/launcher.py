@@ -1,3 +1,4 @@
+import json
 import logging
 import os
 import sys
@@ -7,6 +8,7 @@ from logging.handlers import RotatingFileHandler
 
 from PySide6.QtGui import QIcon
 from PySide6.QtWidgets import QApplication
+import arrow
 from babel.core import Locale
 
 ### to avoid import errors when not setting PYTHONPATH
@@ -15,12 +17,17 @@ if not getattr(sys, 'frozen', False):
 
 import cddagl.constants as cons
 from cddagl import __version__ as version
-from cddagl.constants import get_cddagl_path, get_locale_path, get_resource_path
+from cddagl.constants import (
+    get_cddagl_path, get_locale_path, get_resource_path, get_data_path
+)
 from cddagl.i18n import (
     load_gettext_locale, load_gettext_no_locale,
     proxy_gettext as _, get_available_locales
 )
-from cddagl.sql.functions import init_config, get_config_value, config_true
+from cddagl.sql.functions import (
+    init_config, get_config_value, set_config_value, config_true,
+    import_fingerprints
+)
 from cddagl.ui.views.dialogs import ExceptionWindow
 from cddagl.ui.views.tabbed import TabbedWindow
 from cddagl.win32 import get_ui_locale, SingleInstance, write_named_pipe
@@ -145,6 +152,28 @@ def ui_exception(extype, value, tb):
         sys.exit(main_app.exec_())
 
 
+def init_fingerprints():
+    """Import the bundled game fingerprints once per launcher version so that
+    known builds can be identified without any network access."""
+    if get_config_value('fingerprints_version') == version:
+        return
+
+    fingerprints_file = get_data_path('fingerprints.json')
+    if not os.path.isfile(fingerprints_file):
+        return
+
+    with open(fingerprints_file, 'r', encoding='utf8') as f:
+        fingerprints = json.load(f)
+
+    for fingerprint in fingerprints:
+        fingerprint['released_on'] = arrow.get(fingerprint['released_on']
+            ).datetime
+
+    import_fingerprints(fingerprints)
+
+    set_config_value('fingerprints_version', version)
+
+
 def init_exception_catcher():
     sys.excepthook = handle_exception
 
@@ -155,6 +184,7 @@ def run_cddagl():
     init_exception_catcher()
 
     init_config(get_cddagl_path())
+    init_fingerprints()
 
     start_ui(get_preferred_locale(get_available_locales(get_locale_path())),
              init_single_instance())
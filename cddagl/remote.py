@@ -0,0 +1,578 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from datetime import datetime, timezone
+from urllib.parse import quote, urlsplit
+from xml.etree import ElementTree
+
+import requests
+
+import cddagl.constants as cons
+from cddagl.backups import expired_backups, read_backup_manifest, split_backup_name
+from cddagl.snapshots import (
+    chunk_path, get_chunks_dir, is_snapshot, parse_snapshot, read_snapshot
+)
+
+logger = logging.getLogger('cddagl')
+
+# Remote backups mirror the backup directory in a bucket of an S3 compatible
+# object store. Next to the backups, an index object lists the mirrored
+# backups with their date and base so the retention policy can be applied to
+# the bucket without downloading anything. Snapshot chunks are mirrored under
+# the same names as in the backup directory.
+
+S3_NAMESPACE = '{http://s3.amazonaws.com/doc/2006-03-01/}'
+
+
+class S3Error(Exception):
+    def __init__(self, status, code, message):
+        super(S3Error, self).__init__('{0} {1}: {2}'.format(status, code,
+            message))
+        self.status = status
+        self.code = code
+
+
+def md5_digest(data):
+    return base64.b64encode(hashlib.md5(data).digest()).decode('ascii')
+
+
+def find_text(element, name):
+    child = element.find(S3_NAMESPACE + name)
+    return child.text if child is not None else None
+
+
+class S3Client():
+    """Client for the few S3 operations used to mirror backups.
+
+    Requests are signed with AWS Signature Version 4 and use path style URLs,
+    which MinIO and the other S3 compatible stores accept. The client can be
+    used from several threads, they share a pool of connections.
+    """
+
+    def __init__(self, endpoint, bucket, access_key, secret_key,
+            region='us-east-1'):
+        url = urlsplit(endpoint.rstrip('/'))
+        self.scheme = url.scheme or 'https'
+        self.host = url.netloc or url.path
+        self.base_path = url.path if url.netloc else ''
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region or 'us-east-1'
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_maxsize=cons.MAX_REMOTE_WORKERS)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def close(self):
+        self.session.close()
+
+    def signing_key(self, date):
+        key = ('AWS4' + self.secret_key).encode('utf8')
+        for value in (date, self.region, 's3', 'aws4_request'):
+            key = hmac.new(key, value.encode('utf8'), hashlib.sha256).digest()
+        return key
+
+    def request(self, method, key='', query=None, data=b'', headers=None):
+        """Send a signed request, retrying when the connection fails or the
+        store has an internal error. Raises S3Error for the error responses.
+        """
+        path = self.base_path + '/' + quote(self.bucket, safe='')
+        if key != '':
+            path += '/' + quote(key, safe='/~')
+
+        canonical_query = '&'.join('{0}={1}'.format(quote(name, safe='~'),
+            quote(str(value), safe='~'))
+            for name, value in sorted((query or {}).items()))
+
+        payload_hash = hashlib.sha256(data).hexdigest()
+        url = '{0}://{1}{2}'.format(self.scheme, self.host, path)
+        if canonical_query != '':
+            url += '?' + canonical_query
+
+        for attempt in range(cons.REMOTE_RETRIES + 1):
+            amz_date = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+            date = amz_date[:8]
+
+            request_headers = dict(headers or {})
+            request_headers['x-amz-date'] = amz_date
+            request_headers['x-amz-content-sha256'] = payload_hash
+
+            signed_headers = {name.lower(): str(value).strip()
+                for name, value in request_headers.items()}
+            signed_headers['host'] = self.host
+            signed_names = ';'.join(sorted(signed_headers))
+
+            canonical_request = '\n'.join([method, path, canonical_query,
+                ''.join('{0}:{1}\n'.format(name, signed_headers[name])
+                    for name in sorted(signed_headers)),
+                signed_names, payload_hash])
+            scope = '{0}/{1}/s3/aws4_request'.format(date, self.region)
+            string_to_sign = '\n'.join(['AWS4-HMAC-SHA256', amz_date, scope,
+                hashlib.sha256(canonical_request.encode('utf8')).hexdigest()])
+            signature = hmac.new(self.signing_key(date),
+                string_to_sign.encode('utf8'), hashlib.sha256).hexdigest()
+
+            request_headers['Authorization'] = ('AWS4-HMAC-SHA256 '
+                'Credential={0}/{1}, SignedHeaders={2}, Signature={3}'.format(
+                self.access_key, scope, signed_names, signature))
+
+            try:
+                response = self.session.request(method, url, data=data,
+                    headers=request_headers, timeout=cons.REMOTE_TIMEOUT)
+            except requests.RequestException as e:
+                if attempt == cons.REMOTE_RETRIES:
+                    raise S3Error(None, 'RequestError', str(e))
+                logger.warning('Remote backup request failed, retrying: '
+                    '{0}'.format(e))
+            else:
+                if response.status_code < 300:
+                    return response
+                if response.status_code < 500 or attempt == cons.REMOTE_RETRIES:
+                    code = message = None
+                    try:
+                        error = ElementTree.fromstring(response.content)
+                        code = error.findtext('Code')
+                        message = error.findtext('Message')
+                    except ElementTree.ParseError:
+                        pass
+                    raise S3Error(response.status_code, code,
+                        message or response.reason)
+
+            time.sleep(2 ** attempt)
+
+    def list_objects(self, prefix=''):
+        """Return {key: size} for the objects whose key starts with
+        prefix."""
+        objects = {}
+        query = {'list-type': '2', 'prefix': prefix}
+        while True:
+            response = self.request('GET', query=query)
+            result = ElementTree.fromstring(response.content)
+            for content in result.iter(S3_NAMESPACE + 'Contents'):
+                objects[find_text(content, 'Key')] = int(
+                    find_text(content, 'Size'))
+
+            token = find_text(result, 'NextContinuationToken')
+            if find_text(result, 'IsTruncated') != 'true' or token is None:
+                return objects
+            query['continuation-token'] = token
+
+    def get_object(self, key):
+        return self.request('GET', key).content
+
+    def put_object(self, key, data):
+        response = self.request('PUT', key, data=data,
+            headers={'Content-MD5': md5_digest(data)})
+        return response.headers.get('ETag', '').strip('"')
+
+    def delete_objects(self, keys):
+        keys = list(keys)
+        for index in range(0, len(keys), cons.REMOTE_DELETE_BATCH):
+            root = ElementTree.Element('Delete')
+            ElementTree.SubElement(root, 'Quiet').text = 'true'
+            for key in keys[index:index + cons.REMOTE_DELETE_BATCH]:
+                ElementTree.SubElement(ElementTree.SubElement(root, 'Object'),
+                    'Key').text = key
+            data = ElementTree.tostring(root, encoding='utf8')
+
+            response = self.request('POST', query={'delete': ''}, data=data,
+                headers={'Content-MD5': md5_digest(data)})
+            result = ElementTree.fromstring(response.content)
+            for error in result.iter(S3_NAMESPACE + 'Error'):
+                logger.warning('Could not delete remote backup {0}: {1}'.format(
+                    find_text(error, 'Key'), find_text(error, 'Message')))
+
+    def create_multipart_upload(self, key):
+        response = self.request('POST', key, query={'uploads': ''})
+        return find_text(ElementTree.fromstring(response.content), 'UploadId')
+
+    def upload_part(self, key, upload_id, part_number, data):
+        response = self.request('PUT', key, query={'partNumber': part_number,
+            'uploadId': upload_id}, data=data,
+            headers={'Content-MD5': md5_digest(data)})
+        return response.headers.get('ETag', '').strip('"')
+
+    def list_parts(self, key, upload_id):
+        """Return {part number: ETag} of the parts already uploaded."""
+        parts = {}
+        query = {'uploadId': upload_id}
+        while True:
+            response = self.request('GET', key, query=query)
+            result = ElementTree.fromstring(response.content)
+            for part in result.iter(S3_NAMESPACE + 'Part'):
+                parts[int(find_text(part, 'PartNumber'))] = find_text(part,
+                    'ETag').strip('"')
+
+            marker = find_text(result, 'NextPartNumberMarker')
+            if find_text(result, 'IsTruncated') != 'true' or marker is None:
+                return parts
+            query['part-number-marker'] = marker
+
+    def complete_multipart_upload(self, key, upload_id, etags):
+        root = ElementTree.Element('CompleteMultipartUpload')
+        for part_number, etag in enumerate(etags, 1):
+            part = ElementTree.SubElement(root, 'Part')
+            ElementTree.SubElement(part, 'PartNumber').text = str(part_number)
+            ElementTree.SubElement(part, 'ETag').text = '"{0}"'.format(etag)
+
+        response = self.request('POST', key, query={'uploadId': upload_id},
+            data=ElementTree.tostring(root, encoding='utf8'))
+
+        # Errors can also come once the response started, with a 200 status
+        result = ElementTree.fromstring(response.content)
+        if result.tag == 'Error':
+            raise S3Error(response.status_code, result.findtext('Code'),
+                result.findtext('Message'))
+        return find_text(result, 'ETag').strip('"')
+
+    def abort_multipart_upload(self, key, upload_id):
+        self.request('DELETE', key, query={'uploadId': upload_id})
+
+
+def read_part(path, part_number):
+    with open(path, 'rb') as backup_file:
+        backup_file.seek((part_number - 1) * cons.REMOTE_PART_SIZE)
+        return backup_file.read(cons.REMOTE_PART_SIZE)
+
+
+def abort_upload(client, path, upload):
+    """Give up a multipart upload so the store drops the parts it kept."""
+    try:
+        client.abort_multipart_upload(upload['key'], upload['upload_id'])
+    except S3Error as e:
+        logger.warning('Could not abort the upload of {0}: {1}'.format(
+            path, e))
+
+
+def upload_file(client, path, key, uploads, save_uploads, progress=None,
+        interrupted=None):
+    """Upload the file at path to key.
+
+    Files larger than REMOTE_PART_SIZE are sent in parts by a pool of
+    workers, with at most two parts per worker in memory. Each request
+    carries the MD5 and the signed SHA-256 of its data, the store rejects the
+    data corrupted on the way. The
+    multipart upload of path is remembered in uploads, a dict saved by
+    calling save_uploads, so an interrupted upload resumes with the parts the
+    store already has. progress(size) is called with the size sent so far.
+
+    Returns False when interrupted.
+    """
+    path_stat = os.stat(path)
+    size = path_stat.st_size
+
+    # The parts of an upload which cannot be resumed would be kept, and
+    # billed, until aborted
+    upload = uploads.get(path)
+    if upload is not None and (size <= cons.REMOTE_PART_SIZE
+            or upload['key'] != key or upload['size'] != size
+            or upload['mtime'] != path_stat.st_mtime_ns):
+        abort_upload(client, path, upload)
+        del uploads[path]
+        save_uploads()
+        upload = None
+
+    if size <= cons.REMOTE_PART_SIZE:
+        with open(path, 'rb') as backup_file:
+            client.put_object(key, backup_file.read())
+        if progress is not None:
+            progress(size)
+        return True
+
+    part_count = (size + cons.REMOTE_PART_SIZE - 1) // cons.REMOTE_PART_SIZE
+
+    uploaded = {}
+    if upload is not None:
+        try:
+            uploaded = client.list_parts(key, upload['upload_id'])
+        except S3Error as e:
+            logger.warning('Could not resume the upload of {0}: {1}'.format(
+                path, e))
+            abort_upload(client, path, upload)
+            upload = None
+
+    if upload is None:
+        upload = {
+            'key': key,
+            'upload_id': client.create_multipart_upload(key),
+            'size': size,
+            'mtime': path_stat.st_mtime_ns
+        }
+        uploads[path] = upload
+        save_uploads()
+    upload_id = upload['upload_id']
+
+    etags = [None] * part_count
+    sent_size = 0
+    lock = threading.Lock()
+
+    def send_part(part_number):
+        nonlocal sent_size
+
+        data = read_part(path, part_number)
+        etag = hashlib.md5(data).hexdigest()
+
+        # Parts uploaded before an interruption are not sent again
+        if uploaded.get(part_number) != etag:
+            if interrupted is not None and interrupted():
+                return
+            etag = client.upload_part(key, upload_id, part_number, data)
+
+        etags[part_number - 1] = etag
+        with lock:
+            sent_size += len(data)
+            if progress is not None:
+                progress(sent_size)
+
+    max_workers = cons.MAX_REMOTE_WORKERS
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        try:
+            for part_number in range(1, part_count + 1):
+                if interrupted is not None and interrupted():
+                    return False
+
+                pending.add(executor.submit(send_part, part_number))
+                while len(pending) >= max_workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_EXCEPTION)
+                    for future in done:
+                        future.result()
+
+            done, pending = wait(pending, return_when=FIRST_EXCEPTION)
+            for future in done:
+                future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    if interrupted is not None and interrupted():
+        return False
+
+    client.complete_multipart_upload(key, upload_id, etags)
+
+    del uploads[path]
+    save_uploads()
+
+    return True
+
+
+def get_uploads_path(backup_dir):
+    return os.path.join(backup_dir, cons.REMOTE_UPLOADS_NAME)
+
+
+def read_remote_index(client, prefix):
+    """Read the index of the mirrored backups, {filename: {'size',
+    'modified', 'base'}}."""
+    try:
+        index = json.loads(client.get_object(prefix + cons.REMOTE_INDEX_NAME)
+            .decode('utf8'))
+    except S3Error as e:
+        if e.code != 'NoSuchKey':
+            raise
+        return {}
+    except ValueError as e:
+        logger.warning('Could not read the remote backups index: {0}'.format(e))
+        return {}
+
+    return index.get('backups', {})
+
+
+def write_remote_index(client, prefix, index):
+    client.put_object(prefix + cons.REMOTE_INDEX_NAME, json.dumps(
+        {'version': 1, 'backups': index}).encode('utf8'))
+
+
+def upload_chunks(client, backup_dir, prefix, snapshot_path, remote_chunks,
+        interrupted=None):
+    """Upload the chunks of a snapshot which are not in the bucket yet."""
+    chunks_dir = get_chunks_dir(backup_dir)
+    chunk_ids = set(chunk_id for entry in read_snapshot(snapshot_path)
+        for chunk_id, compress_size in entry.chunks)
+
+    def upload_chunk(chunk_id):
+        if interrupted is not None and interrupted():
+            return
+        with open(chunk_path(chunks_dir, chunk_id), 'rb') as chunk_file:
+            client.put_object(chunk_key(prefix, chunk_id), chunk_file.read())
+        remote_chunks.add(chunk_id)
+
+    with ThreadPoolExecutor(max_workers=cons.MAX_REMOTE_WORKERS) as executor:
+        futures = [executor.submit(upload_chunk, chunk_id) for chunk_id
+            in chunk_ids if chunk_id not in remote_chunks]
+        try:
+            for future in futures:
+                future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    return interrupted is None or not interrupted()
+
+
+def chunk_key(prefix, chunk_id):
+    return '{0}{1}/{2}/{3}'.format(prefix, cons.SNAPSHOT_CHUNKS_DIR,
+        chunk_id[:2], chunk_id)
+
+
+def remote_required_backups(index, filenames):
+    """Return the filenames of every base backup needed by filenames."""
+    required = set()
+    for filename in filenames:
+        base = index[filename].get('base')
+        while base is not None and base not in required and base in index:
+            required.add(base)
+            base = index[base].get('base')
+
+    return required
+
+
+def mirror_backups(client, backup_dir, prefix, auto_prefix, policy,
+        progress=None, interrupted=None):
+    """Upload the backups of backup_dir missing from the bucket then apply
+    the retention policy of automatic backups to the bucket.
+
+    Backups are mirrored under prefix, automatic backups being the ones
+    whose name starts with auto_prefix. policy holds the keyword arguments
+    of expired_backups. progress(filename, size, total size) is called
+    while a backup is uploaded.
+
+    Returns False when interrupted.
+    """
+    uploads_path = get_uploads_path(backup_dir)
+    try:
+        with open(uploads_path, 'r', encoding='utf8') as uploads_file:
+            uploads = json.load(uploads_file)
+    except (OSError, ValueError):
+        uploads = {}
+
+    def save_uploads():
+        temp_path = uploads_path + '.part'
+        with open(temp_path, 'w', encoding='utf8') as uploads_file:
+            json.dump(uploads, uploads_file)
+        os.replace(temp_path, uploads_path)
+
+    # Give up the uploads of backups deleted since
+    for path, upload in list(uploads.items()):
+        if not os.path.isfile(path):
+            abort_upload(client, path, upload)
+            del uploads[path]
+            save_uploads()
+
+    index = read_remote_index(client, prefix)
+    remote_objects = client.list_objects(prefix)
+    chunks_prefix = prefix + cons.SNAPSHOT_CHUNKS_DIR + '/'
+    remote_chunks = set(key.rsplit('/', 1)[1] for key in remote_objects
+        if key.startswith(chunks_prefix))
+
+    backups = []
+    with os.scandir(backup_dir) as it:
+        for entry in it:
+            if entry.is_file() and split_backup_name(entry.name)[1] is not None:
+                backups.append((entry.stat().st_mtime, entry))
+
+    # Oldest first, incremental backups come after their bases
+    for mtime, entry in sorted(backups, key=lambda backup: backup[0]):
+        remote = index.get(entry.name)
+        entry_stat = entry.stat()
+        if (remote is not None and remote['size'] == entry_stat.st_size
+                and remote['modified'] == entry_stat.st_mtime
+                and prefix + entry.name in remote_objects):
+            continue
+
+        if interrupted is not None and interrupted():
+            return False
+
+        def uploaded(size):
+            if progress is not None:
+                progress(entry.name, size, entry_stat.st_size)
+
+        if is_snapshot(entry.path):
+            if not upload_chunks(client, backup_dir, prefix, entry.path,
+                    remote_chunks, interrupted):
+                return False
+
+        if not upload_file(client, entry.path, prefix + entry.name, uploads,
+                save_uploads, uploaded, interrupted):
+            return False
+
+        base = None
+        manifest = read_backup_manifest(entry.path) if not is_snapshot(entry.path) else None
+        if manifest is not None:
+            base = manifest.get('base')
+
+        # The index is written after each backup so it never lists a backup
+        # which is not in the bucket
+        index[entry.name] = {
+            'size': entry_stat.st_size,
+            'modified': entry_stat.st_mtime,
+            'base': base
+        }
+        write_remote_index(client, prefix, index)
+
+    auto_prefix = auto_prefix.lower()
+    to_remove = expired_backups([{
+        'path': filename,
+        'modified': remote['modified'],
+        'size': remote['size']
+    } for filename, remote in index.items()
+        if split_backup_name(filename)[0].lower().startswith(auto_prefix)],
+        **policy)
+
+    # Keep the backups incremental backups are based on
+    remove_names = set(to_remove)
+    required = remote_required_backups(index, [filename for filename in index
+        if filename not in remove_names])
+    removed = [filename for filename in to_remove if filename not in required]
+    if len(removed) == 0:
+        return True
+
+    for filename in removed:
+        del index[filename]
+    write_remote_index(client, prefix, index)
+    client.delete_objects(prefix + filename for filename in removed)
+
+    if any(is_snapshot(filename) for filename in removed):
+        collect_remote_garbage(client, backup_dir, prefix, index,
+            remote_chunks)
+
+    return True
+
+
+def collect_remote_garbage(client, backup_dir, prefix, index, remote_chunks):
+    """Delete the remote chunks no mirrored snapshot uses anymore."""
+    used = set()
+    for filename, remote in index.items():
+        if not is_snapshot(filename):
+            continue
+
+        # Read the local copy of the snapshot when there is still one
+        path = os.path.join(backup_dir, filename)
+        try:
+            if os.path.getsize(path) == remote['size']:
+                entries = read_snapshot(path)
+            else:
+                raise FileNotFoundError(path)
+        except OSError:
+            try:
+                entries = parse_snapshot(client.get_object(prefix + filename).decode('utf8'))
+            except (S3Error, ValueError, KeyError, TypeError) as e:
+                # Better keep a few unused chunks than lose a snapshot
+                logger.warning('Could not read remote snapshot {0}, skipping '
+                    'garbage collection: {1}'.format(filename, e))
+                return
+
+        for entry in entries:
+            used.update(chunk_id for chunk_id, compress_size in entry.chunks)
+
+    unused = remote_chunks - used
+    client.delete_objects(chunk_key(prefix, chunk_id) for chunk_id in unused)
+    remote_chunks.difference_update(unused)
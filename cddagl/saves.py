@@ -0,0 +1,448 @@
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from os import scandir
+
+import cddagl.constants as cons
+from cddagl.sql.functions import get_save_dir_stats, update_save_dir_stats
+
+
+def game_save_dir(game_dir, session_dir):
+    """Save directory of a game install, session_dir being the user data
+    directory setting."""
+    # For compatibility with 1.6.3
+    if session_dir == 'default_session':
+        session_dir = game_dir
+
+    if session_dir != game_dir and session_dir is not None:
+        return os.path.join(session_dir, 'save')
+
+    return os.path.join(game_dir, 'save')
+
+
+def empty_saves_stats():
+    return {
+        'worlds': 0,
+        'characters': 0,
+        'size': 0,
+        'files': 0,
+        'last_played': None
+    }
+
+
+def scan_dir(path):
+    """Collect the statistics of the files directly inside a directory."""
+    dir_stat = {
+        'size': 0,
+        'file_count': 0,
+        'characters': 0,
+        'is_world': False,
+        'last_modified': None,
+        'subdirs': []
+    }
+
+    with scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    dir_stat['subdirs'].append(entry.name)
+                    continue
+                if not entry.is_file():
+                    continue
+                entry_stat = entry.stat()
+            except OSError:
+                continue
+
+            dir_stat['size'] += entry_stat.st_size
+            dir_stat['file_count'] += 1
+            if (dir_stat['last_modified'] is None
+                    or entry_stat.st_mtime > dir_stat['last_modified']):
+                dir_stat['last_modified'] = entry_stat.st_mtime
+
+            if entry.name.endswith('.sav'):
+                dir_stat['characters'] += 1
+            if entry.name in cons.WORLD_FILES:
+                dir_stat['is_world'] = True
+
+    return dir_stat
+
+
+class SaveTree():
+    """Statistics of every directory of a save tree.
+
+    The statistics of each directory are cached in the database along with its
+    modification time and only directories whose modification time changed
+    are listed again. The game writes its save files to a temporary file
+    before renaming it, which always updates the modification time of the
+    containing directory.
+    """
+
+    def __init__(self, save_dir):
+        self.save_dir = save_dir
+        self.dir_stats = {}
+
+    def scan(self, progress=None, interrupted=None):
+        """Walk the whole tree, reusing the cached statistics of unchanged
+        directories.
+
+        progress is called with the partial statistics at most once every
+        SAVES_SCAN_PROGRESS_INTERVAL seconds. The scan returns None as soon as
+        interrupted returns True.
+        """
+        self.dir_stats = {}
+
+        if not os.path.isdir(self.save_dir):
+            return self.stats()
+
+        cached_stats = get_save_dir_stats(self.save_dir)
+        updated_stats = {}
+
+        next_scans = [self.save_dir]
+        last_progress = time.monotonic()
+
+        while len(next_scans) > 0:
+            if interrupted is not None and interrupted():
+                return None
+
+            if progress is not None:
+                now = time.monotonic()
+                if now - last_progress >= cons.SAVES_SCAN_PROGRESS_INTERVAL:
+                    last_progress = now
+                    progress(self.stats())
+
+            current_dir = next_scans.pop()
+            try:
+                modified_on = os.stat(current_dir).st_mtime
+                dir_stat = cached_stats.get(current_dir)
+                if dir_stat is None or dir_stat['modified_on'] != modified_on:
+                    dir_stat = scan_dir(current_dir)
+                    dir_stat['modified_on'] = modified_on
+                    updated_stats[current_dir] = dir_stat
+            except OSError:
+                continue
+
+            self.dir_stats[current_dir] = dir_stat
+
+            next_scans.extend(os.path.join(current_dir, subdir)
+                for subdir in dir_stat['subdirs'])
+
+        removed_dirs = set(cached_stats) - set(self.dir_stats)
+        update_save_dir_stats(updated_stats, removed_dirs)
+
+        return self.stats()
+
+    def refresh(self, changed_dirs):
+        """Rescan the directories reported as changed and pick up created or
+        deleted subdirectories.
+
+        Returns the directories added to and removed from the tree.
+        """
+        updated_stats = {}
+        added_dirs = set()
+        removed_dirs = set()
+
+        next_scans = [path for path in changed_dirs if path in self.dir_stats]
+        while len(next_scans) > 0:
+            current_dir = next_scans.pop()
+            previous_stat = self.dir_stats.get(current_dir)
+
+            try:
+                modified_on = os.stat(current_dir).st_mtime
+                dir_stat = scan_dir(current_dir)
+            except OSError:
+                removed_dirs.update(self.remove_subtree(current_dir))
+                continue
+
+            dir_stat['modified_on'] = modified_on
+            self.dir_stats[current_dir] = dir_stat
+            updated_stats[current_dir] = dir_stat
+
+            previous_subdirs = set()
+            if previous_stat is None:
+                added_dirs.add(current_dir)
+            else:
+                previous_subdirs = set(previous_stat['subdirs'])
+
+            for subdir in previous_subdirs - set(dir_stat['subdirs']):
+                removed_dirs.update(self.remove_subtree(
+                    os.path.join(current_dir, subdir)))
+            for subdir in set(dir_stat['subdirs']) - previous_subdirs:
+                next_scans.append(os.path.join(current_dir, subdir))
+
+        update_save_dir_stats(updated_stats, removed_dirs)
+
+        return added_dirs, removed_dirs
+
+    def remove_subtree(self, path):
+        prefix = os.path.join(path, '')
+        removed_dirs = [dir_path for dir_path in self.dir_stats
+            if dir_path == path or dir_path.startswith(prefix)]
+        for dir_path in removed_dirs:
+            del self.dir_stats[dir_path]
+
+        return removed_dirs
+
+    def stats(self):
+        """Aggregate the statistics of every known directory."""
+        stats = empty_saves_stats()
+
+        for path, dir_stat in self.dir_stats.items():
+            stats['size'] += dir_stat['size']
+            stats['files'] += dir_stat['file_count']
+            if dir_stat['last_modified'] is not None and (
+                    stats['last_played'] is None
+                    or dir_stat['last_modified'] > stats['last_played']):
+                stats['last_played'] = dir_stat['last_modified']
+
+            if os.path.dirname(path) == self.save_dir:
+                stats['characters'] += dir_stat['characters']
+                if dir_stat['is_world']:
+                    stats['worlds'] += 1
+
+        return stats
+
+
+def scan_saves(save_dir, progress=None, interrupted=None):
+    """Count the worlds, characters and total size of a save directory.
+
+    last_played is the most recent modification time found in the tree as a
+    timestamp or None when the directory is empty.
+    """
+    return SaveTree(save_dir).scan(progress, interrupted)
+
+
+def get_archives_dir(save_dir):
+    return os.path.join(os.path.dirname(save_dir), 'save_archives')
+
+
+def list_world_dirs(save_dir):
+    world_dirs = []
+
+    if not os.path.isdir(save_dir):
+        return world_dirs
+
+    with scandir(save_dir) as entries:
+        for entry in entries:
+            if entry.is_dir() and any(os.path.isfile(os.path.join(entry.path,
+                    world_file)) for world_file in cons.WORLD_FILES):
+                world_dirs.append(entry.path)
+
+    return world_dirs
+
+
+def world_last_played(world_dir):
+    last_played = None
+
+    for dirpath, dirnames, filenames in os.walk(world_dir):
+        for filename in filenames:
+            try:
+                modified_on = os.stat(os.path.join(dirpath, filename)).st_mtime
+            except OSError:
+                continue
+            if last_played is None or modified_on > last_played:
+                last_played = modified_on
+
+    return last_played
+
+
+def find_cold_worlds(save_dir, max_age):
+    """Return the world directories which were not played for more than
+    max_age seconds."""
+    limit = time.time() - max_age
+
+    cold_worlds = []
+    for world_dir in list_world_dirs(save_dir):
+        last_played = world_last_played(world_dir)
+        if last_played is not None and last_played < limit:
+            cold_worlds.append(world_dir)
+
+    return cold_worlds
+
+
+def list_archived_worlds(save_dir):
+    """Return the names of the worlds archived for a save directory."""
+    archives_dir = get_archives_dir(save_dir)
+
+    archived_worlds = []
+    if not os.path.isdir(archives_dir):
+        return archived_worlds
+
+    with scandir(archives_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith('.zip'):
+                archived_worlds.append(entry.name[:-len('.zip')])
+
+    return sorted(archived_worlds)
+
+
+def archive_world(world_dir):
+    """Compress a world directory in the save archives directory and remove
+    it from the save directory.
+
+    The archive is written to a temporary file and checked before the world
+    directory is removed.
+    """
+    save_dir = os.path.dirname(world_dir)
+    world_name = os.path.basename(world_dir)
+
+    archives_dir = get_archives_dir(save_dir)
+    if not os.path.isdir(archives_dir):
+        os.makedirs(archives_dir)
+
+    archive_path = os.path.join(archives_dir, world_name + '.zip')
+    temp_path = archive_path + '.part'
+
+    with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED,
+            strict_timestamps=False) as archive:
+        for dirpath, dirnames, filenames in os.walk(world_dir):
+            relative_dir = os.path.relpath(dirpath, save_dir)
+            if len(filenames) == 0 and len(dirnames) == 0:
+                archive.write(dirpath, relative_dir)
+            for filename in filenames:
+                archive.write(os.path.join(dirpath, filename),
+                    os.path.join(relative_dir, filename))
+
+    with zipfile.ZipFile(temp_path) as archive:
+        if archive.testzip() is not None:
+            os.remove(temp_path)
+            raise zipfile.BadZipFile(temp_path)
+
+    os.replace(temp_path, archive_path)
+    shutil.rmtree(world_dir)
+
+    return archive_path
+
+
+def restore_world(save_dir, world_name):
+    """Extract an archived world back into the save directory and remove its
+    archive."""
+    archive_path = os.path.join(get_archives_dir(save_dir),
+        world_name + '.zip')
+    world_dir = os.path.join(save_dir, world_name)
+
+    if os.path.exists(world_dir):
+        raise FileExistsError(world_dir)
+
+    temp_dir = tempfile.mkdtemp(prefix=cons.TEMP_PREFIX, dir=save_dir)
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            archive.extractall(temp_dir)
+        os.rename(os.path.join(temp_dir, world_name), world_dir)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    os.remove(archive_path)
+
+    return world_dir
+
+
+def copy_verified(src, dst):
+    """Copy a file while computing its CRC and check the copy against it.
+
+    Files already copied by a previous interrupted attempt, with the same size
+    and modification time, are kept as is.
+    """
+    src_stat = os.stat(src)
+    try:
+        dst_stat = os.stat(dst)
+        if (dst_stat.st_size == src_stat.st_size
+                and dst_stat.st_mtime == src_stat.st_mtime):
+            return src_stat.st_size
+    except OSError:
+        pass
+
+    crc = 0
+    with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+        while True:
+            data = src_file.read(cons.COPY_BUFFER_SIZE)
+            if len(data) == 0:
+                break
+            crc = zlib.crc32(data, crc)
+            dst_file.write(data)
+
+    copied_crc = 0
+    with open(dst, 'rb') as dst_file:
+        while True:
+            data = dst_file.read(cons.COPY_BUFFER_SIZE)
+            if len(data) == 0:
+                break
+            copied_crc = zlib.crc32(data, copied_crc)
+
+    if copied_crc != crc:
+        os.remove(dst)
+        raise OSError('Copy of {0} is corrupted'.format(src))
+
+    # The modification time is copied last so that an interrupted copy is
+    # never mistaken for a complete one when resuming
+    shutil.copystat(src, dst)
+
+    return src_stat.st_size
+
+
+def relocate_saves(source_dir, target_dir, progress=None, interrupted=None,
+        relocated=None):
+    """Move a save directory to a new location.
+
+    When both locations are on the same device, the directory is simply
+    renamed. Otherwise, files are copied in parallel in a staging directory
+    next to the target, each copy being verified. Starting again after an
+    interruption reuses the files already copied. The staging directory is
+    renamed to the target and the source is removed only once everything was
+    copied. progress is called with the number of bytes copied so far.
+
+    relocated is called once the saves are in target_dir, before the source
+    is removed. It is where the new location is recorded: when it raises, the
+    source is kept.
+
+    Returns False when interrupted.
+    """
+    if os.path.exists(target_dir):
+        raise FileExistsError(target_dir)
+
+    target_parent = os.path.dirname(target_dir)
+    if not os.path.isdir(target_parent):
+        os.makedirs(target_parent)
+
+    if os.stat(source_dir).st_dev == os.stat(target_parent).st_dev:
+        os.rename(source_dir, target_dir)
+        if relocated is not None:
+            relocated()
+        return True
+
+    staging_dir = target_dir + cons.RELOCATE_STAGING_SUFFIX
+
+    files = []
+    for dirpath, dirnames, filenames in os.walk(source_dir):
+        relative_dir = os.path.relpath(dirpath, source_dir)
+        os.makedirs(os.path.join(staging_dir, relative_dir), exist_ok=True)
+        for filename in filenames:
+            files.append(os.path.join(relative_dir, filename))
+
+    copied_size = 0
+    with ThreadPoolExecutor(max_workers=cons.MAX_COPY_WORKERS) as executor:
+        futures = [executor.submit(copy_verified,
+            os.path.join(source_dir, path), os.path.join(staging_dir, path))
+            for path in files]
+        try:
+            for future in as_completed(futures):
+                copied_size += future.result()
+                if progress is not None:
+                    progress(copied_size)
+                if interrupted is not None and interrupted():
+                    return False
+        finally:
+            for future in futures:
+                future.cancel()
+
+    os.rename(staging_dir, target_dir)
+    if relocated is not None:
+        relocated()
+    # The saves are moved at this point, leftovers of the source are only
+    # wasted space
+    shutil.rmtree(source_dir, ignore_errors=True)
+
+    return True
@@ -0,0 +1,394 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import cddagl.constants as cons
+
+logger = logging.getLogger('cddagl')
+
+# Snapshots are backups stored in a repository shared by every backup of a
+# save directory. Files are cut in content defined chunks, each chunk is
+# compressed and stored once in the chunks directory under its SHA-256. A
+# snapshot only lists the chunks of each file, so the repository grows with
+# what changed between backups rather than with the number of backups.
+
+# Candidate chunk boundaries: the end of a JSON object, a line or a run of
+# zeros in binary files
+CHUNK_ANCHORS = re.compile(rb'\}[,\]\n]|\n|\x00\x00')
+CHUNK_WINDOW_SIZE = 32
+
+SnapshotEntry = namedtuple('SnapshotEntry', 'filename file_size mtime chunks')
+
+
+def get_chunks_dir(backup_dir):
+    return os.path.join(backup_dir, cons.SNAPSHOT_CHUNKS_DIR)
+
+
+def chunk_path(chunks_dir, chunk_id):
+    return os.path.join(chunks_dir, chunk_id[:2], chunk_id)
+
+
+def member_target(path, filename):
+    """Path where a backup member is extracted in path. Like zipfile does,
+    the components which could escape path are dropped."""
+    parts = [part for part in filename.split('/') if part not in ('', '.', '..')]
+    return os.path.join(path, *parts)
+
+
+def replace_file(target, chunks, mtime=None):
+    """Write the chunks of data in a temporary file then move it to target.
+
+    The file at target is replaced instead of being written in place. Saves
+    captured as hard links share their content with the live saves, writing
+    in place would change the captured copy too. mtime is in nanoseconds.
+    """
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+
+    temp_path = target + '.part'
+    try:
+        with open(temp_path, 'wb') as target_file:
+            for data in chunks:
+                target_file.write(data)
+        if mtime is not None:
+            os.utime(temp_path, ns=(mtime, mtime))
+        os.replace(temp_path, target)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def is_snapshot(backup_path):
+    return backup_path.lower().endswith(cons.BACKUP_SNAPSHOT_EXT)
+
+
+def chunk_boundaries(data):
+    """Yield the (start, end) offsets of the chunks of data.
+
+    A chunk ends after an anchor when the checksum of the bytes before it
+    matches a mask. Since boundaries only depend on nearby content, inserting
+    or removing bytes in a file only changes the chunks around the edit.
+    """
+    mask = (1 << cons.SNAPSHOT_CHUNK_MASK_BITS) - 1
+    size = len(data)
+    start = 0
+
+    while start < size:
+        limit = min(start + cons.SNAPSHOT_CHUNK_MAX_SIZE, size)
+        end = limit
+
+        pos = start + cons.SNAPSHOT_CHUNK_MIN_SIZE
+        while pos < limit:
+            match = CHUNK_ANCHORS.search(data, pos, limit)
+            if match is None:
+                break
+
+            cut = match.end()
+            if zlib.crc32(data[cut - CHUNK_WINDOW_SIZE:cut]) & mask == 0:
+                end = cut
+                break
+            pos = cut
+
+        yield start, end
+        start = end
+
+
+def load_chunk_index(chunks_dir):
+    """Find the chunks already stored in the repository.
+
+    Returns {chunk_id: compressed size}.
+    """
+    index = {}
+
+    try:
+        with os.scandir(chunks_dir) as prefixes:
+            for prefix in prefixes:
+                if not prefix.is_dir():
+                    continue
+                with os.scandir(prefix.path) as chunks:
+                    for chunk in chunks:
+                        if chunk.is_file() and not chunk.name.endswith('.part'):
+                            index[chunk.name] = chunk.stat().st_size
+    except FileNotFoundError:
+        pass
+
+    return index
+
+
+def write_chunk(chunks_dir, chunk_id, data):
+    path = chunk_path(chunks_dir, chunk_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    compressed = zlib.compress(data)
+
+    # Write the chunk under a temporary name first so that an interrupted
+    # backup never leaves a truncated chunk behind. Each worker has its own
+    # temporary file as two of them can store the same new chunk at once.
+    temp_path = '{0}.{1}.part'.format(path, threading.get_ident())
+    with open(temp_path, 'wb') as chunk_file:
+        chunk_file.write(compressed)
+    try:
+        os.replace(temp_path, path)
+    except OSError:
+        # The other worker stored the chunk first, which might keep it from
+        # being replaced
+        if not os.path.isfile(path):
+            raise
+        os.remove(temp_path)
+
+    return len(compressed)
+
+
+def read_chunk(chunks_dir, chunk_id):
+    with open(chunk_path(chunks_dir, chunk_id), 'rb') as chunk_file:
+        data = zlib.decompress(chunk_file.read())
+
+    if hashlib.sha256(data).hexdigest() != chunk_id:
+        raise OSError('Chunk {0} is corrupted'.format(chunk_id))
+
+    return data
+
+
+def store_file(path, chunks_dir, index, index_lock):
+    """Cut a file in chunks and store the ones missing from the repository.
+
+    Returns the list of [chunk_id, compressed size] of the file.
+    """
+    with open(path, 'rb') as member_file:
+        data = member_file.read()
+
+    chunks = []
+    for start, end in chunk_boundaries(data):
+        chunk = data[start:end]
+        chunk_id = hashlib.sha256(chunk).hexdigest()
+
+        with index_lock:
+            compress_size = index.get(chunk_id)
+
+        if compress_size is None:
+            # Two workers might store the same new chunk at the same time,
+            # both write the same content to their own temporary file
+            compress_size = write_chunk(chunks_dir, chunk_id, chunk)
+            with index_lock:
+                index[chunk_id] = compress_size
+
+        chunks.append([chunk_id, compress_size])
+
+    return chunks
+
+
+def parse_snapshot(data):
+    """Parse the list of SnapshotEntry of the content of a snapshot."""
+    snapshot = json.loads(data)
+
+    return [SnapshotEntry(*values) for values in snapshot['files']]
+
+
+def read_snapshot(snapshot_path):
+    """Read the list of SnapshotEntry of a snapshot."""
+    with open(snapshot_path, 'r', encoding='utf8') as snapshot_file:
+        return parse_snapshot(snapshot_file.read())
+
+
+def list_snapshots(backup_dir):
+    """List the snapshots of backup_dir, most recent first."""
+    snapshots = []
+    try:
+        with os.scandir(backup_dir) as it:
+            for entry in it:
+                if entry.is_file() and is_snapshot(entry.name):
+                    snapshots.append((entry.stat().st_mtime, entry.path))
+    except OSError:
+        return []
+
+    return [path for mtime, path in sorted(snapshots, reverse=True)]
+
+
+def write_snapshot(snapshot_path, members, progress=None, interrupted=None,
+        initializer=None):
+    """Store members in the repository of the snapshot directory.
+
+    members is an iterable of (path, arcname, size, mtime) tuples. Files with
+    the same size and mtime as in the most recent snapshot are not read
+    again. progress and initializer are used like for write_backup.
+
+    Returns False when interrupted.
+    """
+    backup_dir = os.path.dirname(snapshot_path)
+    chunks_dir = get_chunks_dir(backup_dir)
+
+    index = load_chunk_index(chunks_dir)
+    index_lock = threading.Lock()
+
+    previous_entries = {}
+    previous_snapshots = list_snapshots(backup_dir)
+    if len(previous_snapshots) > 0:
+        try:
+            previous_entries = {entry.filename: entry
+                for entry in read_snapshot(previous_snapshots[0])}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning('Could not read snapshot {0}: {1}'.format(
+                previous_snapshots[0], e))
+
+    files = []
+    pending = deque()
+    processed_size = 0
+    processed_files = 0
+    last_progress = time.monotonic()
+
+    def write_next():
+        nonlocal processed_size, processed_files
+
+        member, result = pending.popleft()
+        path, arcname, size, mtime = member
+
+        if not isinstance(result, list):
+            try:
+                result = result.result()
+            except OSError as e:
+                logger.warning('Could not backup {0}: {1}'.format(path, e))
+                result = None
+
+        if result is not None:
+            files.append([arcname, size, mtime, result])
+
+        processed_size += size
+        processed_files += 1
+
+    max_workers = max(1, min(os.cpu_count() or 1, cons.MAX_BACKUP_WORKERS))
+    with ThreadPoolExecutor(max_workers=max_workers,
+            initializer=initializer) as executor:
+        try:
+            for member in members:
+                if interrupted is not None and interrupted():
+                    return False
+
+                path, arcname, size, mtime = member
+                arcname = arcname.replace(os.sep, '/')
+                member = (path, arcname, size, mtime)
+
+                previous = previous_entries.get(arcname)
+                if (previous is not None and previous.file_size == size
+                        and previous.mtime == mtime):
+                    pending.append((member, previous.chunks))
+                else:
+                    pending.append((member, executor.submit(store_file, path,
+                        chunks_dir, index, index_lock)))
+
+                while len(pending) > max_workers * 2:
+                    write_next()
+
+                if progress is not None:
+                    now = time.monotonic()
+                    if now - last_progress >= cons.BACKUP_PROGRESS_INTERVAL:
+                        last_progress = now
+                        progress(processed_size, processed_files, arcname)
+
+            while len(pending) > 0:
+                if interrupted is not None and interrupted():
+                    return False
+                write_next()
+        finally:
+            for member, result in pending:
+                if not isinstance(result, list):
+                    result.cancel()
+
+    # The snapshot is written last, once every chunk it needs is stored
+    temp_path = snapshot_path + '.part'
+    with open(temp_path, 'w', encoding='utf8') as snapshot_file:
+        json.dump({'version': 1, 'files': files}, snapshot_file)
+    os.replace(temp_path, snapshot_path)
+
+    if progress is not None:
+        progress(processed_size, processed_files, None)
+
+    return True
+
+
+def collect_garbage(backup_dir):
+    """Delete the chunks no snapshot uses anymore.
+
+    Returns the number of bytes freed.
+    """
+    chunks_dir = get_chunks_dir(backup_dir)
+    if not os.path.isdir(chunks_dir):
+        return 0
+
+    used = set()
+    for snapshot_path in list_snapshots(backup_dir):
+        try:
+            entries = read_snapshot(snapshot_path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # Better keep a few unused chunks than lose a snapshot
+            logger.warning('Could not read snapshot {0}, skipping garbage '
+                'collection: {1}'.format(snapshot_path, e))
+            return 0
+
+        for entry in entries:
+            used.update(chunk_id for chunk_id, compress_size in entry.chunks)
+
+    freed = 0
+    with os.scandir(chunks_dir) as prefixes:
+        for prefix in prefixes:
+            if not prefix.is_dir():
+                continue
+
+            remaining = 0
+            with os.scandir(prefix.path) as chunks:
+                for chunk in chunks:
+                    if chunk.name in used:
+                        remaining += 1
+                        continue
+                    try:
+                        size = chunk.stat().st_size
+                        os.remove(chunk.path)
+                        freed += size
+                    except OSError:
+                        remaining += 1
+
+            if remaining == 0:
+                try:
+                    os.rmdir(prefix.path)
+                except OSError:
+                    pass
+
+    return freed
+
+
+class SnapshotReader():
+    """Read a snapshot with the subset of the zipfile.ZipFile interface used
+    to restore backups."""
+
+    def __init__(self, snapshot_path):
+        self.chunks_dir = get_chunks_dir(os.path.dirname(snapshot_path))
+        self.entries = read_snapshot(snapshot_path)
+
+    def infolist(self):
+        return list(self.entries)
+
+    def extract(self, entry, path):
+        target = member_target(path, entry.filename)
+
+        # Keep the mtime so the next backups still recognize the file
+        replace_file(target, (read_chunk(self.chunks_dir, chunk_id)
+            for chunk_id, compress_size in entry.chunks), entry.mtime)
+
+        return target
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
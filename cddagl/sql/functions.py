@@ -1,3 +1,4 @@
+import json
 import os
 import threading
 
@@ -8,7 +9,13 @@ from sqlalchemy import create_engine
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker, joinedload
 
-from cddagl.sql.model import ConfigValue, GameVersion, GameBuild
+from cddagl.sql.model import (
+    ConfigValue, GameVersion, GameBuild, GameRelease, ExeHash, SaveDirStat,
+    BackupInfo
+)
+
+# Stay below the default SQLite limit of host parameters in a single query
+MAX_QUERY_PARAMETERS = 500
 
 
 class ThreadSafeSessionManager():
@@ -100,6 +107,28 @@ def set_config_value(name, value):
     session.commit()
 
 
+def set_config_values(values):
+    """Set multiple config values in a single transaction."""
+    session = get_session()
+
+    db_values = {}
+    for db_value in (session
+                     .query(ConfigValue)
+                     .filter(ConfigValue.name.in_(list(values)))):
+        db_values[db_value.name] = db_value
+
+    for name, value in values.items():
+        db_value = db_values.get(name)
+        if db_value is None:
+            db_value = ConfigValue()
+            db_value.name = name
+
+        db_value.value = value
+        session.add(db_value)
+
+    session.commit()
+
+
 def new_version(version, sha256, stable):
     session = get_session()
 
@@ -161,5 +190,364 @@ def get_build_from_sha256(sha256):
     return None
 
 
+def import_fingerprints(fingerprints):
+    """Bulk insert known game executable fingerprints.
+
+    Each fingerprint is a dict with the sha256, version, stable, build and
+    released_on keys. Existing fingerprints only get their missing build
+    information completed. Everything is written in a single transaction.
+    """
+    session = get_session()
+
+    sha256_list = [fingerprint['sha256'] for fingerprint in fingerprints]
+    known_versions = {}
+    for game_version in (session
+                         .query(GameVersion)
+                         .filter(GameVersion.sha256.in_(sha256_list))
+                         .options(joinedload(GameVersion.game_build))):
+        known_versions[game_version.sha256] = game_version
+
+    for fingerprint in fingerprints:
+        game_version = known_versions.get(fingerprint['sha256'])
+
+        if game_version is None:
+            game_version = GameVersion()
+            game_version.sha256 = fingerprint['sha256']
+            game_version.version = fingerprint['version']
+            game_version.stable = fingerprint['stable']
+
+            session.add(game_version)
+            known_versions[game_version.sha256] = game_version
+
+        if (game_version.game_build is None
+                and fingerprint.get('build') is not None):
+            game_build = GameBuild()
+            game_build.build = fingerprint['build']
+            game_build.released_on = fingerprint['released_on']
+
+            game_version.game_build = game_build
+
+    session.commit()
+
+
+def new_releases(releases):
+    """Bulk insert release metadata linking commit shas to build numbers.
+
+    Each release is a dict with the commit_sha, build and released_on keys.
+    """
+    session = get_session()
+
+    releases = [dict(release, commit_sha=release['commit_sha'][:7])
+                for release in releases]
+    commit_sha_list = [release['commit_sha'] for release in releases]
+    known_commits = set(commit_sha for (commit_sha,) in (session
+        .query(GameRelease.commit_sha)
+        .filter(GameRelease.commit_sha.in_(commit_sha_list))))
+
+    for release in releases:
+        if release['commit_sha'] in known_commits:
+            continue
+
+        game_release = GameRelease()
+        game_release.commit_sha = release['commit_sha']
+        game_release.build = release['build']
+        game_release.released_on = release['released_on']
+
+        session.add(game_release)
+        known_commits.add(release['commit_sha'])
+
+    session.commit()
+
+
+def get_release_builds(builds):
+    """Return the builds among builds whose release commit is known."""
+    session = get_session()
+
+    return set(build for (build,) in (session
+        .query(GameRelease.build)
+        .filter(GameRelease.build.in_(list(builds)))))
+
+
+def get_build_from_commit_sha(commit_sha):
+    session = get_session()
+
+    game_release = (session
+                    .query(GameRelease)
+                    .filter_by(commit_sha=commit_sha[:7])
+                    .first())
+
+    if game_release is not None:
+        return {
+            'build': game_release.build,
+            'released_on': game_release.released_on
+        }
+
+    return None
+
+
+def identify_game_version(sha256, commit_sha=None):
+    """Find the version and build of a game executable without any network
+    access.
+
+    The executable sha256 is looked up first. When it is unknown or has no
+    build, the commit sha from VERSION.txt is matched against the release
+    metadata and the result is remembered for that sha256.
+    """
+    session = get_session()
+
+    game_version = (session
+                    .query(GameVersion)
+                    .filter_by(sha256=sha256)
+                    .options(joinedload(GameVersion.game_build))
+                    .first())
+
+    result = {
+        'version': None,
+        'stable': False,
+        'build': None,
+        'released_on': None
+    }
+
+    if game_version is not None:
+        result['version'] = game_version.version
+        result['stable'] = game_version.stable
+        if game_version.game_build is not None:
+            result['build'] = game_version.game_build.build
+            result['released_on'] = game_version.game_build.released_on
+            return result
+
+    if commit_sha:
+        build = get_build_from_commit_sha(commit_sha)
+        if build is not None:
+            version = result['version'] or commit_sha[:7]
+            new_build(version, sha256, result['stable'], build['build'],
+                build['released_on'])
+            result['version'] = version
+            result.update(build)
+            return result
+
+    if game_version is None:
+        return None
+
+    return result
+
+
+def get_cached_sha256(path):
+    """Return the cached sha256 of a file or None when the file changed since
+    it was last hashed."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    session = get_session()
+
+    exe_hash = session.query(ExeHash).filter_by(path=path).first()
+
+    if (exe_hash is not None and exe_hash.size == stat.st_size
+            and exe_hash.modified_on == stat.st_mtime):
+        return exe_hash.sha256
+
+    return None
+
+
+def set_cached_sha256(path, sha256):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return
+
+    session = get_session()
+
+    exe_hash = session.query(ExeHash).filter_by(path=path).first()
+
+    if exe_hash is None:
+        exe_hash = ExeHash()
+        exe_hash.path = path
+
+        session.add(exe_hash)
+
+    exe_hash.size = stat.st_size
+    exe_hash.modified_on = stat.st_mtime
+    exe_hash.sha256 = sha256
+
+    session.commit()
+
+
+def get_save_dir_stats(save_dir):
+    """Return the cached statistics of every directory below save_dir keyed by
+    directory path."""
+    session = get_session()
+
+    prefix = os.path.join(save_dir, '')
+    query = (session
+             .query(SaveDirStat)
+             .filter((SaveDirStat.path == save_dir)
+                     | (SaveDirStat.path.startswith(prefix, autoescape=True))))
+
+    dir_stats = {}
+    for save_dir_stat in query:
+        dir_stats[save_dir_stat.path] = {
+            'modified_on': save_dir_stat.modified_on,
+            'size': save_dir_stat.size,
+            'file_count': save_dir_stat.file_count,
+            'characters': save_dir_stat.characters,
+            'is_world': save_dir_stat.is_world,
+            'last_modified': save_dir_stat.last_modified,
+            'subdirs': json.loads(save_dir_stat.subdirs)
+        }
+
+    return dir_stats
+
+
+def update_save_dir_stats(updated, removed):
+    """Store the statistics of rescanned directories and forget the removed
+    ones in a single transaction."""
+    if len(updated) == 0 and len(removed) == 0:
+        return
+
+    session = get_session()
+
+    removed = list(removed)
+    for index in range(0, len(removed), MAX_QUERY_PARAMETERS):
+        (session
+         .query(SaveDirStat)
+         .filter(SaveDirStat.path.in_(
+            removed[index:index + MAX_QUERY_PARAMETERS]))
+         .delete(synchronize_session=False))
+
+    known_stats = {}
+    updated_paths = list(updated)
+    for index in range(0, len(updated_paths), MAX_QUERY_PARAMETERS):
+        for save_dir_stat in (session
+                              .query(SaveDirStat)
+                              .filter(SaveDirStat.path.in_(
+                                updated_paths[index:index + MAX_QUERY_PARAMETERS]))):
+            known_stats[save_dir_stat.path] = save_dir_stat
+
+    for path, dir_stat in updated.items():
+        save_dir_stat = known_stats.get(path)
+        if save_dir_stat is None:
+            save_dir_stat = SaveDirStat()
+            save_dir_stat.path = path
+
+            session.add(save_dir_stat)
+
+        save_dir_stat.modified_on = dir_stat['modified_on']
+        save_dir_stat.size = dir_stat['size']
+        save_dir_stat.file_count = dir_stat['file_count']
+        save_dir_stat.characters = dir_stat['characters']
+        save_dir_stat.is_world = dir_stat['is_world']
+        save_dir_stat.last_modified = dir_stat['last_modified']
+        save_dir_stat.subdirs = json.dumps(dir_stat['subdirs'])
+
+    session.commit()
+
+
+def get_backup_infos(backup_dir):
+    """Return the indexed metadata of the backups in backup_dir keyed by
+    backup path."""
+    session = get_session()
+
+    prefix = os.path.join(backup_dir, '')
+    query = (session
+             .query(BackupInfo)
+             .filter(BackupInfo.path.startswith(prefix, autoescape=True)))
+
+    backup_infos = {}
+    for backup_info in query:
+        backup_infos[backup_info.path] = {
+            'size': backup_info.size,
+            'modified_on': backup_info.modified_on,
+            'worlds': backup_info.worlds,
+            'characters': backup_info.characters,
+            'uncompressed_size': backup_info.uncompressed_size,
+            'compressed_size': backup_info.compressed_size,
+            'base_name': backup_info.base_name,
+            'build': backup_info.build,
+            'fingerprint': backup_info.fingerprint,
+            'verified': backup_info.verified,
+            'verified_on': backup_info.verified_on
+        }
+
+    return backup_infos
+
+
+def set_backup_info(path, info):
+    session = get_session()
+
+    backup_info = session.query(BackupInfo).filter_by(path=path).first()
+    if backup_info is None:
+        backup_info = BackupInfo()
+        backup_info.path = path
+
+        session.add(backup_info)
+
+    backup_info.size = info['size']
+    backup_info.modified_on = info['modified_on']
+    backup_info.worlds = info['worlds']
+    backup_info.characters = info['characters']
+    backup_info.uncompressed_size = info['uncompressed_size']
+    backup_info.compressed_size = info['compressed_size']
+    backup_info.base_name = info['base_name']
+    backup_info.build = info['build']
+    backup_info.fingerprint = info.get('fingerprint')
+    # A backup which changed has to be verified again
+    backup_info.verified = info.get('verified')
+    backup_info.verified_on = info.get('verified_on')
+
+    session.commit()
+
+
+def rename_backup_info(path, new_path):
+    session = get_session()
+
+    backup_info = session.query(BackupInfo).filter_by(path=path).first()
+    if backup_info is not None:
+        session.query(BackupInfo).filter_by(path=new_path).delete()
+        backup_info.path = new_path
+        session.commit()
+
+
+def set_backup_fingerprint(path, fingerprint):
+    session = get_session()
+
+    backup_info = session.query(BackupInfo).filter_by(path=path).first()
+    if backup_info is not None:
+        backup_info.fingerprint = fingerprint
+        session.commit()
+
+
+def set_backup_verification(path, modified_on, verified, verified_on):
+    """Record the result of the verification of a backup, unless the backup
+    was modified since modified_on."""
+    session = get_session()
+
+    backup_info = (session
+                   .query(BackupInfo)
+                   .filter_by(path=path, modified_on=modified_on)
+                   .first())
+    if backup_info is not None:
+        backup_info.verified = verified
+        backup_info.verified_on = verified_on
+        session.commit()
+
+
+def delete_backup_infos(paths):
+    paths = list(paths)
+    if len(paths) == 0:
+        return
+
+    session = get_session()
+
+    for index in range(0, len(paths), MAX_QUERY_PARAMETERS):
+        (session
+         .query(BackupInfo)
+         .filter(BackupInfo.path.in_(paths[index:index + MAX_QUERY_PARAMETERS]))
+         .delete(synchronize_session=False))
+
+    session.commit()
+
+
 def config_true(value):
     return value == 'True' or value == '1'
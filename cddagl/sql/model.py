@@ -23,7 +23,7 @@ class GameVersion(Base):
     __tablename__ = 'game_version'
 
     id = sa.Column(sa.Integer, primary_key=True)
-    sha256 = sa.Column(sa.String(64), nullable=False)
+    sha256 = sa.Column(sa.String(64), nullable=False, index=True)
     version = sa.Column(sa.String(32), nullable=False)
     stable = sa.Column(sa.Boolean, nullable=False)
 
@@ -43,3 +43,56 @@ class GameBuild(Base):
     released_on = sa.Column(sa.DateTime, nullable=False)
     discovered_on = sa.Column(sa.DateTime, nullable=False,
         default=datetime.utcnow)
+
+
+class GameRelease(Base):
+    __tablename__ = 'game_release'
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    commit_sha = sa.Column(sa.String(40), nullable=False, index=True)
+    build = sa.Column(sa.String(16), nullable=False)
+    released_on = sa.Column(sa.DateTime, nullable=False)
+    discovered_on = sa.Column(sa.DateTime, nullable=False,
+        default=datetime.utcnow)
+
+
+class ExeHash(Base):
+    __tablename__ = 'exe_hash'
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    path = sa.Column(sa.String(1024), nullable=False, unique=True, index=True)
+    size = sa.Column(sa.Integer, nullable=False)
+    modified_on = sa.Column(sa.Float, nullable=False)
+    sha256 = sa.Column(sa.String(64), nullable=False)
+
+
+class SaveDirStat(Base):
+    __tablename__ = 'save_dir_stat'
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    path = sa.Column(sa.String(1024), nullable=False, unique=True, index=True)
+    modified_on = sa.Column(sa.Float, nullable=False)
+    size = sa.Column(sa.Integer, nullable=False)
+    file_count = sa.Column(sa.Integer, nullable=False)
+    characters = sa.Column(sa.Integer, nullable=False)
+    is_world = sa.Column(sa.Boolean, nullable=False)
+    last_modified = sa.Column(sa.Float)
+    subdirs = sa.Column(sa.Text, nullable=False)
+
+
+class BackupInfo(Base):
+    __tablename__ = 'backup_info'
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    path = sa.Column(sa.String(1024), nullable=False, unique=True, index=True)
+    size = sa.Column(sa.Integer, nullable=False)
+    modified_on = sa.Column(sa.Float, nullable=False)
+    worlds = sa.Column(sa.Integer, nullable=False)
+    characters = sa.Column(sa.Integer, nullable=False)
+    uncompressed_size = sa.Column(sa.Integer, nullable=False)
+    compressed_size = sa.Column(sa.Integer, nullable=False)
+    base_name = sa.Column(sa.String(256))
+    build = sa.Column(sa.String(16))
+    fingerprint = sa.Column(sa.String(64))
+    verified = sa.Column(sa.Boolean)
+    verified_on = sa.Column(sa.Float)
@@ -3,24 +3,52 @@ import json
 import logging
 import os
 import random
+import shutil
+import threading
+import time
 import zipfile
-from collections import deque
 from datetime import datetime, timedelta
 from os import scandir
 
 import arrow
-from PySide6.QtCore import Qt, QTimer, Signal, QThread, QItemSelectionModel, QItemSelection
+from PySide6.QtCore import (Qt, QTimer, Signal, QThread, QAbstractTableModel, QModelIndex,
+                            QSortFilterProxyModel)
 from PySide6.QtWidgets import (QApplication, QWidget, QGridLayout, QGroupBox, QLabel, QLineEdit, QPushButton,
                                QProgressBar, QTabWidget, QCheckBox, QMessageBox, QStyle, QHBoxLayout, QSpinBox,
-                               QAbstractItemView, QSizePolicy, QTableWidget, QTableWidgetItem)
+                               QAbstractItemView, QSizePolicy, QTableView, QListWidget,
+                               QComboBox, QInputDialog, QDialog, QFileDialog, QHeaderView, QTreeWidget,
+                               QTreeWidgetItem)
 from babel.dates import format_datetime
 from babel.numbers import format_percent
 
 import cddagl.constants as cons
-from cddagl.functions import sizeof_fmt, safe_filename, alphanum_key, delete_path, safe_humanize
-from cddagl.i18n import proxy_gettext as _
-from cddagl.sql.functions import get_config_value, set_config_value, config_true
-from cddagl.win32 import find_process_with_file_handle
+from cddagl.backups import (
+    iter_backup_members, write_backup, read_backup_manifest, find_backup_base,
+    find_previous_backup, required_backups, restore_plan, extract_backup, diff_restore_plan,
+    apply_staged_restore,
+    find_shard_base, world_shard, backup_worlds, world_restore_plan, settled_members, capture_saves,
+    cached_restore_plan, select_members, member_world, world_characters,
+    list_pending_backups, remove_pending_backup, saves_fingerprint, saves_unchanged,
+    write_tar_zst_backup, available_codecs, codec_level, split_backup_name, backup_metadata,
+    read_backup_metadata, backup_physical_size, expired_backups, verify_backups, dependent_backups
+)
+from cddagl.snapshots import (
+    write_snapshot, collect_garbage, is_snapshot
+)
+from cddagl.functions import (
+    sizeof_fmt, safe_filename, alphanum_key, delete_path, delete_paths, safe_humanize, clean_qt_path
+)
+from cddagl.i18n import proxy_ngettext as ngettext, proxy_gettext as _
+from cddagl.remote import S3Client, S3Error, mirror_backups
+from cddagl.saves import find_cold_worlds, list_archived_worlds, archive_world, restore_world, list_world_dirs
+from cddagl.sql.functions import (
+    get_config_value, set_config_value, config_true, get_backup_infos, set_backup_info, delete_backup_infos,
+    set_backup_fingerprint, set_backup_verification, rename_backup_info
+)
+from cddagl.win32 import (
+    find_process_with_file_handle, set_thread_background_mode, get_downloads_directory,
+    protect_string, unprotect_string
+)
 
 logger = logging.getLogger('cddagl')
 
@@ -30,18 +58,23 @@ class BackupsTab(QTabWidget):
         super(BackupsTab, self).__init__()
 
         self.game_dir = None
+        self.backups_dir_shown = None
         self.update_backups_timer = None
         self.after_backup = None
         self.after_update_backups = None
 
         self.extracting_backup = False
+        self.differential_restore = False
+        self.restore_worlds = None
+        self.background_backup = False
+        self.queued_backup = None
+        self.capture = None
         self.manual_backup = False
-        self.backup_searching = False
         self.backup_compressing = False
+        self.garbage_pending = False
+        self.verify_thread = None
 
-        self.compressing_timer = None
         self.scale_factor = 0  # Number of bits to shift file size right so we don't overflow the QProgressBar
-        self.filestep = 0  # File counter so we don't update the progress bar every single file
 
         current_backups_gb = QGroupBox()
         self.current_backups_gb = current_backups_gb
@@ -50,14 +83,22 @@ class BackupsTab(QTabWidget):
         current_backups_gb.setLayout(current_backups_gb_layout)
         self.current_backups_gb_layout = current_backups_gb_layout
 
-        backups_table = QTableWidget()
-        backups_table.setColumnCount(8)
+        backups_model = BackupsTableModel(self)
+        self.backups_model = backups_model
+
+        backups_proxy_model = BackupsSortProxyModel(self)
+        backups_proxy_model.setSourceModel(backups_model)
+        self.backups_proxy_model = backups_proxy_model
+
+        backups_table = QTableView()
+        backups_table.setModel(backups_proxy_model)
         backups_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         backups_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         backups_table.verticalHeader().setVisible(False)
-        backups_table.horizontalHeader().sortIndicatorChanged.connect(self.backups_table_header_sort)
-        backups_table.itemSelectionChanged.connect(self.backups_table_selection_changed)
-        current_backups_gb_layout.addWidget(backups_table, 0, 0, 1, 3)
+        backups_table.setSortingEnabled(True)
+        backups_table.sortByColumn(1, Qt.SortOrder.DescendingOrder)
+        backups_table.selectionModel().selectionChanged.connect(self.backups_table_selection_changed)
+        current_backups_gb_layout.addWidget(backups_table, 0, 0, 1, 5)
         self.backups_table = backups_table
 
         columns_width = get_config_value('backups_columns_width', None)
@@ -65,7 +106,7 @@ class BackupsTab(QTabWidget):
             columns_width = json.loads(columns_width)
 
             for index, value in enumerate(columns_width):
-                if index < self.backups_table.columnCount():
+                if index < self.backups_model.columnCount():
                     self.backups_table.setColumnWidth(index, value)
 
         restore_button = QPushButton()
@@ -74,16 +115,28 @@ class BackupsTab(QTabWidget):
         current_backups_gb_layout.addWidget(restore_button, 1, 0)
         self.restore_button = restore_button
 
+        restore_backup_world_button = QPushButton()
+        restore_backup_world_button.clicked.connect(self.restore_backup_world_clicked)
+        restore_backup_world_button.setEnabled(False)
+        current_backups_gb_layout.addWidget(restore_backup_world_button, 1, 1)
+        self.restore_backup_world_button = restore_backup_world_button
+
+        browse_backup_button = QPushButton()
+        browse_backup_button.clicked.connect(self.browse_backup_clicked)
+        browse_backup_button.setEnabled(False)
+        current_backups_gb_layout.addWidget(browse_backup_button, 1, 2)
+        self.browse_backup_button = browse_backup_button
+
         refresh_list_button = QPushButton()
         refresh_list_button.setEnabled(False)
         refresh_list_button.clicked.connect(self.refresh_list_button_clicked)
-        current_backups_gb_layout.addWidget(refresh_list_button, 1, 1)
+        current_backups_gb_layout.addWidget(refresh_list_button, 1, 3)
         self.refresh_list_button = refresh_list_button
 
         delete_button = QPushButton()
         delete_button.clicked.connect(self.delete_button_clicked)
         delete_button.setEnabled(False)
-        current_backups_gb_layout.addWidget(delete_button, 1, 2)
+        current_backups_gb_layout.addWidget(delete_button, 1, 4)
         self.delete_button = delete_button
 
         do_not_backup_previous_cb = QCheckBox()
@@ -91,9 +144,43 @@ class BackupsTab(QTabWidget):
             get_config_value('do_not_backup_previous', 'False')) else Qt.CheckState.Unchecked)
         do_not_backup_previous_cb.setCheckState(check_state)
         do_not_backup_previous_cb.checkStateChanged.connect(self.dnbp_changed)
-        current_backups_gb_layout.addWidget(do_not_backup_previous_cb, 2, 0, 1, 3)
+        current_backups_gb_layout.addWidget(do_not_backup_previous_cb, 2, 0, 1, 5)
         self.do_not_backup_previous_cb = do_not_backup_previous_cb
 
+        compression_group = QWidget()
+        compression_group.setSizePolicy(QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Maximum)
+        compression_layout = QHBoxLayout()
+        compression_layout.setContentsMargins(0, 0, 0, 0)
+
+        compression_label = QLabel()
+        compression_layout.addWidget(compression_label)
+        self.compression_label = compression_label
+
+        codec_combo = QComboBox()
+        for codec in available_codecs():
+            codec_combo.addItem(codec, codec)
+        codec_index = codec_combo.findData(get_config_value('backup_codec', 'deflate'))
+        codec_combo.setCurrentIndex(max(codec_index, 0))
+        codec_combo.currentIndexChanged.connect(self.codec_changed)
+        compression_layout.addWidget(codec_combo)
+        self.codec_combo = codec_combo
+
+        compression_level_label = QLabel()
+        compression_layout.addWidget(compression_level_label)
+        self.compression_level_label = compression_level_label
+
+        compression_level_spinbox = QSpinBox()
+        compression_level_spinbox.valueChanged.connect(self.cls_changed)
+        compression_layout.addWidget(compression_level_spinbox)
+        self.compression_level_spinbox = compression_level_spinbox
+
+        compression_group.setLayout(compression_layout)
+        current_backups_gb_layout.addWidget(compression_group, 3, 0, 1, 5)
+        self.compression_group = compression_group
+        self.compression_layout = compression_layout
+
+        self.update_compression_level()
+
         manual_backups_gb = QGroupBox()
         self.manual_backups_gb = manual_backups_gb
 
@@ -110,10 +197,18 @@ class BackupsTab(QTabWidget):
         manual_backups_layout.addWidget(name_le, 0, 1)
         self.name_le = name_le
 
+        backup_worlds_label = QLabel()
+        manual_backups_layout.addWidget(backup_worlds_label, 1, 0, Qt.AlignmentFlag.AlignRight)
+        self.backup_worlds_label = backup_worlds_label
+
+        backup_worlds_combo = QComboBox()
+        manual_backups_layout.addWidget(backup_worlds_combo, 1, 1)
+        self.backup_worlds_combo = backup_worlds_combo
+
         backup_current_button = QPushButton()
         backup_current_button.setEnabled(False)
         backup_current_button.clicked.connect(self.backup_current_clicked)
-        manual_backups_layout.addWidget(backup_current_button, 1, 0, 1, 2)
+        manual_backups_layout.addWidget(backup_current_button, 2, 0, 1, 2)
         self.backup_current_button = backup_current_button
 
         automatic_backups_gb = QGroupBox()
@@ -174,15 +269,280 @@ class BackupsTab(QTabWidget):
         mab_layout.addWidget(max_auto_backups_spinbox)
         self.max_auto_backups_spinbox = max_auto_backups_spinbox
 
+        max_auto_backups_size_label = QLabel()
+        mab_layout.addWidget(max_auto_backups_size_label)
+        self.max_auto_backups_size_label = max_auto_backups_size_label
+
+        max_auto_backups_size_spinbox = QSpinBox()
+        max_auto_backups_size_spinbox.setMinimum(0)
+        max_auto_backups_size_spinbox.setMaximum(1024 * 1024)
+        max_auto_backups_size_spinbox.setValue(int(get_config_value('max_auto_backups_size', '0')))
+        max_auto_backups_size_spinbox.valueChanged.connect(self.mabss_changed)
+        mab_layout.addWidget(max_auto_backups_size_spinbox)
+        self.max_auto_backups_size_spinbox = max_auto_backups_size_spinbox
+
         mab_group.setLayout(mab_layout)
         automatic_backups_layout.addWidget(mab_group, 3, 0, 1, 2)
         self.mab_group = mab_group
         self.mab_layout = mab_layout
 
+        incremental_backups_cb = QCheckBox()
+        check_state = (Qt.CheckState.Checked if config_true(
+            get_config_value('incremental_backups', 'False')) else Qt.CheckState.Unchecked)
+        incremental_backups_cb.setCheckState(check_state)
+        incremental_backups_cb.checkStateChanged.connect(self.ib_changed)
+        automatic_backups_layout.addWidget(incremental_backups_cb, 4, 0, 1, 2)
+        self.incremental_backups_cb = incremental_backups_cb
+
+        deduplicated_backups_cb = QCheckBox()
+        check_state = (Qt.CheckState.Checked if config_true(
+            get_config_value('deduplicated_backups', 'False')) else Qt.CheckState.Unchecked)
+        deduplicated_backups_cb.setCheckState(check_state)
+        deduplicated_backups_cb.checkStateChanged.connect(self.db_changed)
+        automatic_backups_layout.addWidget(deduplicated_backups_cb, 5, 0, 1, 2)
+        self.deduplicated_backups_cb = deduplicated_backups_cb
+
+        capture_backups_cb = QCheckBox()
+        check_state = (Qt.CheckState.Checked if config_true(
+            get_config_value('capture_backups', 'False')) else Qt.CheckState.Unchecked)
+        capture_backups_cb.setCheckState(check_state)
+        capture_backups_cb.checkStateChanged.connect(self.cb_changed)
+        automatic_backups_layout.addWidget(capture_backups_cb, 7, 0, 1, 2)
+        self.capture_backups_cb = capture_backups_cb
+
+        kab_group = QWidget()
+        kab_group.setSizePolicy(QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Maximum)
+        kab_layout = QHBoxLayout()
+        kab_layout.setContentsMargins(0, 0, 0, 0)
+
+        keep_auto_backups_label = QLabel()
+        kab_layout.addWidget(keep_auto_backups_label)
+        self.keep_auto_backups_label = keep_auto_backups_label
+
+        keep_hourly_backups_spinbox = QSpinBox()
+        keep_hourly_backups_spinbox.setMinimum(0)
+        keep_hourly_backups_spinbox.setMaximum(1000)
+        keep_hourly_backups_spinbox.setValue(int(get_config_value('keep_hourly_auto_backups', '0')))
+        keep_hourly_backups_spinbox.valueChanged.connect(self.kahb_changed)
+        kab_layout.addWidget(keep_hourly_backups_spinbox)
+        self.keep_hourly_backups_spinbox = keep_hourly_backups_spinbox
+
+        keep_hourly_backups_label = QLabel()
+        kab_layout.addWidget(keep_hourly_backups_label)
+        self.keep_hourly_backups_label = keep_hourly_backups_label
+
+        keep_daily_backups_spinbox = QSpinBox()
+        keep_daily_backups_spinbox.setMinimum(0)
+        keep_daily_backups_spinbox.setMaximum(1000)
+        keep_daily_backups_spinbox.setValue(int(get_config_value('keep_daily_auto_backups', '0')))
+        keep_daily_backups_spinbox.valueChanged.connect(self.kadb_changed)
+        kab_layout.addWidget(keep_daily_backups_spinbox)
+        self.keep_daily_backups_spinbox = keep_daily_backups_spinbox
+
+        keep_daily_backups_label = QLabel()
+        kab_layout.addWidget(keep_daily_backups_label)
+        self.keep_daily_backups_label = keep_daily_backups_label
+
+        keep_weekly_backups_spinbox = QSpinBox()
+        keep_weekly_backups_spinbox.setMinimum(0)
+        keep_weekly_backups_spinbox.setMaximum(1000)
+        keep_weekly_backups_spinbox.setValue(int(get_config_value('keep_weekly_auto_backups', '0')))
+        keep_weekly_backups_spinbox.valueChanged.connect(self.kawb_changed)
+        kab_layout.addWidget(keep_weekly_backups_spinbox)
+        self.keep_weekly_backups_spinbox = keep_weekly_backups_spinbox
+
+        keep_weekly_backups_label = QLabel()
+        kab_layout.addWidget(keep_weekly_backups_label)
+        self.keep_weekly_backups_label = keep_weekly_backups_label
+
+        kab_group.setLayout(kab_layout)
+        automatic_backups_layout.addWidget(kab_group, 8, 0, 1, 2)
+        self.kab_group = kab_group
+        self.kab_layout = kab_layout
+
+        bdg_group = QWidget()
+        bdg_group.setSizePolicy(QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Maximum)
+        bdg_layout = QHBoxLayout()
+        bdg_layout.setContentsMargins(0, 0, 0, 0)
+
+        backup_during_game_cb = QCheckBox()
+        check_state = (Qt.CheckState.Checked if config_true(
+            get_config_value('backup_during_game', 'False')) else Qt.CheckState.Unchecked)
+        backup_during_game_cb.setCheckState(check_state)
+        backup_during_game_cb.checkStateChanged.connect(self.bdg_changed)
+        bdg_layout.addWidget(backup_during_game_cb)
+        self.backup_during_game_cb = backup_during_game_cb
+
+        backup_during_game_spinbox = QSpinBox()
+        backup_during_game_spinbox.setMinimum(1)
+        backup_during_game_spinbox.setMaximum(1440)
+        backup_during_game_spinbox.setValue(int(get_config_value('backup_during_game_interval', '15')))
+        backup_during_game_spinbox.valueChanged.connect(self.bdgs_changed)
+        bdg_layout.addWidget(backup_during_game_spinbox)
+        self.backup_during_game_spinbox = backup_during_game_spinbox
+
+        backup_during_game_label = QLabel()
+        bdg_layout.addWidget(backup_during_game_label)
+        self.backup_during_game_label = backup_during_game_label
+
+        bdg_group.setLayout(bdg_layout)
+        automatic_backups_layout.addWidget(bdg_group, 6, 0, 1, 2)
+        self.bdg_group = bdg_group
+        self.bdg_layout = bdg_layout
+
+        background_backup_timer = QTimer(self)
+        background_backup_timer.setSingleShot(True)
+        background_backup_timer.timeout.connect(self.background_backup_timeout)
+        self.background_backup_timer = background_backup_timer
+        self.last_background_backup = None
+
+        archived_worlds_gb = QGroupBox()
+        archived_worlds_layout = QGridLayout()
+        archived_worlds_gb.setLayout(archived_worlds_layout)
+        self.archived_worlds_layout = archived_worlds_layout
+        self.archived_worlds_gb = archived_worlds_gb
+
+        archived_worlds_list = QListWidget()
+        archived_worlds_list.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        archived_worlds_list.itemSelectionChanged.connect(self.archived_worlds_selection_changed)
+        archived_worlds_list.itemDoubleClicked.connect(self.restore_world_clicked)
+        archived_worlds_layout.addWidget(archived_worlds_list, 0, 0, 1, 2)
+        self.archived_worlds_list = archived_worlds_list
+
+        restore_world_button = QPushButton()
+        restore_world_button.setEnabled(False)
+        restore_world_button.clicked.connect(self.restore_world_clicked)
+        archived_worlds_layout.addWidget(restore_world_button, 1, 0)
+        self.restore_world_button = restore_world_button
+
+        archive_worlds_button = QPushButton()
+        archive_worlds_button.setEnabled(False)
+        archive_worlds_button.clicked.connect(self.archive_worlds_clicked)
+        archived_worlds_layout.addWidget(archive_worlds_button, 1, 1)
+        self.archive_worlds_button = archive_worlds_button
+
+        acw_group = QWidget()
+        acw_group.setSizePolicy(QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Maximum)
+        acw_layout = QHBoxLayout()
+        acw_layout.setContentsMargins(0, 0, 0, 0)
+
+        archive_cold_worlds_cb = QCheckBox()
+        check_state = (Qt.CheckState.Checked if config_true(
+            get_config_value('archive_cold_worlds', 'False')) else Qt.CheckState.Unchecked)
+        archive_cold_worlds_cb.setCheckState(check_state)
+        archive_cold_worlds_cb.checkStateChanged.connect(self.acw_changed)
+        acw_layout.addWidget(archive_cold_worlds_cb)
+        self.archive_cold_worlds_cb = archive_cold_worlds_cb
+
+        cold_world_days_spinbox = QSpinBox()
+        cold_world_days_spinbox.setMinimum(1)
+        cold_world_days_spinbox.setMaximum(3650)
+        cold_world_days_spinbox.setValue(int(get_config_value('cold_world_days', '30')))
+        cold_world_days_spinbox.valueChanged.connect(self.cwds_changed)
+        acw_layout.addWidget(cold_world_days_spinbox)
+        self.cold_world_days_spinbox = cold_world_days_spinbox
+
+        cold_world_days_label = QLabel()
+        acw_layout.addWidget(cold_world_days_label)
+        self.cold_world_days_label = cold_world_days_label
+
+        acw_group.setLayout(acw_layout)
+        archived_worlds_layout.addWidget(acw_group, 2, 0, 1, 2)
+        self.acw_group = acw_group
+        self.acw_layout = acw_layout
+
+        self.archiving_worlds = False
+        self.archive_worlds_thread = None
+
+        remote_backups_gb = QGroupBox()
+        remote_backups_layout = QGridLayout()
+        remote_backups_gb.setLayout(remote_backups_layout)
+        self.remote_backups_layout = remote_backups_layout
+        self.remote_backups_gb = remote_backups_gb
+
+        remote_backups_cb = QCheckBox()
+        check_state = (Qt.CheckState.Checked if config_true(
+            get_config_value('remote_backups', 'False')) else Qt.CheckState.Unchecked)
+        remote_backups_cb.setCheckState(check_state)
+        remote_backups_cb.checkStateChanged.connect(self.rb_changed)
+        remote_backups_layout.addWidget(remote_backups_cb, 0, 0, 1, 4)
+        self.remote_backups_cb = remote_backups_cb
+
+        remote_endpoint_label = QLabel()
+        remote_backups_layout.addWidget(remote_endpoint_label, 1, 0)
+        self.remote_endpoint_label = remote_endpoint_label
+
+        remote_endpoint_edit = QLineEdit()
+        remote_endpoint_edit.setText(get_config_value('remote_endpoint', ''))
+        remote_endpoint_edit.editingFinished.connect(self.re_changed)
+        remote_backups_layout.addWidget(remote_endpoint_edit, 1, 1)
+        self.remote_endpoint_edit = remote_endpoint_edit
+
+        remote_bucket_label = QLabel()
+        remote_backups_layout.addWidget(remote_bucket_label, 1, 2)
+        self.remote_bucket_label = remote_bucket_label
+
+        remote_bucket_edit = QLineEdit()
+        remote_bucket_edit.setText(get_config_value('remote_bucket', ''))
+        remote_bucket_edit.editingFinished.connect(self.rbk_changed)
+        remote_backups_layout.addWidget(remote_bucket_edit, 1, 3)
+        self.remote_bucket_edit = remote_bucket_edit
+
+        remote_access_key_label = QLabel()
+        remote_backups_layout.addWidget(remote_access_key_label, 2, 0)
+        self.remote_access_key_label = remote_access_key_label
+
+        remote_access_key_edit = QLineEdit()
+        remote_access_key_edit.setText(get_config_value('remote_access_key', ''))
+        remote_access_key_edit.editingFinished.connect(self.rak_changed)
+        remote_backups_layout.addWidget(remote_access_key_edit, 2, 1)
+        self.remote_access_key_edit = remote_access_key_edit
+
+        remote_secret_key_label = QLabel()
+        remote_backups_layout.addWidget(remote_secret_key_label, 2, 2)
+        self.remote_secret_key_label = remote_secret_key_label
+
+        remote_secret_key_edit = QLineEdit()
+        remote_secret_key_edit.setEchoMode(QLineEdit.EchoMode.Password)
+        remote_secret_key_edit.setText(self.remote_secret_key())
+        remote_secret_key_edit.editingFinished.connect(self.rsk_changed)
+        remote_backups_layout.addWidget(remote_secret_key_edit, 2, 3)
+        self.remote_secret_key_edit = remote_secret_key_edit
+
+        remote_region_label = QLabel()
+        remote_backups_layout.addWidget(remote_region_label, 3, 0)
+        self.remote_region_label = remote_region_label
+
+        remote_region_edit = QLineEdit()
+        remote_region_edit.setText(get_config_value('remote_region', 'us-east-1'))
+        remote_region_edit.editingFinished.connect(self.rr_changed)
+        remote_backups_layout.addWidget(remote_region_edit, 3, 1)
+        self.remote_region_edit = remote_region_edit
+
+        remote_prefix_label = QLabel()
+        remote_backups_layout.addWidget(remote_prefix_label, 3, 2)
+        self.remote_prefix_label = remote_prefix_label
+
+        remote_prefix_edit = QLineEdit()
+        remote_prefix_edit.setText(get_config_value('remote_prefix', ''))
+        remote_prefix_edit.editingFinished.connect(self.rp_changed)
+        remote_backups_layout.addWidget(remote_prefix_edit, 3, 3)
+        self.remote_prefix_edit = remote_prefix_edit
+
+        mirror_backups_button = QPushButton()
+        mirror_backups_button.clicked.connect(self.mirror_backups_clicked)
+        remote_backups_layout.addWidget(mirror_backups_button, 4, 0, 1, 2)
+        self.mirror_backups_button = mirror_backups_button
+
+        self.mirror_thread = None
+        self.mirror_requested = False
+
         layout = QGridLayout()
         layout.addWidget(current_backups_gb, 0, 0, 1, 2)
         layout.addWidget(manual_backups_gb, 1, 0)
         layout.addWidget(automatic_backups_gb, 1, 1)
+        layout.addWidget(archived_worlds_gb, 2, 0, 1, 2)
+        layout.addWidget(remote_backups_gb, 3, 0, 1, 2)
         self.setLayout(layout)
 
         self.set_text()
@@ -193,15 +553,32 @@ class BackupsTab(QTabWidget):
         self.automatic_backups_gb.setTitle(_('Automatic backups'))
 
         self.restore_button.setText(_('Restore backup'))
+        self.restore_backup_world_button.setText(_('Restore a world'))
+        self.browse_backup_button.setText(_('Browse backup'))
         self.refresh_list_button.setText(_('Refresh list'))
         self.delete_button.setText(_('Delete backup'))
         self.do_not_backup_previous_cb.setText(_('Do not backup the current '
                                                  'saves before restoring a backup'))
-        self.backups_table.setHorizontalHeaderLabels((_('Name'), _('Modified'), _('Worlds'), _('Characters'),
+        self.compression_label.setText(_('Backup compression:'))
+        codec_names = {
+            'stored': _('None (fastest)'),
+            'deflate': _('Deflate'),
+            'bzip2': _('Bzip2'),
+            'lzma': _('LZMA (smallest, slowest)'),
+            'zstd': _('Zstandard (.tar.zst)')
+        }
+        for index in range(self.codec_combo.count()):
+            self.codec_combo.setItemText(index, codec_names[self.codec_combo.itemData(index)])
+        self.codec_combo.setToolTip(_('Files which are already compressed are '
+                                      'always stored as is'))
+        self.compression_level_label.setText(_('Level:'))
+        self.backups_model.set_headers((_('Name'), _('Modified'), _('Worlds'), _('Characters'),
                                                       _('Actual size'), _('Compressed size'), _('Compression ratio'),
-                                                      _('Modified date')))
+                                                      _('Modified date'), _('Based on'), _('Build')))
 
         self.name_label.setText(_('Name:'))
+        self.backup_worlds_label.setText(_('Worlds:'))
+        self.update_backup_worlds()
         self.backup_current_button.setText(_('Backup current saves'))
 
         self.backup_on_launch_cb.setText(_('Backup saves before game launch'))
@@ -214,6 +591,68 @@ class BackupsTab(QTabWidget):
 
         self.max_auto_backups_label.setText(_('Maximum automatic backups '
                                               'count:'))
+        self.max_auto_backups_size_label.setText(_('size (MiB):'))
+        self.max_auto_backups_size_spinbox.setSpecialValueText(_('Unlimited'))
+        self.mab_group.setToolTip(_('The oldest automatic backups are '
+                                    'deleted to stay within these limits. The most recent one is '
+                                    'always kept.'))
+        self.keep_auto_backups_label.setText(_('Also keep the last '
+                                               'automatic backup of the last'))
+        self.keep_hourly_backups_label.setText(_('hours,'))
+        self.keep_daily_backups_label.setText(_('days and'))
+        self.keep_weekly_backups_label.setText(_('weeks'))
+        self.kab_group.setToolTip(_('Only the hours, days and weeks with '
+                                    'automatic backups are counted. The maximum size still applies to '
+                                    'these backups.'))
+        self.incremental_backups_cb.setText(_('Only store the files changed '
+                                              'since the previous backup'))
+        self.incremental_backups_cb.setToolTip(_('Incremental backups need '
+                                                 'the backups they are based on to be restored. Those are kept '
+                                                 'until no other backup depends on them.'))
+        self.deduplicated_backups_cb.setText(_('Store backups in a '
+                                               'deduplicated repository'))
+        self.deduplicated_backups_cb.setToolTip(_('Backups share the '
+                                                  'parts of the saves they have in common, so the space used grows '
+                                                  'with what changed between backups instead of with the number of '
+                                                  'backups. Those backups can only be restored by the launcher.'))
+
+        self.archived_worlds_gb.setTitle(_('Archived worlds'))
+        self.restore_world_button.setText(_('Restore world'))
+        self.archive_worlds_button.setText(_('Archive cold worlds now'))
+        self.capture_backups_cb.setText(_('Capture the saves instantly before '
+                                          'launching the game or restoring a backup'))
+        self.capture_backups_cb.setToolTip(_('The saves are captured as hard '
+                                             'links, which is almost instant, and compressed in a backup afterwards '
+                                             'in the background. This needs the backups to be on the same drive as '
+                                             'the saves.'))
+        self.backup_during_game_cb.setText(_('While the game is running, '
+                                             'backup the changed saves every'))
+        self.backup_during_game_label.setText(_('minutes'))
+        self.bdg_group.setToolTip(_('These backups run with a low priority '
+                                    'once the game is done saving, so they do not slow down the game.'))
+        self.archive_cold_worlds_cb.setText(_('After the game ends, archive '
+                                              'worlds not played for'))
+        self.cold_world_days_label.setText(_('days'))
+        self.archived_worlds_gb.setToolTip(_('Archived worlds are compressed '
+                                             'outside of the save directory. They do not slow down '
+                                             'scans, backups and updates but they cannot be played '
+                                             'until they are restored.'))
+
+        self.remote_backups_gb.setTitle(_('Remote backups'))
+        self.remote_backups_cb.setText(_('Upload the backups to an S3 '
+                                         'compatible storage once they are made'))
+        self.remote_backups_cb.setToolTip(_('The retention policy of the '
+                                            'automatic backups also applies to the uploaded backups.'))
+        self.remote_endpoint_label.setText(_('Endpoint:'))
+        self.remote_endpoint_edit.setPlaceholderText('https://s3.example.com')
+        self.remote_bucket_label.setText(_('Bucket:'))
+        self.remote_access_key_label.setText(_('Access key:'))
+        self.remote_secret_key_label.setText(_('Secret key:'))
+        self.remote_secret_key_edit.setToolTip(_('The secret key is stored encrypted '
+            'for your Windows user account'))
+        self.remote_region_label.setText(_('Region:'))
+        self.remote_prefix_label.setText(_('Folder:'))
+        self.mirror_backups_button.setText(_('Upload backups now'))
 
     def get_main_window(self):
         return self.parentWidget().parentWidget().parentWidget()
@@ -233,29 +672,46 @@ class BackupsTab(QTabWidget):
     def disable_tab(self):
         self.backups_table.setEnabled(False)
         self.restore_button.setEnabled(False)
+        self.restore_backup_world_button.setEnabled(False)
+        self.browse_backup_button.setEnabled(False)
         self.refresh_list_button.setEnabled(False)
         self.delete_button.setEnabled(False)
 
         self.backup_current_button.setEnabled(False)
+        self.backup_worlds_combo.setEnabled(False)
+
+        self.archived_worlds_list.setEnabled(False)
+        self.restore_world_button.setEnabled(False)
+        self.archive_worlds_button.setEnabled(False)
 
     def enable_tab(self):
         self.backups_table.setEnabled(True)
 
+        self.archived_worlds_list.setEnabled(True)
+        if not self.archiving_worlds:
+            self.restore_world_button.setEnabled(
+                len(self.archived_worlds_list.selectedItems()) > 0)
+            self.archive_worlds_button.setEnabled(self.game_dir is not None
+                and os.path.isdir(self.get_save_dir()))
+
         if (self.game_dir is not None and os.path.isdir(os.path.join(self.game_dir, 'save_backups'))):
             self.refresh_list_button.setEnabled(True)
 
         if (self.game_dir is not None and os.path.isdir(os.path.join(self.game_dir, 'save'))):
             self.backup_current_button.setEnabled(True)
+        self.backup_worlds_combo.setEnabled(True)
 
         selection_model = self.backups_table.selectionModel()
         if not (selection_model is None or not selection_model.hasSelection()):
             self.restore_button.setEnabled(True)
+            self.restore_backup_world_button.setEnabled(True)
+            self.browse_backup_button.setEnabled(True)
             self.delete_button.setEnabled(True)
 
     def save_geometry(self):
         columns_width = []
 
-        for index in range(self.backups_table.columnCount()):
+        for index in range(self.backups_model.columnCount()):
             columns_width.append(self.backups_table.columnWidth(index))
 
         set_config_value('backups_columns_width', json.dumps(columns_width))
@@ -263,6 +719,18 @@ class BackupsTab(QTabWidget):
     def mabs_changed(self, value):
         set_config_value('max_auto_backups', value)
 
+    def mabss_changed(self, value):
+        set_config_value('max_auto_backups_size', value)
+
+    def kahb_changed(self, value):
+        set_config_value('keep_hourly_auto_backups', value)
+
+    def kadb_changed(self, value):
+        set_config_value('keep_daily_auto_backups', value)
+
+    def kawb_changed(self, value):
+        set_config_value('keep_weekly_auto_backups', value)
+
     def dnbp_changed(self, state):
         set_config_value('do_not_backup_previous', str(state != Qt.CheckState.Unchecked))
 
@@ -284,44 +752,589 @@ class BackupsTab(QTabWidget):
     def bbu_changed(self, state):
         set_config_value('backup_before_update', str(state != Qt.CheckState.Unchecked))
 
-    def restore_button_clicked(self):
-        class WaitingThread(QThread):
-            completed = Signal()
+    def codec_changed(self, index):
+        codec = self.codec_combo.itemData(index)
+        set_config_value('backup_codec', codec)
+
+        # Each codec starts at its own default level
+        level = codec_level(codec, None)
+        if level is not None:
+            set_config_value('backup_compression_level', str(level))
+        self.update_compression_level()
+
+    def cls_changed(self, value):
+        if self.compression_level_spinbox.isEnabled():
+            set_config_value('backup_compression_level', str(value))
+
+    def update_compression_level(self):
+        codec = self.codec_combo.currentData()
+        level = get_config_value('backup_compression_level')
+        level = codec_level(codec, int(level) if level is not None else None)
+
+        spinbox = self.compression_level_spinbox
+        spinbox.blockSignals(True)
+        if level is None:
+            spinbox.setEnabled(False)
+            spinbox.setRange(0, 0)
+        else:
+            minimum, maximum, default = cons.BACKUP_CODEC_LEVELS[codec]
+            spinbox.setEnabled(True)
+            spinbox.setRange(minimum, maximum)
+            spinbox.setValue(level)
+        spinbox.blockSignals(False)
+
+    def ib_changed(self, state):
+        set_config_value('incremental_backups', str(state != Qt.CheckState.Unchecked))
+
+    def db_changed(self, state):
+        set_config_value('deduplicated_backups', str(state != Qt.CheckState.Unchecked))
+
+    def cb_changed(self, state):
+        set_config_value('capture_backups', str(state != Qt.CheckState.Unchecked))
+
+    def capture_saves(self, name, single=False, compress=True, skip_unchanged=False):
+        '''
+        Capture the saves to compress them in a backup later, right away
+        unless compress is False. Returns False when a regular backup has to
+        be made instead.
+        '''
+        if (not config_true(get_config_value('capture_backups', 'False'))
+                or self.game_dir is None):
+            return False
 
-            def __init__(self, wthread, parent):
-                super(WaitingThread, self).__init__(parent)
+        save_dir = self.get_save_dir()
+        backup_dir = self.get_backup_dir()
+        if not os.path.isdir(save_dir) or backup_dir == '':
+            return False
 
-                self.wthread = wthread
+        try:
+            capture_dir = capture_saves(save_dir, self.game_dir, backup_dir, name, single, skip_unchanged)
+        except OSError as e:
+            logger.warning('Could not capture the saves, making a regular backup: {0}'.format(e))
+            return False
+
+        if capture_dir is None:
+            return False
+
+        if compress:
+            self.compress_pending_backups()
+
+        return True
+
+    def compress_pending_backups(self):
+        if (self.game_dir is None or self.backup_compressing or self.extracting_backup):
+            return
+
+        backup_dir = self.get_backup_dir()
+        if backup_dir == '':
+            return
+
+        pending = list_pending_backups(backup_dir)
+        if len(pending) == 0:
+            return
+
+        capture_dir, info = pending[0]
+        self.backup_saves(info['name'], info['single'], background=True,
+                          capture=(capture_dir, info['save_path']),
+                          skip_unchanged=info.get('skip_unchanged', False))
+
+    def bdg_changed(self, state):
+        set_config_value('backup_during_game', str(state != Qt.CheckState.Unchecked))
+
+        if state == Qt.CheckState.Unchecked:
+            self.background_backup_timer.stop()
+
+    def bdgs_changed(self, value):
+        set_config_value('backup_during_game_interval', value)
+
+    def saves_changed(self):
+        '''
+        Called when the game changed the saves while running. The backup
+        starts once the game stopped writing for a while, and no sooner than
+        the interval after the previous one.
+        '''
+        if not config_true(get_config_value('backup_during_game', 'False')):
+            return
+
+        self.background_backup_timer.start(cons.BACKGROUND_BACKUP_DELAY)
+
+    def background_backup_timeout(self):
+        if (not config_true(get_config_value('backup_during_game', 'False'))
+                or not self.get_main_tab().game_dir_group_box.game_started):
+            return
+
+        if self.backup_compressing or self.extracting_backup:
+            self.background_backup_timer.start(cons.BACKGROUND_BACKUP_DELAY)
+            return
+
+        if self.last_background_backup is not None:
+            interval = int(get_config_value('backup_during_game_interval', '15')) * 60
+            remaining = interval - (time.monotonic() - self.last_background_backup)
+            if remaining > 0:
+                self.background_backup_timer.start(int(remaining * 1000))
+                return
+
+        self.last_background_backup = time.monotonic()
+
+        self.prune_auto_backups()
+
+        name = '{auto}_{name}'.format(auto=_('auto'), name=_('during_game'))
+
+        self.backup_saves(name, background=True, skip_unchanged=True)
+
+    def stop_background_backups(self, wait=False):
+        self.background_backup_timer.stop()
+        self.last_background_backup = None
+
+        # The backups after the game ends take over. Captured saves are not
+        # changing anymore, those can finish.
+        if (self.background_backup and self.compress_thread is not None
+                and (self.capture is None or wait)):
+            self.compress_thread.requestInterruption()
+
+            # When closing the launcher, there is no event loop left to clean
+            # up after the thread. Captures are compressed again next time.
+            if wait:
+                self.compress_thread.wait()
+                if self.compress_thread.written or self.compress_thread.unchanged:
+                    # The backup finished before noticing the interruption
+                    if self.capture is not None:
+                        remove_pending_backup(self.capture[0])
+                else:
+                    delete_path(self.backup_path)
+
+    def verify_backups(self):
+        '''
+        Verify the backups which were not verified since they were written.
+        Backups are read with a low priority while nothing else uses them.
+        '''
+        if (self.game_dir is None or self.verify_thread is not None
+                or self.backup_compressing or self.extracting_backup):
+            return
+
+        backup_dir = self.get_backup_dir()
+        if not os.path.isdir(backup_dir):
+            return
+
+        # Most recent first, those are the most likely to be restored
+        backup_infos = get_backup_infos(backup_dir)
+        backup_paths = sorted((path for path, info in backup_infos.items() if info['verified'] is None),
+                              key=lambda path: backup_infos[path]['modified_on'], reverse=True)
+        if len(backup_paths) == 0:
+            return
+
+        class VerifyThread(QThread):
+            verified = Signal(str, bool)
+
+            def __init__(self, backup_paths, backup_infos, parent):
+                super(VerifyThread, self).__init__(parent)
+
+                self.backup_paths = backup_paths
+                self.backup_infos = backup_infos
 
             def run(self):
-                self.wthread.wait()
-                self.completed.emit()
+                set_thread_background_mode()
 
-        if self.backup_searching:
-            if (self.compressing_timer is not None and self.compressing_timer.isActive()):
-                self.compressing_timer.stop()
+                def verified(path, result):
+                    # Unreadable backups which are gone were deleted meanwhile
+                    if result is None or (not result and not os.path.isfile(path)):
+                        return
 
-            self.backup_searching = False
+                    set_backup_verification(path, self.backup_infos[path]['modified_on'], result, time.time())
+                    self.verified.emit(path, result)
 
-            self.finish_backup_saves()
+                verify_backups(self.backup_paths, verified, self.isInterruptionRequested,
+                               set_thread_background_mode)
+
+        def verified(path, result):
+            self.backups_model.set_verified(path, result)
+
+        def finished():
+            if self.verify_thread is verify_thread:
+                self.verify_thread = None
+
+        verify_thread = VerifyThread(backup_paths, backup_infos, self)
+        verify_thread.verified.connect(verified)
+        verify_thread.finished.connect(finished)
+        verify_thread.finished.connect(verify_thread.deleteLater)
+        self.verify_thread = verify_thread
+
+        verify_thread.start()
+
+    def stop_verifying_backups(self):
+        '''
+        Stop the verification and wait for it. The thread still writes
+        verification results until it is over, the backups it reads cannot
+        be changed before.
+        '''
+        if self.verify_thread is None:
+            return
+
+        self.verify_thread.requestInterruption()
+        self.verify_thread.wait()
+        self.verify_thread = None
 
+    def rb_changed(self, state):
+        set_config_value('remote_backups', str(state != Qt.CheckState.Unchecked))
+
+        if state != Qt.CheckState.Unchecked:
+            self.mirror_backups()
+        else:
+            self.stop_mirroring_backups()
+
+    def re_changed(self):
+        set_config_value('remote_endpoint', self.remote_endpoint_edit.text().strip())
+
+    def rbk_changed(self):
+        set_config_value('remote_bucket', self.remote_bucket_edit.text().strip())
+
+    def rak_changed(self):
+        set_config_value('remote_access_key', self.remote_access_key_edit.text().strip())
+
+    def rsk_changed(self):
+        secret_key = self.remote_secret_key_edit.text().strip()
+        if secret_key != '':
+            secret_key = protect_string(secret_key)
+        set_config_value('remote_protected_secret_key', secret_key)
+
+    def remote_secret_key(self):
+        '''
+        The secret key is only stored encrypted for the current user. Keys
+        stored in plain text by previous versions are encrypted on first use.
+        '''
+        secret_key = get_config_value('remote_secret_key', '')
+        if secret_key != '':
+            set_config_value('remote_protected_secret_key', protect_string(secret_key))
+            set_config_value('remote_secret_key', '')
+            return secret_key
+
+        protected_key = get_config_value('remote_protected_secret_key', '')
+        if protected_key == '':
+            return ''
+
+        secret_key = unprotect_string(protected_key)
+        if secret_key is None:
+            logger.warning('Could not decrypt the remote backups secret key')
+            return ''
+        return secret_key
+
+    def rr_changed(self):
+        set_config_value('remote_region', self.remote_region_edit.text().strip())
+
+    def rp_changed(self):
+        set_config_value('remote_prefix', self.remote_prefix_edit.text().strip().strip('/'))
+
+    def mirror_backups_clicked(self):
+        if not self.mirror_backups(True):
             main_window = self.get_main_window()
             status_bar = main_window.statusBar()
 
-            status_bar.showMessage(_('Restore backup cancelled'))
+            status_bar.showMessage(_('Could not upload the backups, check the '
+                                     'remote backups settings'))
+
+    def mirror_backups(self, manual=False):
+        '''
+        Upload the backups missing from the remote storage and apply the
+        retention policy there. Returns False when remote backups are not
+        set up. Unless manual, nothing is uploaded when they are disabled.
+        '''
+        if (self.game_dir is None or self.backup_compressing or self.extracting_backup):
+            return True
+        if self.mirror_thread is not None:
+            # Upload the backups made meanwhile once it is done
+            self.mirror_requested = True
+            return True
+        self.mirror_requested = False
+
+        if not manual and not config_true(get_config_value('remote_backups', 'False')):
+            return True
+
+        endpoint = get_config_value('remote_endpoint', '')
+        bucket = get_config_value('remote_bucket', '')
+        if endpoint == '' or bucket == '':
+            return False
 
-            self.restore_button.setText(_('Restore backup'))
+        backup_dir = self.get_backup_dir()
+        if not os.path.isdir(backup_dir):
+            return True
+
+        client = S3Client(endpoint, bucket, get_config_value('remote_access_key', ''),
+                          self.remote_secret_key(),
+                          get_config_value('remote_region', 'us-east-1'))
+        prefix = get_config_value('remote_prefix', '')
+        if prefix != '':
+            prefix += '/'
+
+        class MirrorThread(QThread):
+            progressed = Signal(str, float, float)
+            completed = Signal(bool, str)
+
+            def __init__(self, client, backup_dir, prefix, auto_prefix, policy, parent):
+                super(MirrorThread, self).__init__(parent)
+
+                self.client = client
+                self.backup_dir = backup_dir
+                self.prefix = prefix
+                self.auto_prefix = auto_prefix
+                self.policy = policy
+
+            def run(self):
+                def progress(filename, size, total_size):
+                    self.progressed.emit(filename, size, total_size)
+
+                error = ''
+                try:
+                    mirrored = mirror_backups(self.client, self.backup_dir, self.prefix, self.auto_prefix,
+                                              self.policy, progress, self.isInterruptionRequested)
+                except (S3Error, OSError) as e:
+                    logger.warning('Could not upload the backups: {0}'.format(e))
+                    mirrored = False
+                    error = str(e)
+                finally:
+                    self.client.close()
+
+                self.completed.emit(mirrored, error)
+
+        def progressed(filename, size, total_size):
+            main_window = self.get_main_window()
+            status_bar = main_window.statusBar()
+
+            # Other operations have the status bar
+            if status_bar.busy > 0:
+                return
+
+            status_bar.showMessage(_('Uploading {filename} ({uploaded}/{total})').format(
+                filename=filename, uploaded=sizeof_fmt(size), total=sizeof_fmt(total_size)))
+
+        def completed(mirrored, error):
+            main_window = self.get_main_window()
+            status_bar = main_window.statusBar()
+
+            if error != '':
+                status_bar.showMessage(_('Could not upload the backups: {error}').format(error=error))
+            elif mirrored and manual:
+                status_bar.showMessage(_('Backups uploaded'))
+
+        def finished():
+            if self.mirror_thread is mirror_thread:
+                self.mirror_thread = None
+                self.mirror_backups_button.setEnabled(True)
+
+                if self.mirror_requested:
+                    self.mirror_backups()
+
+        mirror_thread = MirrorThread(client, backup_dir, prefix, _('auto') + '_', self.auto_backups_policy(),
+                                     self)
+        mirror_thread.progressed.connect(progressed)
+        mirror_thread.completed.connect(completed)
+        mirror_thread.finished.connect(finished)
+        mirror_thread.finished.connect(mirror_thread.deleteLater)
+        self.mirror_thread = mirror_thread
+        self.mirror_backups_button.setEnabled(False)
+
+        mirror_thread.start()
+
+        return True
+
+    def stop_mirroring_backups(self, wait=False):
+        if self.mirror_thread is None:
+            return
+
+        # Uploads resume from the parts already sent. The thread is only
+        # forgotten once finished so that two of them never upload at once.
+        self.mirror_requested = False
+        self.mirror_thread.requestInterruption()
+        if wait:
+            self.mirror_thread.wait()
+            self.mirror_thread = None
+            self.mirror_backups_button.setEnabled(True)
+
+    def acw_changed(self, state):
+        set_config_value('archive_cold_worlds', str(state != Qt.CheckState.Unchecked))
+
+    def cwds_changed(self, value):
+        set_config_value('cold_world_days', value)
+
+    def archived_worlds_selection_changed(self):
+        self.restore_world_button.setEnabled(not self.archiving_worlds
+            and len(self.archived_worlds_list.selectedItems()) > 0)
+
+    def update_archived_worlds(self):
+        self.archived_worlds_list.clear()
+        self.restore_world_button.setEnabled(False)
+
+        if self.game_dir is None:
+            self.archive_worlds_button.setEnabled(False)
+            return
+
+        save_dir = self.get_save_dir()
+        self.archive_worlds_button.setEnabled(not self.archiving_worlds
+            and os.path.isdir(save_dir))
+
+        for world_name in list_archived_worlds(save_dir):
+            self.archived_worlds_list.addItem(world_name)
+
+        # Archiving and restoring worlds changes the worlds to backup
+        self.update_backup_worlds()
+
+    def update_backup_worlds(self):
+        selected_world = self.backup_worlds_combo.currentData()
+
+        self.backup_worlds_combo.clear()
+        self.backup_worlds_combo.addItem(_('All worlds'), None)
+
+        if self.game_dir is not None:
+            for world_dir in sorted(list_world_dirs(self.get_save_dir())):
+                world_name = os.path.basename(world_dir)
+                self.backup_worlds_combo.addItem(world_name, world_name)
+
+        self.backup_worlds_combo.setCurrentIndex(max(self.backup_worlds_combo.findData(selected_world), 0))
+
+    def archive_worlds_clicked(self):
+        self.archive_cold_worlds()
+
+    def archive_cold_worlds(self, after_archive=None):
+        if self.archiving_worlds or self.game_dir is None:
+            if after_archive is not None:
+                after_archive()
+            return
+
+        class ArchiveWorldsThread(QThread):
+            completed = Signal(list)
+
+            def __init__(self, save_dir, max_age, parent):
+                super(ArchiveWorldsThread, self).__init__(parent)
+
+                self.save_dir = save_dir
+                self.max_age = max_age
+
+            def run(self):
+                archived_worlds = []
+                for world_dir in find_cold_worlds(self.save_dir, self.max_age):
+                    try:
+                        archive_world(world_dir)
+                        archived_worlds.append(os.path.basename(world_dir))
+                    except (OSError, zipfile.BadZipFile):
+                        logger.exception('Could not archive world %s', world_dir)
+                self.completed.emit(archived_worlds)
+
+        main_window = self.get_main_window()
+        status_bar = main_window.statusBar()
+        status_bar.showMessage(_('Archiving cold worlds...'))
+
+        self.archiving_worlds = True
+        self.archive_worlds_button.setEnabled(False)
+        self.restore_world_button.setEnabled(False)
+
+        def completed(archived_worlds):
+            self.archiving_worlds = False
+            self.archive_worlds_thread = None
+
+            status_bar.showMessage(ngettext('{count} world archived',
+                '{count} worlds archived', len(archived_worlds)).format(
+                count=len(archived_worlds)))
 
-        elif self.backup_compressing:
+            self.update_archived_worlds()
+            if len(archived_worlds) > 0:
+                self.get_main_tab().game_dir_group_box.update_saves()
+
+            if after_archive is not None:
+                after_archive()
+
+        max_age = self.cold_world_days_spinbox.value() * 24 * 60 * 60
+
+        archive_worlds_thread = ArchiveWorldsThread(self.get_save_dir(), max_age, self)
+        archive_worlds_thread.completed.connect(completed)
+        archive_worlds_thread.finished.connect(archive_worlds_thread.deleteLater)
+        self.archive_worlds_thread = archive_worlds_thread
+
+        archive_worlds_thread.start()
+
+    def restore_world_clicked(self):
+        selected_items = self.archived_worlds_list.selectedItems()
+        if self.archiving_worlds or len(selected_items) == 0:
+            return
+
+        world_name = selected_items[0].text()
+        save_dir = self.get_save_dir()
+
+        if os.path.exists(os.path.join(save_dir, world_name)):
+            status_bar = self.get_main_window().statusBar()
+            status_bar.showMessage(_('A world named {name} already exists in '
+                'the save directory').format(name=world_name))
+            return
+
+        class RestoreWorldThread(QThread):
+            completed = Signal(bool)
+
+            def __init__(self, save_dir, world_name, parent):
+                super(RestoreWorldThread, self).__init__(parent)
+
+                self.save_dir = save_dir
+                self.world_name = world_name
+
+            def run(self):
+                try:
+                    restore_world(self.save_dir, self.world_name)
+                except (OSError, zipfile.BadZipFile):
+                    logger.exception('Could not restore world %s', self.world_name)
+                    self.completed.emit(False)
+                    return
+                self.completed.emit(True)
+
+        main_window = self.get_main_window()
+        status_bar = main_window.statusBar()
+        status_bar.showMessage(_('Restoring world {name}...').format(name=world_name))
+
+        self.archiving_worlds = True
+        self.archive_worlds_button.setEnabled(False)
+        self.restore_world_button.setEnabled(False)
+
+        def completed(restored):
+            self.archiving_worlds = False
+            self.archive_worlds_thread = None
+
+            if restored:
+                status_bar.showMessage(_('World {name} restored').format(name=world_name))
+            else:
+                status_bar.showMessage(_('Could not restore world {name}').format(name=world_name))
+
+            self.update_archived_worlds()
+            self.get_main_tab().game_dir_group_box.update_saves()
+
+        restore_world_thread = RestoreWorldThread(save_dir, world_name, self)
+        restore_world_thread.completed.connect(completed)
+        restore_world_thread.finished.connect(restore_world_thread.deleteLater)
+        self.archive_worlds_thread = restore_world_thread
+
+        restore_world_thread.start()
+
+    def restore_button_clicked(self):
+        class WaitingThread(QThread):
+            completed = Signal()
+
+            def __init__(self, wthread, parent):
+                super(WaitingThread, self).__init__(parent)
+
+                self.wthread = wthread
+
+            def run(self):
+                self.wthread.wait()
+                self.completed.emit()
+
+        if self.backup_compressing and not self.background_backup:
             if self.compress_thread is not None:
                 self.backup_current_button.setEnabled(False)
-                self.compress_thread.quit()
+                self.compress_thread.requestInterruption()
 
                 def completed():
                     self.finish_backup_saves()
                     delete_path(self.backup_path)
                     self.compress_thread = None
 
+                    if self.garbage_pending or is_snapshot(self.backup_path):
+                        self.collect_snapshot_garbage()
+
                 waiting_thread = WaitingThread(self.compress_thread, self)
                 waiting_thread.completed.connect(completed)
                 waiting_thread.finished.connect(waiting_thread.deleteLater)
@@ -334,6 +1347,8 @@ class BackupsTab(QTabWidget):
                 self.compress_thread = None
 
             self.backup_compressing = False
+            if self.compress_thread is None and self.garbage_pending:
+                self.collect_snapshot_garbage()
 
             main_window = self.get_main_window()
             status_bar = main_window.statusBar()
@@ -343,15 +1358,26 @@ class BackupsTab(QTabWidget):
             self.restore_button.setText(_('Restore backup'))
         elif self.extracting_backup:
             if self.extracting_thread is not None:
+                with self.extracting_thread.state_lock:
+                    applying_files = self.extracting_thread.applying_files
+                    if not applying_files:
+                        self.extracting_thread.requestInterruption()
                 self.restore_button.setEnabled(False)
-                self.extracting_thread.quit()
+                if applying_files:
+                    # The saves are being replaced, the restore completes on
+                    # its own
+                    return
 
                 def completed():
-                    save_dir = self.get_save_dir()
-                    delete_path(save_dir)
-                    if self.temp_save_dir is not None:
-                        retry_rename(self.temp_save_dir, save_dir)
-                    self.temp_save_dir = None
+                    # A differential restore has nothing to roll back, the
+                    # changed files are only moved to the saves once all of
+                    # them are extracted
+                    if not self.differential_restore:
+                        save_dir = self.get_save_dir()
+                        delete_path(save_dir)
+                        if self.temp_save_dir is not None:
+                            retry_rename(self.temp_save_dir, save_dir)
+                        self.temp_save_dir = None
 
                     self.finish_restore_backup()
                     self.extracting_thread = None
@@ -373,81 +1399,120 @@ class BackupsTab(QTabWidget):
 
             status_bar.showMessage(_('Restore backup cancelled'))
         else:
-            selection_model = self.backups_table.selectionModel()
-            if selection_model is None or not selection_model.hasSelection():
-                return
+            self.start_restore()
 
-            selected = selection_model.currentIndex()
-            table_item = self.backups_table.item(selected.row(), 0)
-            selected_info = self.backups[table_item]
+    def restore_backup_world_clicked(self):
+        selected_info = self.selected_backup()
+        if selected_info is None or not os.path.isfile(selected_info['path']):
+            return
 
-            if not os.path.isfile(selected_info['path']):
-                return
+        main_window = self.get_main_window()
+        status_bar = main_window.statusBar()
 
-            backup_previous = not config_true(get_config_value('do_not_backup_previous', 'False'))
+        try:
+            plan = restore_plan(selected_info['path'])
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            logger.warning('Could not read backup {0}: {1}'.format(selected_info['path'], e))
+            status_bar.showMessage(_('Could not find the backups this backup is based on'))
+            return
 
-            if backup_previous:
-                '''
-                If restoring the before_last_restore, we rename it to make sure
-                we make a proper backup first.
-                '''
-                model = selection_model.model()
-                backup_name = model.data(model.index(selected.row(), 0))
+        save_dir_name = os.path.basename(os.path.normpath(self.get_save_dir()))
+        worlds = backup_worlds(plan, save_dir_name)
+        if len(worlds) == 0:
+            status_bar.showMessage(_('This backup does not have any world'))
+            return
+
+        world, ok = QInputDialog.getItem(self, _('Restore a world'), _('World to restore from the '
+            '<strong>{backup_name}</strong> backup:').format(backup_name=html.escape(selected_info['name'])),
+            worlds, 0, False)
+        if not ok:
+            return
+
+        self.start_restore([world])
 
-                before_last_restore_name = _('before_last_restore')
+    def browse_backup_clicked(self):
+        selected_info = self.selected_backup()
+        if selected_info is None or not os.path.isfile(selected_info['path']):
+            return
 
-                if backup_name.lower() == before_last_restore_name.lower():
-                    backup_dir = self.get_backup_dir()
+        save_dir_name = os.path.basename(os.path.normpath(self.get_save_dir()))
 
-                    name_lower = backup_name.lower()
-                    name_key = alphanum_key(name_lower)
-                    max_counter = 1
+        browser_dialog = BackupBrowserDialog(selected_info, save_dir_name, self)
+        browser_dialog.exec()
+        browser_dialog.deleteLater()
 
-                    for entry in scandir(backup_dir):
-                        filename, ext = os.path.splitext(entry.name)
-                        if ext.lower() == '.zip':
-                            filename_lower = filename.lower()
+    def start_restore(self, worlds=None):
+        # Only the files of these worlds are restored, all of them when None
+        self.restore_worlds = worlds
 
-                            filename_key = alphanum_key(filename_lower)
+        selected_info = self.selected_backup()
+        if selected_info is None:
+            return
 
-                            counter = filename_key[-1:][0]
-                            if len(filename_key) > 1 and isinstance(counter, int):
-                                filename_key = filename_key[:-1]
+        if not os.path.isfile(selected_info['path']):
+            return
 
-                                if name_key == filename_key:
-                                    max_counter = max(max_counter, counter)
+        # Backups being read cannot be renamed or deleted, the verification
+        # and the uploads resume when the backups table is updated
+        self.stop_verifying_backups()
+        self.stop_mirroring_backups(True)
 
-                    new_backup_name = (before_last_restore_name + str(max_counter + 1))
-                    new_backup_path = os.path.join(backup_dir, new_backup_name + '.zip')
+        backup_previous = not config_true(get_config_value('do_not_backup_previous', 'False'))
 
-                    if not retry_rename(selected_info['path'], new_backup_path):
-                        return
+        if backup_previous:
+            '''
+            If restoring the before_last_restore, we rename it to make sure
+            we make a proper backup first. Incremental backups based on it
+            refer to it by name, it is kept as is when there are some and the
+            current saves are backed up under the next free name instead.
+            '''
+            backup_name = selected_info['name']
 
-                    selected_info['path'] = new_backup_path
+            before_last_restore_name = _('before_last_restore')
+            single = True
 
-                def next_step():
-                    self.restore_backup()
+            if (backup_name.lower() == before_last_restore_name.lower()
+                    and len(dependent_backups(selected_info['path'])) > 0):
+                single = False
+            elif backup_name.lower() == before_last_restore_name.lower():
+                backup_dir = self.get_backup_dir()
 
-                self.after_backup = next_step
+                backup_names = set(split_backup_name(os.path.basename(path))[0]
+                    for path in get_backup_infos(backup_dir))
+                backup_names.add(backup_name)
+                new_backup_name = next_backup_name(before_last_restore_name, backup_names)
+                backup_ext = split_backup_name(selected_info['path'])[1]
+                new_backup_path = os.path.join(backup_dir, new_backup_name + backup_ext)
 
-                self.backup_saves(before_last_restore_name, True)
+                if not retry_rename(selected_info['path'], new_backup_path):
+                    return
 
-                self.restore_button.setEnabled(True)
-                self.restore_button.setText(_('Cancel restore backup'))
-            else:
+                rename_backup_info(selected_info['path'], new_backup_path)
+                self.backups_model.rename_backup(selected_info['path'], new_backup_path,
+                    new_backup_name)
+
+            if self.capture_saves(before_last_restore_name, single):
+                self.restore_backup()
+                return
+
+            def next_step():
                 self.restore_backup()
 
+            self.after_backup = next_step
+
+            self.backup_saves(before_last_restore_name, single)
+
+            self.restore_button.setEnabled(True)
+            self.restore_button.setText(_('Cancel restore backup'))
+        else:
+            self.restore_backup()
+
     def restore_backup(self):
-        selection_model = self.backups_table.selectionModel()
-        if selection_model is None or not selection_model.hasSelection():
+        selected_info = self.selected_backup()
+        if selected_info is None:
             return
 
-        selected = selection_model.currentIndex()
-        table_item = self.backups_table.item(selected.row(), 0)
-        selected_info = self.backups[table_item]
-
-        model = selection_model.model()
-        backup_name = model.data(model.index(selected.row(), 0))
+        backup_name = selected_info['name']
 
         if not os.path.isfile(selected_info['path']):
             return
@@ -455,9 +1520,34 @@ class BackupsTab(QTabWidget):
         main_window = self.get_main_window()
         status_bar = main_window.statusBar()
 
+        try:
+            plan = restore_plan(selected_info['path'])
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            logger.warning('Could not restore backup {0}: {1}'.format(selected_info['path'], e))
+            status_bar.showMessage(_('Could not find the backups this backup is based on'))
+            return
+
         self.temp_save_dir = None
         save_dir = self.get_save_dir()
-        if os.path.isdir(save_dir):
+
+        roots = None
+        if self.restore_worlds is not None:
+            save_dir_name = os.path.basename(os.path.normpath(save_dir))
+            plan = world_restore_plan(plan, save_dir_name, self.restore_worlds)
+            roots = ['{0}/{1}'.format(save_dir_name, world) for world in self.restore_worlds]
+
+        # When the saves are there, only the files which differ from the
+        # backup are written and the others are left alone. Backup members
+        # are named relative to the game directory, the comparison needs the
+        # saves to be in it.
+        try:
+            in_game_dir = not os.path.relpath(save_dir, self.game_dir).startswith(os.pardir)
+        except ValueError:
+            # The saves are on another drive
+            in_game_dir = False
+        self.differential_restore = os.path.isdir(save_dir) and in_game_dir
+
+        if not self.differential_restore and os.path.exists(save_dir):
             temp_save_dir = os.path.join(self.game_dir, 'save-{0}'.format('%08x' % random.randrange(16 ** 8)))
             while os.path.exists(temp_save_dir):
                 temp_save_dir = os.path.join(self.game_dir, 'save-{0}'.format('%08x' % random.randrange(16 ** 8)))
@@ -466,10 +1556,6 @@ class BackupsTab(QTabWidget):
                 status_bar.showMessage(_('Could not rename the save directory'))
                 return
             self.temp_save_dir = temp_save_dir
-        elif os.path.isfile(save_dir):
-            if not delete_path(save_dir):
-                status_bar.showMessage(_('Could not remove the save file'))
-                return
 
         # Extract the backup archive
 
@@ -480,10 +1566,13 @@ class BackupsTab(QTabWidget):
         status_bar.clearMessage()
         status_bar.busy += 1
 
-        self.total_extract_size = selected_info['actual_size']
+        self.total_extract_size = sum(info.file_size for backup_path, infos in plan for info in infos)
 
         extracting_label = QLabel()
-        extracting_label.setText(_('Extracting backup'))
+        if self.differential_restore:
+            extracting_label.setText(_('Comparing the saves with the backup'))
+        else:
+            extracting_label.setText(_('Extracting backup'))
         status_bar.addWidget(extracting_label, 100)
         self.extracting_label = extracting_label
 
@@ -500,7 +1589,6 @@ class BackupsTab(QTabWidget):
         self.extracting_size_label = (extracting_size_label)
 
         progress_bar = QProgressBar()
-        self.filestep = 0
         self.scale_factor = max(0, int(self.total_extract_size.bit_length()) - 31)
         progress_bar.setRange(0, self.total_extract_size >> self.scale_factor)
         progress_bar.setValue(0)
@@ -523,74 +1611,160 @@ class BackupsTab(QTabWidget):
         self.restore_button.setText(_('Cancel restore backup'))
 
         class ExtractingThread(QThread):
-            completed = Signal()
+            progressed = Signal(float, int, str)
+            applying = Signal()
+            completed = Signal(bool)
 
-            def __init__(self, zfile, element, dir, parent):
+            def __init__(self, plan, dir, differential, roots, parent):
                 super(ExtractingThread, self).__init__(parent)
 
-                self.zfile = zfile
-                self.element = element
+                self.plan = plan
                 self.dir = dir
+                self.differential = differential
+                self.roots = roots
+                # Set when the saves were only partly replaced
+                self.inconsistent = False
+                self.unchanged_size = 0
+                self.unchanged_files = 0
+                # Cancelling is refused once the saves start changing
+                self.state_lock = threading.Lock()
+                self.applying_files = False
 
             def run(self):
-                self.zfile.extract(self.element, self.dir)
-                self.completed.emit()
+                def progress(size, files, filename):
+                    self.progressed.emit(self.unchanged_size + size, self.unchanged_files + files, filename or '')
 
-        def extract_next_file():
-            try:
-                if self.extracting_backup:
-                    extracting_element = self.extracting_infolist.popleft()
-                    self.extracting_label.setText(
-                        _('Extracting {filename}').format(filename=extracting_element.filename))
-                    self.next_extract_file = extracting_element
-
-                    extracting_thread = ExtractingThread(self.extracting_zipfile, extracting_element,
-                                                         self.extract_dir, self)
-                    extracting_thread.completed.connect(completed_extract)
-                    extracting_thread.finished.connect(extracting_thread.deleteLater)
-                    self.extracting_thread = extracting_thread
-
-                    extracting_thread.start()
-
-            except IndexError:
-                self.extracting_backup = False
-                self.extracting_thread = None
+                if self.differential:
+                    self.completed.emit(self.differential_restore(progress))
+                    return
 
-                self.finish_restore_backup()
+                try:
+                    extracted = extract_backup(self.plan, self.dir, progress, self.isInterruptionRequested)
+                except (OSError, KeyError, zipfile.BadZipFile):
+                    logger.exception('Could not extract backup to %s', self.dir)
+                    extracted = False
 
-                main_window = self.get_main_window()
-                status_bar = main_window.statusBar()
+                self.completed.emit(extracted)
 
-                status_bar.showMessage(_('{backup_name} backup restored').format(backup_name=backup_name))
+            def differential_restore(self, progress):
+                '''
+                Extract the files which differ from the backup in a staging
+                directory and only move them over the saves once all of them
+                are extracted. Until then, cancelling or failing leaves the
+                saves as they were.
+                '''
+                staging_dir = os.path.join(self.dir, cons.RESTORE_STAGING_DIR)
+                shutil.rmtree(staging_dir, ignore_errors=True)
+
+                try:
+                    diff = diff_restore_plan(self.plan, self.dir, self.isInterruptionRequested, self.roots)
+                    if diff is None:
+                        return False
+
+                    plan, extras, self.unchanged_size, self.unchanged_files = diff
+                    progress(0, 0, None)
+
+                    if not extract_backup(plan, staging_dir, progress, self.isInterruptionRequested):
+                        return False
+                except (OSError, KeyError, zipfile.BadZipFile):
+                    logger.exception('Could not extract backup to %s', staging_dir)
+                    shutil.rmtree(staging_dir, ignore_errors=True)
+                    return False
+
+                # The saves start changing, the restore cannot be cancelled
+                # anymore
+                with self.state_lock:
+                    if self.isInterruptionRequested():
+                        shutil.rmtree(staging_dir, ignore_errors=True)
+                        return False
+                    self.applying_files = True
+                self.applying.emit()
+                try:
+                    apply_staged_restore(staging_dir, self.dir, plan, extras, self.plan)
+                except OSError:
+                    logger.exception('Could not move the restored files to %s', self.dir)
+                    self.inconsistent = True
+                    return False
+                finally:
+                    shutil.rmtree(staging_dir, ignore_errors=True)
+
+                return True
+
+        def progressed(size, files, filename):
+            self.extract_size = int(size)
+            self.extract_files = files
 
-        def completed_extract():
-            self.extract_size += self.next_extract_file.file_size
+            if filename != '':
+                self.extracting_label.setText(_('Extracting {filename}').format(filename=filename))
 
-            self.filestep += 1
-            if self.filestep == 100:
-                self.filestep = 0
-                self.extracting_progress_bar.setValue(self.extract_size >> self.scale_factor)
+            self.extracting_progress_bar.setValue(self.extract_size >> self.scale_factor)
 
-                self.extracting_size_label.setText(
-                    '{bytes_read}/{total_bytes}'.format(bytes_read=sizeof_fmt(self.extract_size),
-                                                        total_bytes=sizeof_fmt(self.total_extract_size)))
+            self.extracting_size_label.setText(
+                '{bytes_read}/{total_bytes}'.format(bytes_read=sizeof_fmt(self.extract_size),
+                                                    total_bytes=sizeof_fmt(self.total_extract_size)))
 
-                delta_bytes = self.extract_size - self.last_extract_bytes
-                delta_time = datetime.utcnow() - self.last_extract
-                if delta_time.total_seconds() == 0:
-                    delta_time = timedelta.resolution
+            delta_bytes = self.extract_size - self.last_extract_bytes
+            delta_time = datetime.utcnow() - self.last_extract
+            if delta_time.total_seconds() == 0:
+                delta_time = timedelta.resolution
 
-                bytes_secs = delta_bytes / delta_time.total_seconds()
-                self.extracting_speed_label.setText(_('{bytes_sec}/s').format(bytes_sec=sizeof_fmt(bytes_secs)))
+            bytes_secs = delta_bytes / delta_time.total_seconds()
+            self.extracting_speed_label.setText(_('{bytes_sec}/s').format(bytes_sec=sizeof_fmt(bytes_secs)))
 
             self.last_extract_bytes = self.extract_size
             self.last_extract = datetime.utcnow()
 
-            extract_next_file()
+        def applying():
+            self.restore_button.setEnabled(False)
+            self.extracting_label.setText(_('Replacing the saves with the restored files'))
 
-        self.extracting_zipfile = zipfile.ZipFile(selected_info['path'])
-        self.extracting_infolist = deque(self.extracting_zipfile.infolist())
-        extract_next_file()
+        def completed(extracted):
+            if self.extracting_thread is not extracting_thread or not self.extracting_backup:
+                # The restore was cancelled
+                return
+
+            self.extracting_backup = False
+            self.extracting_thread = None
+
+            main_window = self.get_main_window()
+            status_bar = main_window.statusBar()
+
+            if not extracted:
+                if not self.differential_restore:
+                    save_dir = self.get_save_dir()
+                    delete_path(save_dir)
+                    if self.temp_save_dir is not None:
+                        retry_rename(self.temp_save_dir, save_dir)
+                    self.temp_save_dir = None
+
+                self.finish_restore_backup()
+
+                if extracting_thread.inconsistent:
+                    status_bar.showMessage(_('The {backup_name} backup was only partly restored, the saves are '
+                                             'inconsistent. Restore the backup again.').format(
+                        backup_name=backup_name))
+                else:
+                    status_bar.showMessage(_('Could not restore the {backup_name} backup').format(
+                        backup_name=backup_name))
+                return
+
+            self.finish_restore_backup()
+
+            if self.restore_worlds is not None:
+                status_bar.showMessage(_('{world_name} restored from the {backup_name} backup').format(
+                    world_name=', '.join(self.restore_worlds), backup_name=backup_name))
+            else:
+                status_bar.showMessage(_('{backup_name} backup restored').format(backup_name=backup_name))
+
+        # Incremental backups are restored from every backup of their chain
+        extracting_thread = ExtractingThread(plan, self.extract_dir, self.differential_restore, roots, self)
+        extracting_thread.progressed.connect(progressed)
+        extracting_thread.applying.connect(applying)
+        extracting_thread.completed.connect(completed)
+        extracting_thread.finished.connect(extracting_thread.deleteLater)
+        self.extracting_thread = extracting_thread
+
+        extracting_thread.start()
 
     def finish_restore_backup(self):
         main_window = self.get_main_window()
@@ -605,9 +1779,6 @@ class BackupsTab(QTabWidget):
 
         self.extracting_backup = False
 
-        if self.extracting_zipfile is not None:
-            self.extracting_zipfile.close()
-
         if self.temp_save_dir is not None:
             delete_path(self.temp_save_dir)
 
@@ -621,21 +1792,40 @@ class BackupsTab(QTabWidget):
 
         self.get_main_tab().game_dir_group_box.update_saves()
 
+        self.compress_pending_backups()
+
     def refresh_list_button_clicked(self):
         self.update_backups_table()
 
     def delete_button_clicked(self):
-        selection_model = self.backups_table.selectionModel()
-        if selection_model is None or not selection_model.hasSelection():
+        selected_info = self.selected_backup()
+        if selected_info is None:
             return
 
-        selected = selection_model.currentIndex()
-        table_item = self.backups_table.item(selected.row(), 0)
-        selected_info = self.backups[table_item]
-
         if not os.path.isfile(selected_info['path']):
             return
 
+        backup_dir = self.get_backup_dir()
+        other_paths = [entry.path for entry in scandir(backup_dir)
+                       if entry.is_file() and entry.path != selected_info['path']
+                       and split_backup_name(entry.name)[1] is not None]
+        if selected_info['path'] in required_backups(other_paths):
+            main_window = self.get_main_window()
+            status_bar = main_window.statusBar()
+
+            status_bar.showMessage(_('This backup cannot be deleted, incremental backups are based on it'))
+            return
+
+        # The backup being written only lists its base in its manifest once
+        # it is complete
+        if (self.backup_compressing and self.compress_thread is not None
+                and self.compress_thread.base_path == selected_info['path']):
+            main_window = self.get_main_window()
+            status_bar = main_window.statusBar()
+
+            status_bar.showMessage(_('This backup cannot be deleted, the backup being written is based on it'))
+            return
+
         confirm_msgbox = QMessageBox()
         confirm_msgbox.setWindowTitle(_('Delete backup'))
         confirm_msgbox.setText(_('This will delete the backup file. It '
@@ -651,29 +1841,23 @@ class BackupsTab(QTabWidget):
             main_window = self.get_main_window()
             status_bar = main_window.statusBar()
 
+            self.stop_verifying_backups()
+            # The upload of the backup must be over before it is deleted
+            self.stop_mirroring_backups(True)
+
             if not delete_path(selected_info['path']):
                 status_bar.showMessage(_('Backup deletion cancelled'))
             else:
-                self.backups_table.removeRow(selected.row())
-                del self.backups[table_item]
+                delete_backup_infos([selected_info['path']])
+                if is_snapshot(selected_info['path']):
+                    self.collect_snapshot_garbage()
+
+                self.backups_model.remove_backup(selected_info['path'])
 
                 status_bar.showMessage(_('Backup deleted'))
 
     def backup_current_clicked(self):
-        if self.manual_backup and self.backup_searching:
-            if (self.compressing_timer is not None and self.compressing_timer.isActive()):
-                self.compressing_timer.stop()
-
-            self.backup_searching = False
-
-            self.finish_backup_saves()
-
-            main_window = self.get_main_window()
-            status_bar = main_window.statusBar()
-
-            status_bar.showMessage(_('Manual backup cancelled'))
-
-        elif self.manual_backup and self.backup_compressing:
+        if self.manual_backup and self.backup_compressing and not self.background_backup:
             class WaitingThread(QThread):
                 completed = Signal()
 
@@ -689,13 +1873,16 @@ class BackupsTab(QTabWidget):
 
             if self.compress_thread is not None:
                 self.backup_current_button.setEnabled(False)
-                self.compress_thread.quit()
+                self.compress_thread.requestInterruption()
 
                 def completed():
                     self.finish_backup_saves()
                     delete_path(self.backup_path)
                     self.compress_thread = None
 
+                    if self.garbage_pending or is_snapshot(self.backup_path):
+                        self.collect_snapshot_garbage()
+
                 waiting_thread = WaitingThread(self.compress_thread, self)
                 waiting_thread.completed.connect(completed)
                 waiting_thread.finished.connect(waiting_thread.deleteLater)
@@ -708,6 +1895,8 @@ class BackupsTab(QTabWidget):
                 self.compress_thread = None
 
             self.backup_compressing = False
+            if self.compress_thread is None and self.garbage_pending:
+                self.collect_snapshot_garbage()
 
             main_window = self.get_main_window()
             status_bar = main_window.statusBar()
@@ -723,44 +1912,113 @@ class BackupsTab(QTabWidget):
 
             set_config_value('last_manual_backup_name', name)
 
-            self.backup_saves(name)
+            world = self.backup_worlds_combo.currentData()
+            self.backup_saves(name, worlds=[world] if world is not None else None)
+
+    def auto_backups_policy(self):
+        '''Keyword arguments of expired_backups for automatic backups.'''
+        return {
+            'keep_last': max(int(get_config_value('max_auto_backups', '6')), 1),
+            'keep_hourly': int(get_config_value('keep_hourly_auto_backups', '0')),
+            'keep_daily': int(get_config_value('keep_daily_auto_backups', '0')),
+            'keep_weekly': int(get_config_value('keep_weekly_auto_backups', '0')),
+            'max_size': int(get_config_value('max_auto_backups_size', '0')) * 1024 * 1024
+        }
 
     def prune_auto_backups(self):
         if self.game_dir is None:
             return
 
-        max_auto_backups = max(int(get_config_value('max_auto_backups', '6')), 1)
-
-        search_start = (_('auto') + '_').lower()
-
         backup_dir = self.get_backup_dir()
         if not os.path.isdir(backup_dir):
             return
 
+        search_start = (_('auto') + '_').lower()
+
+        # The index already knows every backup shown in the backups table,
+        # only check the ones it lists still exist
+        backup_infos = get_backup_infos(backup_dir)
+        backup_paths = [path for path in backup_infos if os.path.isfile(path)]
+
         auto_backups = []
+        for path in backup_paths:
+            filename = split_backup_name(os.path.basename(path))[0]
+            if filename.lower().startswith(search_start):
+                info = backup_infos[path]
+                auto_backups.append({
+                    'path': path,
+                    'modified': info['modified_on'],
+                    'size': info['compressed_size'] or info['size']
+                })
+
+        if len(auto_backups) == 0:
+            return
 
-        for entry in scandir(backup_dir):
-            filename, ext = os.path.splitext(entry.name)
-            if entry.is_file() and ext.lower() == '.zip':
-                filename_lower = filename.lower()
+        # The backup about to be made counts in the policy, assume it will
+        # be about as large as the last one
+        last_backup = max(auto_backups, key=lambda backup: backup['modified'])
+        auto_backups.append({
+            'path': None,
+            'modified': time.time(),
+            'size': last_backup['size']
+        })
+
+        to_remove = expired_backups(auto_backups, **self.auto_backups_policy())
+        if len(to_remove) == 0:
+            return
 
-                if filename_lower.startswith(search_start):
-                    auto_backups.append({'path': entry.path, 'modified': datetime.fromtimestamp(entry.stat().st_mtime)})
+        # Keep the backups incremental backups are based on
+        remove_paths = set(to_remove)
+        required = required_backups(path for path in backup_paths
+            if path not in remove_paths)
+        removed_paths = [path for path in to_remove if path not in required]
+        if len(removed_paths) == 0:
+            return
 
-        if len(auto_backups) >= max_auto_backups:
-            # Remove backups to have a total of max_auto_backups - 1
-            auto_backups.sort(key=lambda x: x['modified'])
-            remove_count = len(auto_backups) - max_auto_backups + 1
+        self.stop_verifying_backups()
+        self.stop_mirroring_backups(True)
+
+        if not delete_paths(removed_paths):
+            # Some of the backups might have been deleted anyway
+            removed_paths = [path for path in removed_paths if not os.path.exists(path)]
+        delete_backup_infos(removed_paths)
+
+        if any(is_snapshot(path) for path in removed_paths):
+            self.collect_snapshot_garbage()
+
+    def collect_snapshot_garbage(self):
+        '''
+        Delete the chunks no snapshot uses anymore. The chunks of a snapshot
+        being written are only referenced once the snapshot is complete, the
+        collection waits for the backup to be over.
+        '''
+        if self.backup_compressing:
+            self.garbage_pending = True
+            return
 
-            to_remove = auto_backups[:remove_count]
+        self.garbage_pending = False
 
-            for backup in to_remove:
-                delete_path(backup['path'])
+        backup_dir = self.get_backup_dir()
+        if backup_dir != '' and os.path.isdir(backup_dir):
+            collect_garbage(backup_dir)
 
-    def backup_saves(self, name, single=False):
+    def backup_saves(self, name, single=False, worlds=None, background=False, capture=None,
+                     skip_unchanged=False):
         main_window = self.get_main_window()
         status_bar = main_window.statusBar()
 
+        if self.backup_compressing and self.background_backup:
+            # Wait for the background backup to be done
+            self.queued_backup = (name, single, worlds, skip_unchanged)
+            return
+        self.stop_verifying_backups()
+        # A backup being written must not be uploaded, nor a backup it replaces
+        self.stop_mirroring_backups(True)
+        self.background_backup = background
+        # Directory and save path of list_pending_backups when backing up
+        # captured saves
+        self.capture = capture
+
         if self.game_dir is None:
             status_bar.showMessage(_('Game directory not found'))
             if self.after_backup is not None:
@@ -787,249 +2045,421 @@ class BackupsTab(QTabWidget):
 
             os.makedirs(backup_dir)
 
+        codec = get_config_value('backup_codec', 'deflate')
+        if codec not in available_codecs():
+            codec = 'deflate'
+        level = get_config_value('backup_compression_level')
+        level = codec_level(codec, int(level) if level is not None else None)
+
+        deduplicated = config_true(get_config_value('deduplicated_backups', 'False'))
+        if deduplicated:
+            backup_ext = cons.BACKUP_SNAPSHOT_EXT
+        elif codec == 'zstd':
+            backup_ext = cons.BACKUP_TAR_ZST_EXT
+        else:
+            backup_ext = '.zip'
+
+        # A single backup replaces the previous one, unless incremental
+        # backups are based on it. It then gets the next free name instead.
+        if single and any(len(dependent_backups(os.path.join(backup_dir, name + ext))) > 0
+                          for ext in cons.BACKUP_EXTENSIONS
+                          if os.path.isfile(os.path.join(backup_dir, name + ext))):
+            single = False
+
         if single:
-            backup_filename = name + '.zip'
+            backup_filename = name + backup_ext
             self.backup_path = os.path.join(backup_dir, backup_filename)
-            if os.path.isfile(self.backup_path):
-                if not delete_path(self.backup_path):
-                    status_bar.showMessage(_('Could not delete previous '
-                                             'backup archive'))
-                    return
+            for ext in cons.BACKUP_EXTENSIONS:
+                existing_path = os.path.join(backup_dir, name + ext)
+                if os.path.isfile(existing_path):
+                    if not delete_path(existing_path):
+                        status_bar.showMessage(_('Could not delete previous '
+                                                 'backup archive'))
+                        return
         else:
             '''
             Finding a backup filename which does not already exists or is the
             next backup name based on an incremental counter placed at the end
-            of the filename without the extension.
+            of the filename without the extension. The names come from the
+            backups index, a backup it does not know yet only bumps the name.
             '''
 
-            name_lower = name.lower()
-            name_key = alphanum_key(name_lower)
-            if len(name_key) > 1 and isinstance(name_key[-1:][0], int):
-                name_key = name_key[:-1]
-
-            duplicate_name = False
-            duplicate_basename = False
-            max_counter = 0
-
-            for entry in scandir(backup_dir):
-                filename, ext = os.path.splitext(entry.name)
-                if entry.is_file() and ext.lower() == '.zip':
-                    filename_lower = filename.lower()
-
-                    if filename_lower == name_lower:
-                        duplicate_name = True
-                    else:
-                        filename_key = alphanum_key(filename_lower)
-
-                        counter = filename_key[-1:][0]
-                        if len(filename_key) > 1 and isinstance(counter, int):
-                            filename_key = filename_key[:-1]
-
-                            if name_key == filename_key:
-                                duplicate_basename = True
-                                max_counter = max(max_counter, counter)
-
-            if duplicate_basename:
-                name_key = alphanum_key(name)
-                if len(name_key) > 1 and isinstance(name_key[-1:][0], int):
-                    name_key = name_key[:-1]
-
-                name_key.append(max_counter + 1)
-                backup_filename = ''.join(map(lambda x: str(x), name_key))
-            elif duplicate_name:
-                backup_filename = name + '2'
-            else:
-                backup_filename = name
+            backup_names = set(split_backup_name(os.path.basename(path))[0]
+                for path in get_backup_infos(backup_dir))
+            while True:
+                backup_filename = next_backup_name(name, backup_names)
+                if not any(os.path.exists(os.path.join(backup_dir, backup_filename + ext))
+                        for ext in cons.BACKUP_EXTENSIONS):
+                    break
+                backup_names.add(backup_filename)
 
-            backup_filename = backup_filename + '.zip'
+            backup_filename = backup_filename + backup_ext
 
             self.backup_path = os.path.join(backup_dir, backup_filename)
 
-        self.backup_file = None
+        # Single backups overwrite themselves, they cannot be part of a chain.
+        # Snapshots already only store what changed.
+        incremental = (not single and backup_ext == '.zip'
+                       and config_true(get_config_value('incremental_backups', 'False')))
+        base_path = None
+        if incremental:
+            base_path = find_backup_base(backup_dir)
+
+        # Backing up some worlds makes an incremental backup which takes the
+        # other worlds from the last backup. Without a suitable one, all the
+        # worlds are backed up.
+        shards = None
+        if worlds is not None and not single and backup_ext == '.zip':
+            shard_base_path = find_shard_base(backup_dir)
+            if shard_base_path is not None:
+                incremental = True
+                base_path = shard_base_path
+                shards = [world_shard(os.path.join(save_dir, world), self.game_dir) for world in worlds]
+
+        # Unchanged files are copied already compressed from the last backup
+        previous_path = None
+        if backup_ext == '.zip':
+            previous_path = find_previous_backup(backup_dir)
+
+        # Automatic backups are skipped when the saves are the same as in the
+        # most recent backup
+        last_backup = None
+        if skip_unchanged and not single and worlds is None:
+            backup_infos = get_backup_infos(backup_dir)
+            last_paths = sorted((path for path in backup_infos if os.path.isfile(path)),
+                                key=lambda path: backup_infos[path]['modified_on'])
+            if len(last_paths) > 0:
+                last_backup = (last_paths[-1], backup_infos[last_paths[-1]]['fingerprint'])
 
         status_bar.clearMessage()
         status_bar.busy += 1
 
         compressing_label = QLabel()
+        compressing_label.setText(_('Compressing save files'))
         status_bar.addWidget(compressing_label, 100)
         self.compressing_label = compressing_label
 
-        self.compressing_progress_bar = None
-        self.compressing_speed_label = None
-        self.compressing_size_label = None
+        compressing_speed_label = QLabel()
+        compressing_speed_label.setText(_('{bytes_sec}/s').format(bytes_sec=sizeof_fmt(0)))
+        status_bar.addWidget(compressing_speed_label)
+        self.compressing_speed_label = compressing_speed_label
 
-        timer = QTimer(self)
-        self.compressing_timer = timer
+        # The size of the saves is only known once the whole tree was walked,
+        # use the last known size as an estimate meanwhile
+        self.total_backup_size = self.get_main_tab().game_dir_group_box.saves_size
 
-        self.backup_searching = True
-        self.backup_compressing = False
+        compressing_size_label = QLabel()
+        compressing_size_label.setText('{bytes_read}/{total_bytes}'.format(bytes_read=sizeof_fmt(0),
+                                                                           total_bytes=sizeof_fmt(
+                                                                               self.total_backup_size)))
+        status_bar.addWidget(compressing_size_label)
+        self.compressing_size_label = compressing_size_label
 
-        self.backup_files = deque()
-        self.backup_file_sizes = {}
+        progress_bar = QProgressBar()
+        self.scale_factor = max(0, int(self.total_backup_size.bit_length()) - 31)
+        progress_bar.setRange(0, self.total_backup_size >> self.scale_factor)
+        progress_bar.setValue(0)
+        status_bar.addWidget(progress_bar)
+        self.compressing_progress_bar = progress_bar
 
-        self.backup_scan = None
-        self.next_backup_scans = deque()
+        self.backup_compressing = True
 
-        self.total_backup_size = 0
-        self.total_files = 0
-        self.filestep = 0
+        self.comp_size = 0
+        self.comp_files = 0
+        self.last_comp_bytes = 0
+        self.last_comp = datetime.utcnow()
 
-        self.disable_tab()
-        self.get_main_tab().disable_tab()
-        self.get_soundpacks_tab().disable_tab()
-        self.get_settings_tab().disable_tab()
-        self.get_backups_tab().disable_tab()
+        # Background backups run while the game is, they leave the tabs
+        # alone
+        if not background:
+            self.disable_tab()
+            self.get_main_tab().disable_tab()
+            self.get_soundpacks_tab().disable_tab()
+            self.get_settings_tab().disable_tab()
+            self.get_backups_tab().disable_tab()
 
         if self.manual_backup:
             self.backup_current_button.setText(_('Cancel backup'))
             self.backup_current_button.setEnabled(True)
 
-        compressing_label.setText(_('Searching for save files'))
+        class BackupThread(QThread):
+            progressed = Signal(float, int, str)
+            completed = Signal(bool)
+
+            def __init__(self, backup_path, save_dir, base_dir, incremental, base_path, shards, previous_path,
+                         codec, level, build, background, last_backup, parent):
+                super(BackupThread, self).__init__(parent)
+
+                self.background = background
+                self.last_backup = last_backup
+                self.unchanged = False
+                # Set once the backup is complete and indexed
+                self.written = False
+                self.fingerprint = None
+                # Members the game kept writing, the backup is then dropped
+                self.unsettled = []
+
+                self.backup_path = backup_path
+                self.save_dir = save_dir
+                self.base_dir = base_dir
+                self.incremental = incremental
+                self.base_path = base_path
+                self.shards = shards
+                self.previous_path = previous_path
+                self.codec = codec
+                self.level = level
+                self.build = build
+
+            def run(self):
+                def progress(size, files, arcname):
+                    self.progressed.emit(size, files, arcname or '')
+
+                walked = []
+
+                def tracked(members):
+                    for member in members:
+                        walked.append(member)
+                        yield member
+
+                if self.shards is not None:
+                    # The worlds are walked one after the other but their
+                    # files are still compressed in parallel
+                    members = (member for shard in self.shards for member in iter_backup_members(
+                        os.path.join(self.base_dir, *shard.strip('/').split('/')), self.base_dir))
+                else:
+                    members = iter_backup_members(self.save_dir, self.base_dir)
+
+                initializer = None
+                if self.background:
+                    set_thread_background_mode()
+                    initializer = set_thread_background_mode
+
+                    # Files still being written by the game would be
+                    # inconsistent in the backup, they are backed up once
+                    # they settle
+                    members = settled_members(members, cons.BACKGROUND_BACKUP_SETTLE_TIME,
+                                              cons.BACKGROUND_BACKUP_SETTLE_WAIT, self.unsettled,
+                                              self.isInterruptionRequested)
+
+                if self.last_backup is not None:
+                    # The whole tree has to be walked before knowing whether
+                    # there is anything to back up
+                    members = list(members)
+                    if len(self.unsettled) > 0:
+                        self.completed.emit(False)
+                        return
+                    if self.same_as_last_backup(members):
+                        self.unchanged = True
+                        self.completed.emit(True)
+                        return
+
+                members = tracked(members)
 
-        def timeout():
-            if self.backup_scan is None:
-                self.backup_scan = scandir(self.save_dir)
-            else:
                 try:
-                    entry = next(self.backup_scan)
-
-                    if entry.is_file():
-                        self.filestep += 1
-                        if self.filestep == 100:
-                            self.filestep = 0
-                            self.compressing_label.setText(_('Found {filename} in {path}').format(filename=entry.name,
-                                path=os.path.dirname(entry.path)))
-                        self.backup_files.append(entry.path)
-                        self.total_backup_size += entry.stat().st_size
-                        self.backup_file_sizes[entry.path] = entry.stat().st_size
-                        self.total_files += 1
-                    elif entry.is_dir():
-                        self.next_backup_scans.append(entry.path)
-                except StopIteration:
-                    try:
-                        self.backup_scan = scandir(self.next_backup_scans.popleft())
-                    except IndexError:
-                        self.backup_searching = False
-                        self.backup_compressing = True
-
-                        self.compressing_label.setText(_('Compressing save files'))
-
-                        compressing_speed_label = QLabel()
-                        compressing_speed_label.setText(_('{bytes_sec}/s').format(bytes_sec=sizeof_fmt(0)))
-                        status_bar.addWidget(compressing_speed_label)
-                        self.compressing_speed_label = (compressing_speed_label)
-
-                        compressing_size_label = QLabel()
-                        compressing_size_label.setText('{bytes_read}/{total_bytes}'.format(bytes_read=sizeof_fmt(0),
-                                                                                           total_bytes=sizeof_fmt(
-                                                                                               self.total_backup_size)))
-                        status_bar.addWidget(compressing_size_label)
-                        self.compressing_size_label = (compressing_size_label)
-
-                        progress_bar = QProgressBar()
-                        self.filestep = 0
-                        self.scale_factor = max(0, int(self.total_backup_size.bit_length()) - 31)
-                        progress_bar.setRange(0, self.total_backup_size >> self.scale_factor)
-                        progress_bar.setValue(0)
-                        status_bar.addWidget(progress_bar)
-                        self.compressing_progress_bar = progress_bar
-
-                        self.comp_size = 0
-                        self.comp_files = 0
-                        self.last_comp_bytes = 0
-                        self.last_comp = datetime.utcnow()
-                        self.next_backup_file = None
-
-                        if self.compressing_timer is not None:
-                            self.compressing_timer.stop()
-                            self.compressing_timer = None
-
-                        self.backup_saves_step2()
+                    if is_snapshot(self.backup_path):
+                        written = write_snapshot(self.backup_path, members,
+                            progress, self.isInterruptionRequested, initializer)
+                    elif self.codec == 'zstd':
+                        written = write_tar_zst_backup(self.backup_path,
+                            members, progress, self.isInterruptionRequested,
+                            self.level, initializer)
+                    else:
+                        written = write_backup(self.backup_path, members,
+                            progress, self.isInterruptionRequested,
+                            manifest=self.incremental, base_path=self.base_path,
+                            previous_path=self.previous_path, codec=self.codec,
+                            level=self.level, shards=self.shards, initializer=initializer)
+                except OSError:
+                    logger.exception('Could not write backup %s', self.backup_path)
+                    written = False
+
+                # A backup missing some saves would be taken for a complete
+                # one by restores and automatic backups, it is dropped
+                if written and len(self.unsettled) > 0:
+                    written = False
+
+                if written:
+                    if self.shards is not None:
+                        # The backup also has the worlds of its base, which
+                        # were not walked
+                        manifest = read_backup_manifest(self.backup_path)
+                        names = [(name, values[0]) for name, values in manifest['files'].items()]
+                    else:
+                        names = [(member[1].replace(os.sep, '/'), member[2]) for member in walked]
+                        self.fingerprint = saves_fingerprint(walked)
+                    self.index_backup(names)
+
+                self.written = written
+                self.completed.emit(written)
+
+            def same_as_last_backup(self, members):
+                last_path, last_fingerprint = self.last_backup
+
+                self.fingerprint = saves_fingerprint(members)
+                if self.fingerprint == last_fingerprint:
+                    return True
+
+                # Compare the content when the fingerprint differs, the game
+                # rewrites its files when saving even if nothing changed
+                return saves_unchanged(members, last_path)
+
+            def index_backup(self, names):
+                # Index the backup so the backups table does not have to
+                # read it
+                save_dir_name = os.path.basename(os.path.normpath(self.save_dir))
+                metadata = backup_metadata(names, save_dir_name)
+                if metadata is None:
+                    return
 
-        timer.timeout.connect(timeout)
-        timer.start(0)
+                base_name = None
+                if self.incremental and self.base_path is not None:
+                    base_name = split_backup_name(os.path.basename(self.base_path))[0]
 
-    def backup_saves_step2(self):
+                try:
+                    backup_stat = os.stat(self.backup_path)
+                    metadata.update({
+                        'size': backup_stat.st_size,
+                        'modified_on': backup_stat.st_mtime,
+                        'compressed_size': backup_physical_size(self.backup_path),
+                        'base_name': base_name,
+                        'build': self.build,
+                        'fingerprint': self.fingerprint
+                    })
+                except (OSError, ValueError) as e:
+                    logger.warning('Could not index backup {0}: {1}'.format(self.backup_path, e))
+                    return
 
-        class CompressThread(QThread):
-            completed = Signal()
+                set_backup_info(self.backup_path, metadata)
 
-            def __init__(self, zfile, filename, arcname, parent):
-                super(CompressThread, self).__init__(parent)
+        def progressed(size, files, arcname):
+            self.comp_size = int(size)
+            self.comp_files = files
 
-                self.zfile = zfile
-                self.filename = filename
-                self.arcname = arcname
+            if arcname != '':
+                self.compressing_label.setText(_('Compressing {filename}').format(filename=arcname))
 
-            def run(self):
-                self.zfile.write(self.filename, self.arcname)
-                self.completed.emit()
+            if self.comp_size > self.total_backup_size:
+                self.total_backup_size = self.comp_size
+                self.scale_factor = max(0, int(self.total_backup_size.bit_length()) - 31)
+                self.compressing_progress_bar.setRange(0, self.total_backup_size >> self.scale_factor)
 
-        def backup_next_file():
-            try:
-                if self.backup_compressing:
-                    next_file = self.backup_files.popleft()
-                    relpath = os.path.relpath(next_file, self.game_dir)
-                    self.next_backup_file = next_file
+            self.compressing_progress_bar.setValue(self.comp_size >> self.scale_factor)
 
-                    self.compressing_label.setText(_('Compressing {filename}').format(filename=relpath))
+            self.compressing_size_label.setText(
+                '{bytes_read}/{total_bytes}'.format(bytes_read=sizeof_fmt(self.comp_size),
+                                                    total_bytes=sizeof_fmt(self.total_backup_size)))
 
-                    compress_thread = CompressThread(self.backup_file, next_file, relpath, self)
-                    compress_thread.completed.connect(completed_compress)
-                    compress_thread.finished.connect(compress_thread.deleteLater)
-                    self.compress_thread = compress_thread
+            delta_bytes = self.comp_size - self.last_comp_bytes
+            delta_time = datetime.utcnow() - self.last_comp
+            if delta_time.total_seconds() == 0:
+                delta_time = timedelta.resolution
 
-                    compress_thread.start()
+            bytes_secs = delta_bytes / delta_time.total_seconds()
+            self.compressing_speed_label.setText(_('{bytes_sec}/s').format(bytes_sec=sizeof_fmt(bytes_secs)))
 
-            except IndexError:
-                self.backup_compressing = False
-                self.compress_thread = None
+            self.last_comp_bytes = self.comp_size
+            self.last_comp = datetime.utcnow()
 
-                self.finish_backup_saves()
+        def completed(written):
+            if self.compress_thread is not backup_thread or not self.backup_compressing:
+                # The backup was cancelled
+                return
 
-                main_window = self.get_main_window()
-                status_bar = main_window.statusBar()
+            self.backup_compressing = False
+            self.compress_thread = None
 
-                if self.after_backup is not None:
-                    self.after_update_backups = self.after_backup
-                    self.after_backup = None
-                else:
-                    status_bar.showMessage(_('Saves backup completed'))
+            self.finish_backup_saves()
+
+            # Collections asked while the backup was written
+            if self.garbage_pending:
+                self.collect_snapshot_garbage()
 
-                self.update_backups_table()
+            main_window = self.get_main_window()
+            status_bar = main_window.statusBar()
 
-        def completed_compress():
-            self.comp_size += self.backup_file_sizes[self.next_backup_file]
-            self.filestep += 1
-            if self.filestep == 100:
-                self.filestep = 0
+            if backup_thread.unchanged:
+                # The content of the saves was compared, the next automatic
+                # backups can rely on their fingerprint again
+                set_backup_fingerprint(backup_thread.last_backup[0], backup_thread.fingerprint)
+                status_bar.showMessage(_('Saves unchanged since the last backup, automatic '
+                                         'backup skipped'))
+
+            if self.background_backup:
+                self.background_backup = False
+
+                if backup_thread.unchanged:
+                    if self.capture is not None:
+                        remove_pending_backup(self.capture[0])
+                # Interrupted captures are compressed again later
+                elif not written:
+                    if os.path.exists(self.backup_path):
+                        delete_path(self.backup_path)
+                    if is_snapshot(self.backup_path):
+                        self.collect_snapshot_garbage()
+
+                    if len(backup_thread.unsettled) > 0:
+                        # Try again once the game is done writing
+                        self.last_background_backup = None
+                        self.background_backup_timer.start(cons.BACKGROUND_BACKUP_DELAY)
+                        status_bar.showMessage(_('The game kept writing the saves, the background '
+                                                 'backup will be made again later'))
+                else:
+                    if self.capture is not None:
+                        remove_pending_backup(self.capture[0])
+                    self.update_backups_table()
+
+                # The after_backup step belongs to the queued backup
+                if self.queued_backup is not None:
+                    name, single, worlds, skip_unchanged = self.queued_backup
+                    self.queued_backup = None
+                    self.backup_saves(name, single, worlds, skip_unchanged=skip_unchanged)
+                elif written:
+                    self.compress_pending_backups()
+                return
 
-                self.compressing_progress_bar.setValue(self.comp_size >> self.scale_factor)
+            if backup_thread.unchanged:
+                if self.after_backup is not None:
+                    self.after_backup()
+                    self.after_backup = None
+                self.compress_pending_backups()
+                return
 
-                self.compressing_size_label.setText(
-                    '{bytes_read}/{total_bytes}'.format(bytes_read=sizeof_fmt(self.comp_size),
-                                                        total_bytes=sizeof_fmt(self.total_backup_size)))
+            if not written:
+                delete_path(self.backup_path)
+                if is_snapshot(self.backup_path):
+                    self.collect_snapshot_garbage()
+                status_bar.showMessage(_('Could not write the saves backup'))
+                self.after_backup = None
+                return
 
-                delta_bytes = self.comp_size - self.last_comp_bytes
-                delta_time = datetime.utcnow() - self.last_comp
-                if delta_time.total_seconds() == 0:
-                    delta_time = timedelta.resolution
+            if self.after_backup is not None:
+                self.after_update_backups = self.after_backup
+                self.after_backup = None
+            else:
+                status_bar.showMessage(_('Saves backup completed'))
 
-                bytes_secs = delta_bytes / delta_time.total_seconds()
-                self.compressing_speed_label.setText(_('{bytes_sec}/s').format(bytes_sec=sizeof_fmt(bytes_secs)))
+            self.update_backups_table()
+            self.compress_pending_backups()
 
-                self.last_comp_bytes = self.comp_size
-                self.last_comp = datetime.utcnow()
+        # Captured saves are backed up from the capture, which mirrors the
+        # game directory
+        source_dir = self.game_dir
+        source_save_dir = save_dir
+        if capture is not None:
+            source_dir, save_path = capture
+            source_save_dir = os.path.join(source_dir, save_path)
 
-            backup_next_file()
+        backup_thread = BackupThread(self.backup_path, source_save_dir, source_dir, incremental, base_path, shards,
+                                     previous_path, codec, level, self.get_main_tab().game_dir_group_box.current_build,
+                                     background, last_backup, self)
+        backup_thread.progressed.connect(progressed)
+        backup_thread.completed.connect(completed)
+        backup_thread.finished.connect(backup_thread.deleteLater)
+        self.compress_thread = backup_thread
 
-        self.backup_file = zipfile.ZipFile(self.backup_path, 'w', zipfile.ZIP_DEFLATED)
-        backup_next_file()
+        backup_thread.start()
 
     def finish_backup_saves(self):
-        if self.backup_file is not None:
-            self.backup_file.close()
-
         main_window = self.get_main_window()
         status_bar = main_window.statusBar()
 
@@ -1043,11 +2473,12 @@ class BackupsTab(QTabWidget):
 
         status_bar.busy -= 1
 
-        self.enable_tab()
-        self.get_main_tab().enable_tab()
-        self.get_soundpacks_tab().enable_tab()
-        self.get_settings_tab().enable_tab()
-        self.get_backups_tab().enable_tab()
+        if not self.background_backup:
+            self.enable_tab()
+            self.get_main_tab().enable_tab()
+            self.get_soundpacks_tab().enable_tab()
+            self.get_settings_tab().enable_tab()
+            self.get_backups_tab().enable_tab()
 
         if self.manual_backup:
             self.manual_backup = False
@@ -1062,6 +2493,10 @@ class BackupsTab(QTabWidget):
             self.backup_current_button.setEnabled(True)
 
         self.update_backups_table()
+        self.update_archived_worlds()
+
+        # Captures left by a previous run of the launcher
+        self.compress_pending_backups()
 
     def get_save_dir(self):
         save_dir = os.path.join(self.game_dir, 'save')
@@ -1081,31 +2516,40 @@ class BackupsTab(QTabWidget):
 
         return save_dir
 
-    def backups_table_header_sort(self, index, order):
-        self.backups_table.sortItems(index, order)
+    def selected_backup(self):
+        selection_model = self.backups_table.selectionModel()
+        if selection_model is None or not selection_model.hasSelection():
+            return None
+
+        selected = self.backups_proxy_model.mapToSource(selection_model.currentIndex())
+        if not selected.isValid():
+            return None
+
+        return self.backups_model.backup_at(selected.row())
 
     def backups_table_selection_changed(self):
-        items = self.backups_table.selectedItems()
-        has_items = len(items) > 0
+        has_items = self.backups_table.selectionModel().hasSelection()
 
         self.restore_button.setEnabled(has_items)
+        self.restore_backup_world_button.setEnabled(has_items)
+        self.browse_backup_button.setEnabled(has_items)
         self.delete_button.setEnabled(has_items)
 
     def clear_backups(self):
         self.game_dir = None
-        self.backups = {}
+        self.backups_dir_shown = None
 
         self.restore_button.setEnabled(False)
+        self.restore_backup_world_button.setEnabled(False)
+        self.browse_backup_button.setEnabled(False)
         self.refresh_list_button.setEnabled(False)
         self.delete_button.setEnabled(False)
 
         self.backup_current_button.setEnabled(False)
 
-        self.backups_table.horizontalHeader().setSortIndicatorShown(False)
+        self.update_archived_worlds()
 
-        self.backups_table.clearContents()
-        for i in range(self.backups_table.rowCount()):
-            self.backups_table.removeRow(0)
+        self.backups_model.clear()
 
     @property
     def app_locale(self):
@@ -1131,34 +2575,22 @@ class BackupsTab(QTabWidget):
         return backup_dir
 
     def update_backups_table(self):
-        selection_model = self.backups_table.selectionModel()
-        if selection_model is None or not selection_model.hasSelection():
-            self.previous_selection = None
-        else:
-            selected = selection_model.currentIndex()
-            table_item = self.backups_table.item(selected.row(), 0)
-            selected_info = self.backups[table_item]
-
-            self.previous_selection = selected_info['path']
-
-        self.previous_selection_index = None
-
-        self.backups_table.horizontalHeader().setSortIndicatorShown(False)
-
-        self.backups_table.clearContents()
-        for i in range(self.backups_table.rowCount()):
-            self.backups_table.removeRow(0)
-
-        self.backups = {}
-
         if self.game_dir is None:
+            self.backups_model.clear()
             return
 
         backup_dir = self.get_backup_dir()
 
         if not os.path.isdir(backup_dir):
+            self.backups_model.clear()
             return
 
+        # Rows are updated in place, which keeps the selection and the sort
+        # order. They only have to go when looking at another directory.
+        if backup_dir != self.backups_dir_shown:
+            self.backups_model.clear()
+            self.backups_dir_shown = backup_dir
+
         self.refresh_list_button.setEnabled(True)
 
         if (self.update_backups_timer is not None and self.update_backups_timer.isActive()):
@@ -1171,113 +2603,304 @@ class BackupsTab(QTabWidget):
 
         save_dir_name = os.path.basename(os.path.normpath(self.get_save_dir()))
 
+        self.backup_infos = get_backup_infos(backup_dir)
+        self.seen_backups = set()
+
+        def add_backup(entry, filename):
+            """Add the row of a backup, returns True when the backup had to be
+            read because it was missing from the index or changed since."""
+            entry_stat = entry.stat()
+            self.seen_backups.add(entry.path)
+
+            read = False
+            info = self.backup_infos.get(entry.path)
+            if (info is None or info['size'] != entry_stat.st_size
+                    or info['modified_on'] != entry_stat.st_mtime):
+                read = True
+
+                metadata = read_backup_metadata(entry.path, save_dir_name)
+                if metadata is None:
+                    return read
+
+                info = dict(metadata, size=entry_stat.st_size, modified_on=entry_stat.st_mtime, build=None)
+                set_backup_info(entry.path, info)
+                self.backup_infos[entry.path] = info
+
+            # We found a valid backup
+
+            self.backups_model.set_backup({
+                'path': entry.path,
+                'name': filename,
+                'modified': entry_stat.st_mtime,
+                'worlds': info['worlds'],
+                'characters': info['characters'],
+                'uncompressed_size': info['uncompressed_size'],
+                'compressed_size': info['compressed_size'],
+                'base_name': info['base_name'],
+                'build': info['build'],
+                'verified': info.get('verified')
+            })
+
+            return read
+
         def timeout():
             try:
-                entry = next(self.backups_scan)
-                filename, ext = os.path.splitext(entry.name)
-                if ext.lower() == '.zip':
-                    uncompressed_size = 0
-                    character_count = 0
-                    worlds_set = set()
-                    try:
-                        with zipfile.ZipFile(entry.path) as zfile:
-                            for info in zfile.infolist():
-                                if not info.filename.startswith(save_dir_name):
-                                    return
+                # Indexed backups are added right away, only backups which had
+                # to be read give the control back to the event loop
+                while True:
+                    entry = next(self.backups_scan)
+                    filename, ext = split_backup_name(entry.name)
+                    if ext is not None and entry.is_file():
+                        if add_backup(entry, filename):
+                            return
 
-                                uncompressed_size += info.file_size
+            except StopIteration:
+                self.update_backups_timer.stop()
 
-                                # For compatibility with 1.6.3
-                                session = get_config_value('session_directory')
-                                if session == 'default_session':
-                                    session = self.game_dir
+                self.backups_model.remove_missing(self.seen_backups)
 
-                                path_items = info.filename.split('/')
-                                target_length = 3
+                # Forget the backups which were removed outside the launcher
+                delete_backup_infos(set(self.backup_infos) - self.seen_backups)
 
-                                if len(path_items) == target_length:
-                                    save_file = path_items[-1]
-                                    if save_file.endswith('.sav'):
-                                        character_count += 1
-                                    if save_file in cons.WORLD_FILES:
-                                        worlds_set.add(path_items[1])
-                    except zipfile.BadZipFile:
-                        pass
+                self.verify_backups()
+                self.mirror_backups()
 
-                    # We found a valid backup
+                if self.after_update_backups is not None:
+                    self.after_update_backups()
+                    self.after_update_backups = None
 
-                    compressed_size = entry.stat().st_size
-                    modified_date = datetime.fromtimestamp(entry.stat().st_mtime)
-                    formated_date = format_datetime(modified_date, format='short', locale=self.app_locale)
-                    arrow_date = arrow.get(entry.stat().st_mtime)
-                    human_delta = safe_humanize(arrow_date, arrow.utcnow(), locale=self.app_locale)
+        timer.timeout.connect(timeout)
+        timer.start(0)
 
-                    row_index = self.backups_table.rowCount()
-                    self.backups_table.insertRow(row_index)
 
-                    flags = (Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled)
+class BackupsTableModel(QAbstractTableModel):
+    """Backups listed in the backups table.
+
+    Each backup is a dict of raw values, which are only formatted when the
+    view displays them. Backups are inserted, updated and removed one row at
+    a time so the view never has to be rebuilt.
+    """
+
+    COLUMN_COUNT = 10
+
+    def __init__(self, parent=None):
+        super(BackupsTableModel, self).__init__(parent)
+
+        self.backups = []
+        self.backups_by_path = {}
+        self.headers = ()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.backups)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.COLUMN_COUNT
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole
+                and section < len(self.headers)):
+            return self.headers[section]
+        return None
+
+    def set_headers(self, headers):
+        self.headers = headers
+        self.headerDataChanged.emit(Qt.Orientation.Horizontal, 0, self.COLUMN_COUNT - 1)
+
+        # Displayed dates and sizes depend on the language as well
+        if len(self.backups) > 0:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.backups) - 1, self.COLUMN_COUNT - 1))
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        backup = self.backups[index.row()]
+        column = index.column()
+
+        # Flag the backups which could not be read when verified
+        if column == 0 and backup['verified'] is False:
+            if role == Qt.ItemDataRole.DecorationRole:
+                return QApplication.style().standardIcon(QStyle.StandardPixmap.SP_MessageBoxWarning)
+            elif role == Qt.ItemDataRole.ToolTipRole:
+                return _('This backup is corrupted, it cannot be restored entirely')
+
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+
+        app_locale = QApplication.instance().app_locale
+
+        if column == 0:
+            return backup['name']
+        elif column == 1:
+            return safe_humanize(arrow.get(backup['modified']), arrow.utcnow(), locale=app_locale)
+        elif column == 2:
+            return str(backup['worlds'])
+        elif column == 3:
+            return str(backup['characters'])
+        elif column == 4:
+            return sizeof_fmt(backup['uncompressed_size'])
+        elif column == 5:
+            return sizeof_fmt(backup['compressed_size'])
+        elif column == 6:
+            rounded_ratio = round(compression_ratio(backup), 4)
+            return format_percent(rounded_ratio, format='#.##%', locale=app_locale)
+        elif column == 7:
+            modified_date = datetime.fromtimestamp(backup['modified'])
+            return format_datetime(modified_date, format='short', locale=app_locale)
+        elif column == 8:
+            return backup['base_name'] or ''
+        elif column == 9:
+            return backup['build'] or ''
+
+        return None
+
+    def sort_key(self, row, column):
+        backup = self.backups[row]
+
+        if column == 0:
+            return alphanum_key(backup['name'])
+        elif column in (1, 7):
+            return backup['modified']
+        elif column == 2:
+            return backup['worlds']
+        elif column == 3:
+            return backup['characters']
+        elif column == 4:
+            return backup['uncompressed_size']
+        elif column == 5:
+            return backup['compressed_size']
+        elif column == 6:
+            return compression_ratio(backup)
+        elif column == 8:
+            return alphanum_key(backup['base_name'] or '')
+        elif column == 9:
+            return alphanum_key(backup['build'] or '')
+
+        return 0
+
+    def backup_at(self, row):
+        return self.backups[row]
+
+    def has_backup(self, path):
+        return path in self.backups_by_path
+
+    def set_backup(self, backup):
+        """Add a backup or update the row of a known one."""
+        previous = self.backups_by_path.get(backup['path'])
+        if previous is None:
+            row = len(self.backups)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.backups.append(backup)
+            self.backups_by_path[backup['path']] = backup
+            self.endInsertRows()
+        elif previous != backup:
+            previous.update(backup)
+            row = self.backups.index(previous)
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.COLUMN_COUNT - 1))
+
+    def set_verified(self, path, verified):
+        backup = self.backups_by_path.get(path)
+        if backup is None:
+            return
 
-                    if uncompressed_size == 0:
-                        compression_ratio = 0
-                    else:
-                        compression_ratio = 1.0 - (compressed_size / uncompressed_size)
-                    rounded_ratio = round(compression_ratio, 4)
-                    ratio_percent = format_percent(rounded_ratio, format='#.##%', locale=self.app_locale)
+        backup['verified'] = verified
 
-                    if self.previous_selection is not None:
-                        if entry.path == self.previous_selection:
-                            self.previous_selection_index = row_index
+        row = self.backups.index(backup)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, 0))
 
-                    fields = ((filename, alphanum_key(filename)), (human_delta, modified_date),
-                              (str(len(worlds_set)), len(worlds_set)), (str(character_count), character_count),
-                              (sizeof_fmt(uncompressed_size), uncompressed_size),
-                              (sizeof_fmt(compressed_size), compressed_size), (ratio_percent, compression_ratio),
-                              (formated_date, modified_date))
+    def remove_backup(self, path):
+        backup = self.backups_by_path.pop(path, None)
+        if backup is None:
+            return
 
-                    for index, value in enumerate(fields):
-                        item = SortEnabledTableWidgetItem(value[0], value[1])
-                        item.setFlags(flags)
-                        self.backups_table.setItem(row_index, index, item)
+        row = self.backups.index(backup)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.backups[row]
+        self.endRemoveRows()
 
-                        if index == 0:
-                            self.backups[item] = {'path': entry.path, 'actual_size': uncompressed_size}
+    def rename_backup(self, path, new_path, new_name):
+        backup = self.backups_by_path.pop(path, None)
+        if backup is None:
+            return
 
-            except StopIteration:
-                self.update_backups_timer.stop()
+        backup['path'] = new_path
+        backup['name'] = new_name
+        self.backups_by_path[new_path] = backup
 
-                if self.previous_selection_index is not None:
-                    selection_model = self.backups_table.selectionModel()
-                    model = selection_model.model()
+        row = self.backups.index(backup)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, 0))
 
-                    first_index = model.index(self.previous_selection_index, 0)
-                    last_index = model.index(self.previous_selection_index, self.backups_table.columnCount() - 1)
-                    row_selection = QItemSelection(first_index, last_index)
+    def remove_missing(self, paths):
+        """Remove the backups whose path is not in paths."""
+        for path in [path for path in self.backups_by_path if path not in paths]:
+            self.remove_backup(path)
 
-                    selection_model.select(row_selection, QItemSelectionModel.Select)
-                    selection_model.setCurrentIndex(first_index, QItemSelectionModel.Select)
+    def clear(self):
+        self.beginResetModel()
+        self.backups = []
+        self.backups_by_path = {}
+        self.endResetModel()
 
-                self.backups_table.sortItems(1, Qt.SortOrder.DescendingOrder)
-                self.backups_table.horizontalHeader().setSortIndicatorShown(True)
 
-                if self.after_update_backups is not None:
-                    self.after_update_backups()
-                    self.after_update_backups = None
+class BackupsSortProxyModel(QSortFilterProxyModel):
+    """Sort the backups table on the raw values instead of the displayed
+    text."""
 
-        timer.timeout.connect(timeout)
-        timer.start(0)
+    def lessThan(self, left, right):
+        model = self.sourceModel()
+        return model.sort_key(left.row(), left.column()) < model.sort_key(right.row(), right.column())
+
+
+def next_backup_name(name, names):
+    """Find the name of a new backup which is not in names, adding or
+    incrementing a counter at the end of name when needed."""
+    name_lower = name.lower()
+    name_key = alphanum_key(name_lower)
+    if len(name_key) > 1 and isinstance(name_key[-1:][0], int):
+        name_key = name_key[:-1]
+
+    duplicate_name = False
+    duplicate_basename = False
+    max_counter = 0
+
+    for filename in names:
+        filename_lower = filename.lower()
+
+        if filename_lower == name_lower:
+            duplicate_name = True
+        else:
+            filename_key = alphanum_key(filename_lower)
+
+            counter = filename_key[-1:][0]
+            if len(filename_key) > 1 and isinstance(counter, int):
+                filename_key = filename_key[:-1]
+
+                if name_key == filename_key:
+                    duplicate_basename = True
+                    max_counter = max(max_counter, counter)
+
+    if duplicate_basename:
+        name_key = alphanum_key(name)
+        if len(name_key) > 1 and isinstance(name_key[-1:][0], int):
+            name_key = name_key[:-1]
 
+        name_key.append(max_counter + 1)
+        return ''.join(map(lambda x: str(x), name_key))
+    elif duplicate_name:
+        return name + '2'
 
-class SortEnabledTableWidgetItem(QTableWidgetItem):
-    def __init__(self, value, sort_data):
-        super(SortEnabledTableWidgetItem, self).__init__(value)
+    return name
 
-        self.sort_data = sort_data
 
-    def __lt__(self, other):
-        return self.sort_data < other.sort_data
+def compression_ratio(backup):
+    if backup['uncompressed_size'] == 0:
+        return 0
 
-    def __hash__(self):
-        return id(self)
+    return 1.0 - (backup['compressed_size'] / backup['uncompressed_size'])
 
 
 def retry_rename(src, dst):
@@ -1319,3 +2942,292 @@ that file. You might need to end it if you want to retry.</p>
                 return False
 
     return True
+
+
+class BackupBrowserDialog(QDialog):
+    '''
+    Browse the files of a backup and extract some of them somewhere else
+    without restoring the backup. Only the selected members are read from the
+    backups, zip members are read directly at their offset.
+    '''
+    def __init__(self, backup_info, save_dir_name, parent):
+        super(BackupBrowserDialog, self).__init__(parent)
+
+        self.backup_info = backup_info
+        self.save_dir_name = save_dir_name
+        self.plan = None
+        self.load_thread = None
+        self.extract_thread = None
+        self.scale_factor = 0
+
+        layout = QGridLayout()
+
+        files_tree = QTreeWidget()
+        files_tree.setColumnCount(2)
+        files_tree.setHeaderLabels((_('Name'), _('Size')))
+        files_tree.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        files_tree.itemSelectionChanged.connect(self.files_tree_selection_changed)
+        files_tree.header().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        files_tree.header().setStretchLastSection(False)
+        layout.addWidget(files_tree, 0, 0)
+        self.files_tree = files_tree
+
+        status_label = QLabel()
+        status_label.setText(_('Reading the content of the backup...'))
+        layout.addWidget(status_label, 1, 0)
+        self.status_label = status_label
+
+        progress_bar = QProgressBar()
+        progress_bar.setVisible(False)
+        layout.addWidget(progress_bar, 2, 0)
+        self.progress_bar = progress_bar
+
+        buttons_container = QWidget()
+        buttons_layout = QHBoxLayout()
+        buttons_layout.setContentsMargins(0, 0, 0, 0)
+        buttons_container.setLayout(buttons_layout)
+
+        extract_button = QPushButton()
+        extract_button.setText(_('Extract selection'))
+        extract_button.setEnabled(False)
+        extract_button.clicked.connect(self.extract_clicked)
+        buttons_layout.addWidget(extract_button)
+        self.extract_button = extract_button
+
+        close_button = QPushButton()
+        close_button.setText(_('Close'))
+        close_button.clicked.connect(self.reject)
+        buttons_layout.addWidget(close_button)
+        self.close_button = close_button
+
+        layout.addWidget(buttons_container, 3, 0, Qt.AlignmentFlag.AlignRight)
+        self.buttons_container = buttons_container
+        self.buttons_layout = buttons_layout
+
+        self.setLayout(layout)
+
+        self.setWindowTitle(_('Browse the {backup_name} backup').format(backup_name=backup_info['name']))
+        self.resize(700, 500)
+
+        self.load_backup()
+
+    def load_backup(self):
+        class LoadThread(QThread):
+            completed = Signal(object)
+
+            def __init__(self, backup_path, parent):
+                super(LoadThread, self).__init__(parent)
+
+                self.backup_path = backup_path
+
+            def run(self):
+                # Only the central directory of zip backups is read, tar
+                # backups have to be decompressed once to list their content
+                try:
+                    plan = cached_restore_plan(self.backup_path)
+                except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+                    logger.warning('Could not read backup {0}: {1}'.format(self.backup_path, e))
+                    plan = None
+
+                self.completed.emit(plan)
+
+        def completed(plan):
+            if self.load_thread is not load_thread:
+                # The dialog was closed
+                return
+            self.load_thread = None
+
+            if plan is None:
+                self.status_label.setText(_('Could not read the content of this backup'))
+                return
+
+            self.plan = plan
+            self.fill_files_tree()
+
+        load_thread = LoadThread(self.backup_info['path'], self)
+        load_thread.completed.connect(completed)
+        load_thread.finished.connect(load_thread.deleteLater)
+        self.load_thread = load_thread
+
+        load_thread.start()
+
+    def fill_files_tree(self):
+        style = QApplication.style()
+        dir_icon = style.standardIcon(QStyle.StandardPixmap.SP_DirIcon)
+        file_icon = style.standardIcon(QStyle.StandardPixmap.SP_FileIcon)
+        character_icon = style.standardIcon(QStyle.StandardPixmap.SP_FileDialogInfoView)
+
+        characters = world_characters(self.plan, self.save_dir_name)
+
+        dir_items = {}
+        sizes = {}
+
+        def dir_item(path):
+            item = dir_items.get(path)
+            if item is None:
+                parent_path, separator, name = path.rpartition('/')
+                parent = self.files_tree if parent_path == '' else dir_item(parent_path)
+
+                item = QTreeWidgetItem(parent, (name, ''))
+                item.setIcon(0, dir_icon)
+                item.setData(0, Qt.ItemDataRole.UserRole, ('prefix', path + '/'))
+                dir_items[path] = item
+            return item
+
+        infos = sorted((info for backup_path, infos in self.plan for info in infos
+                        if not info.filename.endswith('/')), key=lambda info: info.filename)
+
+        total_size = 0
+        for info in infos:
+            total_size += info.file_size
+
+            parent_path, separator, name = info.filename.rpartition('/')
+            parent = self.files_tree if parent_path == '' else dir_item(parent_path)
+
+            item = QTreeWidgetItem(parent, (name, sizeof_fmt(info.file_size)))
+            item.setIcon(0, file_icon)
+            item.setData(0, Qt.ItemDataRole.UserRole, ('file', info.filename))
+
+            path = parent_path
+            while path != '':
+                sizes[path] = sizes.get(path, 0) + info.file_size
+                path = path.rpartition('/')[0]
+
+            world = member_world(info.filename, self.save_dir_name)
+            for prefix in characters.get(world, ()):
+                if info.filename.startswith(prefix):
+                    sizes[prefix] = sizes.get(prefix, 0) + info.file_size
+
+        for path, item in dir_items.items():
+            item.setText(1, sizeof_fmt(sizes.get(path, 0)))
+
+        # Characters are listed first in their world, they group the files of
+        # the character spread in the world directory
+        for world, world_characters_found in characters.items():
+            world_item = dir_items.get('{0}/{1}'.format(self.save_dir_name, world))
+            if world_item is None:
+                continue
+
+            for prefix, name in sorted(world_characters_found.items(), key=lambda item: item[1], reverse=True):
+                item = QTreeWidgetItem((_('Character: {name}').format(name=name),
+                                        sizeof_fmt(sizes.get(prefix, 0))))
+                item.setIcon(0, character_icon)
+                item.setData(0, Qt.ItemDataRole.UserRole, ('prefix', prefix))
+                world_item.insertChild(0, item)
+
+        save_dir_item = dir_items.get(self.save_dir_name)
+        if save_dir_item is not None:
+            save_dir_item.setExpanded(True)
+
+        self.files_tree.resizeColumnToContents(1)
+
+        self.status_label.setText(ngettext('{count} file, {size}', '{count} files, {size}', len(infos)).format(
+            count=len(infos), size=sizeof_fmt(total_size)))
+
+    def selected_members(self):
+        filenames = set()
+        prefixes = set()
+        for item in self.files_tree.selectedItems():
+            kind, name = item.data(0, Qt.ItemDataRole.UserRole)
+            if kind == 'file':
+                filenames.add(name)
+            else:
+                prefixes.add(name)
+
+        return select_members(self.plan, filenames, prefixes)
+
+    def files_tree_selection_changed(self):
+        if self.extract_thread is None:
+            self.extract_button.setEnabled(len(self.files_tree.selectedItems()) > 0)
+
+    def extract_clicked(self):
+        if self.extract_thread is not None:
+            self.extract_thread.requestInterruption()
+            self.extract_button.setEnabled(False)
+            return
+
+        plan = self.selected_members()
+        if len(plan) == 0:
+            return
+
+        options = QFileDialog.Option.DontResolveSymlinks | QFileDialog.Option.ShowDirsOnly
+        directory = QFileDialog.getExistingDirectory(self, _('Extract to'), get_downloads_directory(),
+                                                     options=options)
+        if not directory:
+            return
+        directory = clean_qt_path(directory)
+
+        total_size = sum(info.file_size for backup_path, infos in plan for info in infos)
+        self.scale_factor = max(0, int(total_size.bit_length()) - 31)
+        self.progress_bar.setRange(0, total_size >> self.scale_factor)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+
+        self.files_tree.setEnabled(False)
+        self.extract_button.setText(_('Cancel extraction'))
+
+        class ExtractThread(QThread):
+            progressed = Signal(float, int, str)
+            completed = Signal(bool)
+
+            def __init__(self, plan, dir, parent):
+                super(ExtractThread, self).__init__(parent)
+
+                self.plan = plan
+                self.dir = dir
+
+            def run(self):
+                def progress(size, files, filename):
+                    self.progressed.emit(size, files, filename or '')
+
+                try:
+                    extracted = extract_backup(self.plan, self.dir, progress, self.isInterruptionRequested)
+                except (OSError, KeyError, zipfile.BadZipFile):
+                    logger.exception('Could not extract backup to %s', self.dir)
+                    extracted = False
+
+                self.completed.emit(extracted)
+
+        def progressed(size, files, filename):
+            self.progress_bar.setValue(int(size) >> self.scale_factor)
+            if filename != '':
+                self.status_label.setText(_('Extracting {filename}').format(filename=filename))
+
+        def completed(extracted):
+            if self.extract_thread is not extract_thread:
+                # The dialog was closed
+                return
+            self.extract_thread = None
+
+            self.progress_bar.setVisible(False)
+            self.files_tree.setEnabled(True)
+            self.extract_button.setText(_('Extract selection'))
+            self.extract_button.setEnabled(len(self.files_tree.selectedItems()) > 0)
+
+            if extracted:
+                self.status_label.setText(_('Selection extracted in {directory}').format(directory=directory))
+            elif extract_thread.isInterruptionRequested():
+                self.status_label.setText(_('Extraction cancelled'))
+            else:
+                self.status_label.setText(_('Could not extract the selection'))
+
+        extract_thread = ExtractThread(plan, directory, self)
+        extract_thread.progressed.connect(progressed)
+        extract_thread.completed.connect(completed)
+        extract_thread.finished.connect(extract_thread.deleteLater)
+        self.extract_thread = extract_thread
+
+        extract_thread.start()
+
+    def done(self, result):
+        # Reading the content of a tar backup cannot be interrupted, the
+        # threads have to be over before the dialog goes away
+        if self.extract_thread is not None:
+            self.extract_thread.requestInterruption()
+            self.extract_thread.wait()
+            self.extract_thread = None
+        if self.load_thread is not None:
+            self.load_thread.wait()
+            self.load_thread = None
+
+        super(BackupBrowserDialog, self).done(result)
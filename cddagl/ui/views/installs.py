@@ -0,0 +1,339 @@
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import arrow
+from PySide6.QtCore import Qt, Signal, QThread
+from PySide6.QtWidgets import (
+    QApplication, QWidget, QGridLayout, QPushButton, QAbstractItemView,
+    QTableWidget, QTableWidgetItem
+)
+
+import cddagl.constants as cons
+from cddagl.functions import sizeof_fmt, safe_humanize, read_commit_sha
+from cddagl.i18n import proxy_ngettext as ngettext, proxy_gettext as _
+from cddagl.saves import scan_saves, game_save_dir
+from cddagl.sql.functions import (
+    get_config_value, get_cached_sha256, set_cached_sha256,
+    identify_game_version
+)
+
+logger = logging.getLogger('cddagl')
+
+
+class InstallsTab(QWidget):
+    def __init__(self):
+        super(InstallsTab, self).__init__()
+
+        self.shown = False
+        self.scan_thread = None
+        self.game_dirs = []
+
+        layout = QGridLayout()
+
+        installs_table = QTableWidget()
+        installs_table.setColumnCount(6)
+        installs_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        installs_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        installs_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        installs_table.verticalHeader().setVisible(False)
+        installs_table.horizontalHeader().setStretchLastSection(True)
+        installs_table.cellDoubleClicked.connect(self.install_double_clicked)
+        layout.addWidget(installs_table, 0, 0)
+        self.installs_table = installs_table
+
+        refresh_button = QPushButton()
+        refresh_button.clicked.connect(self.refresh_installs)
+        layout.addWidget(refresh_button, 1, 0)
+        self.refresh_button = refresh_button
+
+        self.setLayout(layout)
+
+        self.set_text()
+
+    def set_text(self):
+        self.installs_table.setHorizontalHeaderLabels((_('Directory'),
+            _('Version'), _('Build'), _('Status'), _('Saves'),
+            _('Last played')))
+        self.refresh_button.setText(_('Refresh installs'))
+
+    def get_main_window(self):
+        return self.parentWidget().parentWidget().parentWidget()
+
+    def get_main_tab(self):
+        return self.parentWidget().parentWidget().main_tab
+
+    @property
+    def app_locale(self):
+        return QApplication.instance().app_locale
+
+    def showEvent(self, event):
+        if not self.shown:
+            self.refresh_installs()
+
+        self.shown = True
+
+    def refresh_installs(self):
+        if self.scan_thread is not None:
+            return
+
+        self.game_dirs = json.loads(get_config_value('game_directories', '[]'))
+
+        self.installs_table.clearContents()
+        self.installs_table.setRowCount(len(self.game_dirs))
+
+        for row_index, game_dir in enumerate(self.game_dirs):
+            self.set_row(row_index, (game_dir, _('Analyzing...'), '', '', '',
+                ''))
+
+        if len(self.game_dirs) == 0:
+            return
+
+        self.refresh_button.setEnabled(False)
+
+        # Installs launched with a user data directory keep their saves there
+        session_dir = get_config_value('session_directory')
+
+        class InstallsScanThread(QThread):
+            install_scanned = Signal(int, dict)
+            completed = Signal()
+
+            def __init__(self, game_dirs, session_dir, parent):
+                super(InstallsScanThread, self).__init__(parent)
+
+                self.game_dirs = game_dirs
+                self.session_dir = session_dir
+
+            def run(self):
+                # The database is only used from this thread, the workers
+                # only hash the executables. The saves scan keeps its
+                # statistics in the database, it runs here too.
+                exe_paths = {}
+                for game_dir in self.game_dirs:
+                    try:
+                        exe_paths[game_dir] = find_game_exe(game_dir)
+                    except OSError as e:
+                        logger.warning('Could not scan install {0}: {1}'.format(
+                            game_dir, e))
+                        exe_paths[game_dir] = None
+
+                max_workers = min(len(self.game_dirs),
+                    cons.MAX_INSTALLS_SCAN_WORKERS)
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {}
+                    for row_index, game_dir in enumerate(self.game_dirs):
+                        exe_path = exe_paths[game_dir]
+                        if exe_path is None:
+                            self.install_scanned.emit(row_index,
+                                empty_install())
+                            continue
+
+                        cached_sha256 = cached_exe_sha256(exe_path)
+                        future = executor.submit(scan_install, game_dir,
+                            exe_path, cached_sha256)
+                        futures[future] = (row_index, cached_sha256)
+
+                    for future in as_completed(futures):
+                        row_index, cached_sha256 = futures[future]
+                        game_dir = self.game_dirs[row_index]
+
+                        # One broken install must not stop the others
+                        try:
+                            install, sha256 = future.result()
+                        except Exception:
+                            logger.exception('Could not scan install {0}'.format(
+                                game_dir))
+                            install = empty_install()
+                        else:
+                            identify_install(install, sha256,
+                                cached_sha256 is None)
+                            install['saves'] = scan_install_saves(game_dir,
+                                self.session_dir)
+
+                        self.install_scanned.emit(row_index, install)
+
+                self.completed.emit()
+
+        scan_thread = InstallsScanThread(list(self.game_dirs), session_dir,
+            self)
+        scan_thread.install_scanned.connect(self.install_scanned)
+        scan_thread.completed.connect(self.scan_completed)
+        scan_thread.finished.connect(scan_thread.deleteLater)
+        self.scan_thread = scan_thread
+
+        scan_thread.start()
+
+    def install_scanned(self, row_index, install):
+        game_dir = self.game_dirs[row_index]
+
+        if install['exe_path'] is None:
+            self.set_row(row_index, (game_dir, _('Not installed'), '', '', '',
+                ''))
+            return
+
+        version = install['version'] or _('Unknown')
+
+        build = _('Unknown')
+        if install['build'] is not None:
+            build_date = arrow.get(install['released_on'], 'UTC')
+            build = '{build} ({time_delta})'.format(build=install['build'],
+                time_delta=safe_humanize(build_date, arrow.utcnow(),
+                locale=self.app_locale))
+
+        status = _('Unknown')
+        update_group_box = self.get_main_tab().update_group_box
+        if (install['build'] is not None
+                and update_group_box.builds is not None
+                and len(update_group_box.builds) > 0):
+            if update_group_box.builds[0]['number'] == install['build']:
+                status = _('Up to date')
+            else:
+                status = _('Update available')
+
+        saves = install['saves']
+        if saves is None:
+            saves_text = _('Unknown')
+            last_played = _('Unknown')
+        else:
+            saves_text = '{world_count} {worlds} - {character_count} {characters} ({size})'.format(
+                world_count=saves['worlds'],
+                character_count=saves['characters'],
+                size=sizeof_fmt(saves['size']),
+                worlds=ngettext('World', 'Worlds', saves['worlds']),
+                characters=ngettext('Character', 'Characters', saves['characters'])
+            )
+
+            last_played = _('Never')
+            if saves['last_played'] is not None:
+                last_played = safe_humanize(arrow.get(saves['last_played']),
+                    arrow.utcnow(), locale=self.app_locale)
+
+        self.set_row(row_index, (game_dir, version, build, status, saves_text,
+            last_played))
+
+    def scan_completed(self):
+        self.scan_thread = None
+        self.refresh_button.setEnabled(True)
+
+        self.installs_table.resizeColumnsToContents()
+
+    def set_row(self, row_index, values):
+        flags = (Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled)
+
+        for index, value in enumerate(values):
+            item = QTableWidgetItem(value)
+            item.setFlags(flags)
+            self.installs_table.setItem(row_index, index, item)
+
+    def install_double_clicked(self, row, column):
+        if row >= len(self.game_dirs):
+            return
+
+        main_tab = self.get_main_tab()
+        game_dir_group_box = main_tab.game_dir_group_box
+
+        if not game_dir_group_box.dir_combo.isEnabled():
+            return
+
+        game_dir_group_box.set_dir_combo_value(self.game_dirs[row])
+
+        self.parentWidget().parentWidget().setCurrentWidget(main_tab)
+
+
+def find_game_exe(game_dir):
+    for exe_name in ('cataclysm.exe', 'cataclysm-tiles.exe'):
+        exe_path = os.path.join(game_dir, exe_name)
+        if os.path.isfile(exe_path):
+            return exe_path
+
+    return None
+
+
+def cached_exe_sha256(exe_path):
+    try:
+        return get_cached_sha256(exe_path)
+    except Exception:
+        logger.exception('Could not read the cached sha256 of {0}'.format(
+            exe_path))
+        return None
+
+
+def exe_sha256(exe_path):
+    hasher = hashlib.sha256()
+    with open(exe_path, 'rb') as exe_file:
+        while True:
+            data = exe_file.read(cons.READ_BUFFER_SIZE * 64)
+            if len(data) == 0:
+                break
+            hasher.update(data)
+
+    return hasher.hexdigest()
+
+
+def empty_install():
+    return {
+        'exe_path': None,
+        'commit_sha': None,
+        'version': None,
+        'build': None,
+        'released_on': None,
+        'saves': None
+    }
+
+
+def scan_install(game_dir, exe_path, sha256):
+    """Read the version files of an install. The executable is only hashed
+    when sha256 is None. Nothing is read from or written to the database,
+    this runs in worker threads.
+
+    Returns the install and the sha256 of its executable, None when it could
+    not be hashed.
+    """
+    install = empty_install()
+    install['exe_path'] = exe_path
+
+    # The install is still listed when its version cannot be found
+    try:
+        install['commit_sha'] = read_commit_sha(game_dir)
+        if install['commit_sha'] is not None:
+            install['version'] = install['commit_sha'][:7]
+
+        if sha256 is None:
+            sha256 = exe_sha256(exe_path)
+    except OSError as e:
+        logger.warning('Could not identify the game version of {0}: {1}'.format(
+            game_dir, e))
+        sha256 = None
+
+    return install, sha256
+
+
+def identify_install(install, sha256, hashed):
+    """Find the version and build of a scanned install in the database. The
+    sha256 of the executable is cached when it was hashed by the scan."""
+    if sha256 is None:
+        return
+
+    try:
+        if hashed:
+            set_cached_sha256(install['exe_path'], sha256)
+
+        identified = identify_game_version(sha256, install['commit_sha'])
+        if identified is not None:
+            if identified['stable'] or install['version'] is None:
+                install['version'] = identified['version']
+            install['build'] = identified['build']
+            install['released_on'] = identified['released_on']
+    except Exception:
+        logger.exception('Could not identify the game version of {0}'.format(
+            install['exe_path']))
+
+
+def scan_install_saves(game_dir, session_dir):
+    try:
+        return scan_saves(game_save_dir(game_dir, session_dir))
+    except Exception:
+        logger.exception('Could not scan the saves of {0}'.format(game_dir))
+        return None
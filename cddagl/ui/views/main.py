@@ -22,7 +22,8 @@ from urllib.parse import urljoin
 
 import arrow
 from PySide6.QtCore import (
-    Qt, QTimer, QUrl, QFileInfo, Signal, QStringListModel, QThread, QRegularExpression
+    Qt, QTimer, QUrl, QFileInfo, Signal, QStringListModel, QThread, QRegularExpression,
+    QFileSystemWatcher
 )
 from PySide6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
 from PySide6.QtWidgets import (
@@ -39,13 +40,16 @@ from cddagl.constants import get_cddagl_path
 from cddagl import __version__ as version
 from cddagl.functions import (
     tryint, move_path, sizeof_fmt, delete_path,
-    clean_qt_path, unique, log_exception, ensure_slash, safe_humanize
+    clean_qt_path, unique, log_exception, ensure_slash, safe_humanize,
+    read_commit_sha, release_commit_sha
 )
 from cddagl.i18n import proxy_ngettext as ngettext, proxy_gettext as _
 from cddagl.sql.functions import (
-    get_config_value, set_config_value, new_version, get_build_from_sha256,
-    new_build, config_true
+    get_config_value, set_config_value, set_config_values, new_version,
+    identify_game_version,
+    new_build, new_releases, get_release_builds, get_cached_sha256, set_cached_sha256, config_true
 )
+from cddagl.saves import empty_saves_stats, SaveTree, relocate_saves, game_save_dir
 from cddagl.win32 import (
     find_process_with_file_handle, activate_window, process_id_from_path, wait_for_pid,
     get_documents_directory
@@ -116,9 +120,22 @@ class GameDirGroupBox(QGroupBox):
         self.current_build = None
 
         self.exe_reading_timer = None
-        self.update_saves_timer = None
+        self.update_saves_thread = None
         self.saves_size = 0
 
+        self.saves_tree = None
+        self.changed_save_dirs = set()
+
+        saves_watcher = QFileSystemWatcher(self)
+        saves_watcher.directoryChanged.connect(self.save_dir_changed)
+        self.saves_watcher = saves_watcher
+
+        saves_watcher_timer = QTimer(self)
+        saves_watcher_timer.setSingleShot(True)
+        saves_watcher_timer.setInterval(cons.SAVES_WATCHER_DELAY)
+        saves_watcher_timer.timeout.connect(self.apply_save_changes)
+        self.saves_watcher_timer = saves_watcher_timer
+
         self.dir_combo_inserting = False
         self.sess_combo_inserting = False
 
@@ -179,6 +196,13 @@ class GameDirGroupBox(QGroupBox):
         sess_change_button.clicked.connect(self.set_session_directory)
         self.sess_change_button = sess_change_button
 
+        relocate_saves_button = QToolButton()
+        self.layout_sess.addWidget(relocate_saves_button)
+        relocate_saves_button.clicked.connect(self.move_saves)
+        self.relocate_saves_button = relocate_saves_button
+        self.relocating_saves = False
+        self.relocate_thread = None
+
         self.sess_state_icon = QLabel()
         self.layout_sess.addWidget(self.sess_state_icon)
         self.sess_state_icon.setSizePolicy(QSizePolicy.Minimum, QSizePolicy.Minimum)
@@ -258,6 +282,9 @@ class GameDirGroupBox(QGroupBox):
             'directory" option in the settings tab.'))
         self.launch_game_button.setText(_('Launch game'))
         self.restore_button.setText(_('Restore previous version'))
+        self.relocate_saves_button.setText(_('Move saves...'))
+        self.relocate_saves_button.setToolTip(_('Move the current saves to '
+            'another user data directory and switch to it'))
         self.setTitle(_('Game'))
 
     def set_dir_state_icon(self, state):
@@ -335,6 +362,7 @@ class GameDirGroupBox(QGroupBox):
 
         self.sess_combo.setEnabled(False)
         self.sess_change_button.setEnabled(False)
+        self.relocate_saves_button.setEnabled(False)
 
         self.launch_game_button.setEnabled(False)
         self.restore_button.setEnabled(False)
@@ -345,6 +373,7 @@ class GameDirGroupBox(QGroupBox):
 
         self.sess_combo.setEnabled(True)
         self.sess_change_button.setEnabled(True)
+        self.relocate_saves_button.setEnabled(True)
 
         self.launch_game_button.setEnabled(
             self.exe_path is not None and os.path.isfile(self.exe_path))
@@ -443,8 +472,15 @@ class GameDirGroupBox(QGroupBox):
             name = '{auto}_{name}'.format(auto=_('auto'),
                 name=_('before_launch'))
 
+            # When the launcher closes with the game, the captured saves
+            # are compressed the next time it starts
+            keep_launcher_open = config_true(get_config_value('keep_launcher_open', 'False'))
+            if backups_tab.capture_saves(name, compress=keep_launcher_open, skip_unchanged=True):
+                self.launch_game_process()
+                return
+
             backups_tab.after_backup = self.launch_game_process
-            backups_tab.backup_saves(name)
+            backups_tab.backup_saves(name, skip_unchanged=True)
         else:
             self.launch_game_process()
 
@@ -572,6 +608,8 @@ antivirus whitelist or select the action to trust this binary when detected.</p>
         settings_tab = main_tab.get_settings_tab()
         backups_tab = main_tab.get_backups_tab()
 
+        backups_tab.stop_background_backups()
+
         self.enable_controls()
         update_group_box.enable_controls()
 
@@ -583,15 +621,22 @@ antivirus whitelist or select the action to trust this binary when detected.</p>
 
         self.get_main_window().setWindowState(Qt.WindowState.WindowActive)
 
-        self.update_saves()
+        self.refresh_saves()
 
+        if config_true(get_config_value('archive_cold_worlds', 'False')):
+            backups_tab.archive_cold_worlds(self.backup_after_end)
+        else:
+            self.backup_after_end()
+
+    def backup_after_end(self):
         if config_true(get_config_value('backup_on_end', 'False')):
+            backups_tab = self.get_main_tab().get_backups_tab()
             backups_tab.prune_auto_backups()
 
             name = '{auto}_{name}'.format(auto=_('auto'),
                 name=_('after_end'))
 
-            backups_tab.backup_saves(name)
+            backups_tab.backup_saves(name, skip_unchanged=True)
 
     def get_main_tab(self):
         return self.parentWidget()
@@ -665,6 +710,10 @@ antivirus whitelist or select the action to trust this binary when detected.</p>
     def add_session_dir(self):
         new_session_dir = self.sess_combo.currentText()
 
+        set_config_value('session_directories',
+            json.dumps(self.session_dirs_with(new_session_dir)))
+
+    def session_dirs_with(self, new_session_dir):
         session_dirs = json.loads(get_config_value('session_directories', '[]'))
 
         try:
@@ -678,7 +727,132 @@ antivirus whitelist or select the action to trust this binary when detected.</p>
         if len(session_dirs) > cons.MAX_SESSION_DIRECTORIES:
             del session_dirs[cons.MAX_SESSION_DIRECTORIES:]
 
-        set_config_value('session_directories', json.dumps(session_dirs))
+        return session_dirs
+
+    def get_save_dir(self):
+        return game_save_dir(self.dir_combo.currentText(), get_config_value('session_directory'))
+
+    def move_saves(self):
+        if self.relocating_saves or self.game_started:
+            return
+
+        save_dir = self.get_save_dir()
+        if not os.path.isdir(save_dir):
+            return
+
+        options = QFileDialog.Option.DontResolveSymlinks | QFileDialog.Option.ShowDirsOnly
+        directory = QFileDialog.getExistingDirectory(self,
+                _('Move saves to user data directory'),
+                os.path.dirname(save_dir), options=options)
+        if not directory:
+            return
+        directory = clean_qt_path(directory)
+
+        target_dir = os.path.join(directory, 'save')
+        if os.path.normcase(os.path.normpath(target_dir)) == os.path.normcase(
+                os.path.normpath(save_dir)):
+            return
+
+        main_window = self.get_main_window()
+        status_bar = main_window.statusBar()
+
+        if os.path.exists(target_dir):
+            status_bar.showMessage(_('There is already a save directory in '
+                '{directory}').format(directory=directory))
+            return
+
+        class RelocateSavesThread(QThread):
+            progressed = Signal(float)
+            completed = Signal(bool)
+
+            def __init__(self, save_dir, target_dir, config_values, parent):
+                super(RelocateSavesThread, self).__init__(parent)
+
+                self.save_dir = save_dir
+                self.target_dir = target_dir
+                self.config_values = config_values
+
+            def run(self):
+                def record_location():
+                    # The new location is saved before the old saves are
+                    # removed
+                    set_config_values(self.config_values)
+
+                try:
+                    relocated = relocate_saves(self.save_dir, self.target_dir,
+                        self.progressed.emit, self.isInterruptionRequested,
+                        record_location)
+                except Exception:
+                    logger.exception('Could not move saves to %s',
+                        self.target_dir)
+                    relocated = False
+                self.completed.emit(relocated)
+
+        self.stop_watching_saves()
+        self.relocating_saves = True
+
+        main_tab = self.get_main_tab()
+        main_tab.disable_tab()
+        main_tab.get_backups_tab().disable_tab()
+        main_tab.get_soundpacks_tab().disable_tab()
+        main_tab.get_settings_tab().disable_tab()
+
+        status_bar.clearMessage()
+        status_bar.busy += 1
+
+        relocating_label = QLabel()
+        relocating_label.setText(_('Moving saves to {directory}').format(
+            directory=directory))
+        status_bar.addWidget(relocating_label, 100)
+
+        progress_bar = QProgressBar()
+        progress_bar.setRange(0, 100)
+        status_bar.addWidget(progress_bar)
+
+        total_size = max(self.saves_size, 1)
+
+        def progressed(copied_size):
+            progress_bar.setValue(min(int(copied_size * 100 / total_size), 100))
+
+        def completed(relocated):
+            self.relocating_saves = False
+
+            status_bar.removeWidget(relocating_label)
+            status_bar.removeWidget(progress_bar)
+            status_bar.busy -= 1
+
+            main_tab.enable_tab()
+            main_tab.get_backups_tab().enable_tab()
+            main_tab.get_soundpacks_tab().enable_tab()
+            main_tab.get_settings_tab().enable_tab()
+
+            if self.relocate_thread is relocate_thread:
+                self.relocate_thread = None
+
+            if not relocated:
+                status_bar.showMessage(_('Could not move the saves to '
+                    '{directory}, you can try again to resume the move'
+                    ).format(directory=directory))
+                self.update_saves()
+                return
+
+            self.set_sess_combo_value(directory)
+            self.sess_directory_changed()
+
+            status_bar.showMessage(_('Saves moved to {directory}').format(
+                directory=directory))
+
+        relocate_thread = RelocateSavesThread(save_dir, target_dir, {
+                'session_directory': directory,
+                'session_directories': json.dumps(
+                    self.session_dirs_with(directory))
+            }, self)
+        relocate_thread.progressed.connect(progressed)
+        relocate_thread.completed.connect(completed)
+        relocate_thread.finished.connect(relocate_thread.deleteLater)
+        self.relocate_thread = relocate_thread
+
+        relocate_thread.start()
 
 
     def dc_index_changed(self, index):
@@ -827,101 +1001,105 @@ antivirus whitelist or select the action to trust this binary when detected.</p>
         self.game_version = ''
 
         game_dir = self.dir_combo.currentText()
-        version_file = os.path.join(game_dir, 'VERSION.txt')
-        if os.path.isfile(version_file):
-            file_content = None
-            with open(version_file, 'r', encoding='utf8') as read_file:
-                file_content = read_file.read(1024)
-            if file_content is not None:
-                match = re.search(r'commit sha: (?P<commitsha>\S+)', file_content)
-                if match:
-                    commit_sha = match.group('commitsha')
-                    if len(commit_sha) >= 7:
-                        self.game_version = commit_sha[:7]
+        self.commit_sha = read_commit_sha(game_dir)
+        if self.commit_sha is not None:
+            self.game_version = self.commit_sha[:7]
 
-        self.opened_exe = open(self.exe_path, 'rb')
+        def exe_hashed(sha256):
+            main_window = self.get_main_window()
+            status_bar = main_window.statusBar()
 
-        def timeout():
-            bytes = self.opened_exe.read(cons.READ_BUFFER_SIZE)
-            if len(bytes) == 0:
-                self.opened_exe.close()
-                self.exe_reading_timer.stop()
-                main_window = self.get_main_window()
-                status_bar = main_window.statusBar()
+            status_bar.removeWidget(self.reading_label)
+            status_bar.removeWidget(self.reading_progress_bar)
 
-                status_bar.removeWidget(self.reading_label)
-                status_bar.removeWidget(self.reading_progress_bar)
+            status_bar.busy -= 1
+            if status_bar.busy == 0 and not self.game_started:
+                if self.restored_previous:
+                    status_bar.showMessage(
+                        _('Previous version restored'))
+                else:
+                    status_bar.showMessage(_('Ready'))
 
-                status_bar.busy -= 1
-                if status_bar.busy == 0 and not self.game_started:
-                    if self.restored_previous:
-                        status_bar.showMessage(
-                            _('Previous version restored'))
-                    else:
-                        status_bar.showMessage(_('Ready'))
+            if status_bar.busy == 0 and self.game_started:
+                status_bar.showMessage(_('Game process is running'))
 
-                if status_bar.busy == 0 and self.game_started:
-                    status_bar.showMessage(_('Game process is running'))
+            identified = identify_game_version(sha256, self.commit_sha)
+            is_stable = identified is not None and identified['stable']
 
-                sha256 = self.exe_sha256.hexdigest()
+            if is_stable:
+                self.game_version = identified['version']
 
-                stable_version = cons.STABLE_SHA256.get(sha256, None)
-                is_stable = stable_version is not None
+            if self.game_version == '':
+                self.game_version = _('Unknown')
+            else:
+                self.add_game_dir()
 
-                if is_stable:
-                    self.game_version = stable_version
+            self.version_value_label.setText(
+                '{version} ({type})'
+                .format(version=self.game_version, type=self.version_type)
+            )
 
-                if self.game_version == '':
-                    self.game_version = _('Unknown')
-                else:
-                    self.add_game_dir()
+            if identified is None:
+                new_version(self.game_version, sha256, is_stable)
 
-                self.version_value_label.setText(
-                    '{version} ({type})'
-                    .format(version=self.game_version, type=self.version_type)
-                )
+            build = None
+            if identified is not None and identified['build'] is not None:
+                build = identified
 
-                new_version(self.game_version, sha256, is_stable)
+            if build is not None:
+                build_date = arrow.get(build['released_on'], 'UTC')
+                human_delta = safe_humanize(build_date, arrow.utcnow(), locale=self.app_locale)
+                self.build_value_label.setText(
+                    '{build} ({time_delta})'
+                    .format(build=build['build'], time_delta=human_delta)
+                )
+                self.current_build = build['build']
 
-                build = get_build_from_sha256(sha256)
+                main_tab = self.get_main_tab()
+                update_group_box = main_tab.update_group_box
 
-                if build is not None:
-                    build_date = arrow.get(build['released_on'], 'UTC')
-                    human_delta = safe_humanize(build_date, arrow.utcnow(), locale=self.app_locale)
-                    self.build_value_label.setText(
-                        '{build} ({time_delta})'
-                        .format(build=build['build'], time_delta=human_delta)
-                    )
-                    self.current_build = build['build']
+                if (update_group_box.builds is not None
+                        and len(update_group_box.builds) > 0
+                        and status_bar.busy == 0
+                        and not self.game_started):
+                    last_build = update_group_box.builds[0]
 
-                    main_tab = self.get_main_tab()
-                    update_group_box = main_tab.update_group_box
+                    message = status_bar.currentMessage()
+                    if message != '':
+                        message = message + ' - '
 
-                    if (update_group_box.builds is not None
-                            and len(update_group_box.builds) > 0
-                            and status_bar.busy == 0
-                            and not self.game_started):
-                        last_build = update_group_box.builds[0]
+                    if last_build['number'] == self.current_build:
+                        message = message + _('Your game is up to date')
+                    else:
+                        message = message + _('There is a new update available')
+                    status_bar.showMessage(message)
 
-                        message = status_bar.currentMessage()
-                        if message != '':
-                            message = message + ' - '
+            else:
+                self.build_value_label.setText(_('Unknown'))
+                self.current_build = None
 
-                        if last_build['number'] == self.current_build:
-                            message = message + _('Your game is up to date')
-                        else:
-                            message = message + _('There is a new update available')
-                        status_bar.showMessage(message)
+        def timeout():
+            bytes = self.opened_exe.read(cons.READ_BUFFER_SIZE)
+            if len(bytes) == 0:
+                self.opened_exe.close()
+                self.exe_reading_timer.stop()
 
-                else:
-                    self.build_value_label.setText(_('Unknown'))
-                    self.current_build = None
+                sha256 = self.exe_sha256.hexdigest()
+                set_cached_sha256(self.exe_path, sha256)
+                exe_hashed(sha256)
 
             else:
                 self.exe_total_read += len(bytes)
                 self.reading_progress_bar.setValue(self.exe_total_read)
                 self.exe_sha256.update(bytes)
 
+        cached_sha256 = get_cached_sha256(self.exe_path)
+        if cached_sha256 is not None:
+            exe_hashed(cached_sha256)
+            return
+
+        self.opened_exe = open(self.exe_path, 'rb')
+
         timer.timeout.connect(timeout)
         timer.start(0)
 
@@ -973,6 +1151,8 @@ antivirus whitelist or select the action to trust this binary when detected.</p>
                 self.game_process_id = None
                 self.game_started = False
 
+                backups_tab.stop_background_backups()
+
                 status_bar.showMessage(_('Game process has ended'))
 
                 self.enable_controls()
@@ -986,15 +1166,12 @@ antivirus whitelist or select the action to trust this binary when detected.</p>
 
                 self.get_main_window().setWindowState(Qt.WindowState.WindowActive)
 
-                self.update_saves()
-
-                if config_true(get_config_value('backup_on_end', 'False')):
-                    backups_tab.prune_auto_backups()
+                self.refresh_saves()
 
-                    name = '{auto}_{name}'.format(auto=_('auto'),
-                        name=_('after_end'))
-
-                    backups_tab.backup_saves(name)
+                if config_true(get_config_value('archive_cold_worlds', 'False')):
+                    backups_tab.archive_cold_worlds(self.backup_after_end)
+                else:
+                    self.backup_after_end()
 
             process_wait_thread = ProcessWaitThread(self.game_process_id, self)
             process_wait_thread.ended.connect(process_ended)
@@ -1029,99 +1206,177 @@ antivirus whitelist or select the action to trust this binary when detected.</p>
         if session == 'default_session':
             session = self.game_dir
 
-        if (self.update_saves_timer is not None and self.update_saves_timer.isActive()):
-            self.update_saves_timer.stop()
+        if self.update_saves_thread is not None:
+            self.update_saves_thread.requestInterruption()
+            self.update_saves_thread = None
             self.saves_value_edit.setText(_('Unknown'))
 
+        self.stop_watching_saves()
+
         save_dir = os.path.join(self.game_dir, 'save')
         if session != self.game_dir and session is not None:
             save_dir = os.path.join(session, 'save')
 
         if not os.path.isdir(save_dir):
+            self.saves_size = 0
+            self.show_saves_stats(empty_saves_stats())
+            return
+
+        class SavesScanThread(QThread):
+            progressed = Signal(dict)
+            completed = Signal(bool, dict)
+
+            def __init__(self, save_dir, parent):
+                super(SavesScanThread, self).__init__(parent)
+
+                self.save_tree = SaveTree(save_dir)
+
+            def run(self):
+                # The completion is always reported so the saves are never
+                # left showing partial statistics
+                try:
+                    stats = self.save_tree.scan(self.progressed.emit,
+                        self.isInterruptionRequested)
+                except Exception:
+                    logger.exception('Could not scan the saves in {0}'.format(
+                        self.save_tree.save_dir))
+                    stats = None
+
+                if stats is None:
+                    self.completed.emit(False, {})
+                else:
+                    self.completed.emit(True, stats)
+
+        def progressed(stats):
+            if self.update_saves_thread is scan_thread:
+                self.show_saves_stats(stats, partial=True)
+
+        def completed(scanned, stats):
+            if self.update_saves_thread is scan_thread:
+                self.update_saves_thread = None
+                if not scanned:
+                    self.saves_value_edit.setText(_('Unknown'))
+                    return
+
+                self.saves_size = stats['size']
+                self.show_saves_stats(stats)
+
+                self.watch_saves(scan_thread.save_tree)
+
+        scan_thread = SavesScanThread(save_dir, self)
+        scan_thread.progressed.connect(progressed)
+        scan_thread.completed.connect(completed)
+        scan_thread.finished.connect(scan_thread.deleteLater)
+        self.update_saves_thread = scan_thread
+
+        scan_thread.start()
+
+    def refresh_saves(self):
+        """Bring the saves statistics up to date, applying the pending changes
+        reported by the saves watcher instead of scanning again when the
+        current save directory is being watched."""
+        if self.saves_tree is None:
+            self.update_saves()
+            return
+
+        self.apply_save_changes()
+
+    def watch_saves(self, save_tree):
+        self.stop_watching_saves()
+
+        self.saves_tree = save_tree
+        self.saves_watcher.addPaths(list(save_tree.dir_stats))
+
+    def stop_relocating_saves(self):
+        '''
+        Stop moving the saves and wait for it. The copy resumes from the files
+        already copied the next time the saves are moved.
+        '''
+        if self.relocate_thread is None:
+            return
+
+        self.relocate_thread.requestInterruption()
+        self.relocate_thread.wait()
+        self.relocate_thread = None
+
+    def stop_watching_saves(self):
+        self.saves_watcher_timer.stop()
+        self.changed_save_dirs.clear()
+        self.saves_tree = None
+
+        watched_dirs = self.saves_watcher.directories()
+        if len(watched_dirs) > 0:
+            self.saves_watcher.removePaths(watched_dirs)
+
+    def save_dir_changed(self, path):
+        if self.saves_tree is None:
+            return
+
+        # The game writes many files in a burst while saving, wait until it
+        # is done before looking at the changes
+        self.changed_save_dirs.add(path)
+        self.saves_watcher_timer.start()
+
+    def apply_save_changes(self):
+        self.saves_watcher_timer.stop()
+
+        if self.saves_tree is None:
+            return
+
+        changed_dirs = self.changed_save_dirs
+        self.changed_save_dirs = set()
+
+        if len(changed_dirs) > 0:
+            added_dirs, removed_dirs = self.saves_tree.refresh(changed_dirs)
+
+            if len(removed_dirs) > 0:
+                watched_dirs = set(self.saves_watcher.directories())
+                removed_dirs = list(watched_dirs.intersection(removed_dirs))
+                if len(removed_dirs) > 0:
+                    self.saves_watcher.removePaths(removed_dirs)
+            if len(added_dirs) > 0:
+                self.saves_watcher.addPaths(list(added_dirs))
+
+        stats = self.saves_tree.stats()
+        self.saves_size = stats['size']
+        self.show_saves_stats(stats)
+
+        if len(changed_dirs) > 0 and self.game_started:
+            self.get_main_tab().get_backups_tab().saves_changed()
+
+    def show_saves_stats(self, stats, partial=False):
+        if stats['worlds'] == 0 and stats['characters'] == 0 and not partial:
             self.saves_value_edit.setText(
                 '{world_count} {worlds} - {character_count} {characters}'
-                    .format(
+                .format(
                     world_count=0,
                     character_count=0,
                     worlds=ngettext('World', 'Worlds', 0),
                     characters=ngettext('Character', 'Characters', 0)
                 )
             )
-            return
-
-        timer = QTimer(self)
-        self.update_saves_timer = timer
-
-        self.saves_size = 0
-        self.saves_worlds = 0
-        self.saves_characters = 0
-        self.world_dirs = set()
-
-        self.saves_scan = scandir(save_dir)
-        self.next_scans = []
-        self.save_dir = save_dir
-
-        def timeout():
-            try:
-                entry = next(self.saves_scan)
-                if entry.is_dir():
-                    self.next_scans.append(entry.path)
-                elif entry.is_file():
-                    self.saves_size += entry.stat().st_size
-
-                    if entry.name.endswith('.sav'):
-                        world_dir = os.path.dirname(entry.path)
-                        if self.save_dir == os.path.dirname(world_dir):
-                            self.saves_characters += 1
-
-                    if entry.name in cons.WORLD_FILES:
-                        world_dir = os.path.dirname(entry.path)
-                        if (world_dir not in self.world_dirs
-                                and self.save_dir == os.path.dirname(world_dir)):
-                            self.world_dirs.add(world_dir)
-                            self.saves_worlds += 1
-
-                worlds_text = ngettext('World', 'Worlds', self.saves_worlds)
-                characters_text = ngettext('Character', 'Characters',self.saves_characters)
-                self.saves_value_edit.setText(
-                    '{world_count} {worlds} - {character_count} {characters} ({size})'
-                    .format(
-                        world_count=self.saves_worlds,
-                        character_count=self.saves_characters,
-                        size=sizeof_fmt(self.saves_size),
-                        worlds=worlds_text,
-                        characters=characters_text
-                    )
+        else:
+            self.saves_value_edit.setText(
+                '{world_count} {worlds} - {character_count} {characters} ({size})'
+                .format(
+                    world_count=stats['worlds'],
+                    character_count=stats['characters'],
+                    size=sizeof_fmt(stats['size']),
+                    worlds=ngettext('World', 'Worlds', stats['worlds']),
+                    characters=ngettext('Character', 'Characters',
+                        stats['characters'])
                 )
-            except StopIteration:
-                if len(self.next_scans) > 0:
-                    self.saves_scan = scandir(self.next_scans.pop())
-                else:
-                    # End of the tree
-                    self.update_saves_timer.stop()
-                    self.update_saves_timer = None
-
-                    # no more path to scan but still 0 chars/worlds
-                    if self.saves_worlds == 0 and self.saves_characters == 0:
-                        self.saves_value_edit.setText(
-                            '{world_count} {worlds} - {character_count} {characters}'
-                            .format(
-                                world_count=0,
-                                character_count=0,
-                                worlds=ngettext('World', 'Worlds', 0),
-                                characters=ngettext('Character', 'Characters', 0)
-                            )
-                        )
+            )
 
-                    # Warning about saves size
-                    if (self.saves_size > cons.SAVES_WARNING_SIZE and
-                        not config_true(get_config_value('prevent_save_move', 'False'))):
-                        self.saves_warning_label.show()
-                    else:
-                        self.saves_warning_label.hide()
+        if partial:
+            return
 
-        timer.timeout.connect(timeout)
-        timer.start(0)
+        # Warning about saves size
+        if (stats['size'] > cons.SAVES_WARNING_SIZE and
+            not config_true(get_config_value('prevent_save_move', 'False'))):
+            self.saves_warning_label.show()
+        else:
+            self.saves_warning_label.hide()
 
     def analyse_new_build(self, build):
         game_dir = self.dir_combo.currentText()
@@ -1201,17 +1456,9 @@ antivirus whitelist or select the action to trust this binary when detected.</p>
             self.exe_sha256 = hashlib.sha256()
             self.game_version = ''
 
-            version_file = os.path.join(game_dir, 'VERSION.txt')
-            if os.path.isfile(version_file):
-                file_content = None
-                with open(version_file, 'r', encoding='utf8') as read_file:
-                    file_content = read_file.read(1024)
-                if file_content is not None:
-                    match = re.search(r'commit sha: (?P<commitsha>\S+)', file_content)
-                    if match:
-                        commit_sha = match.group('commitsha')
-                        if len(commit_sha) >= 7:
-                            self.game_version = commit_sha[:7]
+            self.commit_sha = read_commit_sha(game_dir)
+            if self.commit_sha is not None:
+                self.game_version = self.commit_sha[:7]
 
             self.opened_exe = open(self.exe_path, 'rb')
 
@@ -1237,12 +1484,13 @@ antivirus whitelist or select the action to trust this binary when detected.</p>
                     status_bar.busy -= 1
 
                     sha256 = self.exe_sha256.hexdigest()
+                    set_cached_sha256(self.exe_path, sha256)
 
-                    stable_version = cons.STABLE_SHA256.get(sha256, None)
-                    is_stable = stable_version is not None
+                    identified = identify_game_version(sha256)
+                    is_stable = identified is not None and identified['stable']
 
                     if is_stable:
-                        self.game_version = stable_version
+                        self.game_version = identified['version']
 
                     if self.game_version == '':
                         self.game_version = _('Unknown')
@@ -1285,6 +1533,9 @@ class UpdateGroupBox(QGroupBox):
         self.api_reply = None
         self.api_response_content = None
 
+        self.unresolved_releases = deque()
+        self.release_commit_reply = None
+
         self.find_build_count = 0
 
         layout = QGridLayout()
@@ -1548,6 +1799,8 @@ class UpdateGroupBox(QGroupBox):
             }
             build_number = build['number']
 
+            self.record_releases([(release, build)])
+
             self.find_build_value.setText('')
 
             for existing_build in builds:
@@ -1670,7 +1923,7 @@ class UpdateGroupBox(QGroupBox):
                     name=_('before_update'), build=current_build)
 
                 backups_tab.after_backup = self.update_game_process
-                backups_tab.backup_saves(name)
+                backups_tab.backup_saves(name, skip_unchanged=True)
             else:
                 self.update_game_process()
 
@@ -2959,6 +3212,84 @@ class UpdateGroupBox(QGroupBox):
     def app_locale(self):
         return QApplication.instance().app_locale
 
+    def record_releases(self, releases):
+        '''
+        Remember the commit each release was built from so the game version
+        can be identified without network access. releases is a list of
+        (release, build) tuples.
+        '''
+        known_releases = []
+        unresolved = []
+
+        for release, build in releases:
+            commit_sha = release_commit_sha(release)
+            if commit_sha is not None:
+                known_releases.append({
+                    'commit_sha': commit_sha,
+                    'build': build['number'],
+                    'released_on': build['date']
+                })
+            elif 'tag_name' in release:
+                unresolved.append((release['tag_name'], build['number'], build['date']))
+
+        if len(known_releases) > 0:
+            new_releases(known_releases)
+
+        known_builds = get_release_builds(build_number for tag, build_number, date in unresolved)
+        queued_tags = set(tag for tag, build_number, date in self.unresolved_releases)
+        for unresolved_release in unresolved:
+            if len(self.unresolved_releases) >= cons.MAX_RELEASE_COMMIT_LOOKUPS:
+                break
+            if unresolved_release[1] not in known_builds and unresolved_release[0] not in queued_tags:
+                self.unresolved_releases.append(unresolved_release)
+
+        if self.release_commit_reply is None:
+            self.resolve_next_release()
+
+    def resolve_next_release(self):
+        '''
+        Resolve the tag of the next release targeting a branch to the commit
+        it points to, one request at a time.
+        '''
+        if len(self.unresolved_releases) == 0:
+            self.release_commit_reply = None
+            return
+
+        tag, build_number, released_on = self.unresolved_releases.popleft()
+
+        url = cons.GITHUB_REST_API_URL + cons.CDDA_COMMIT_BY_REF(tag)
+        request = QNetworkRequest(QUrl(url))
+        request.setRawHeader(b'User-Agent',
+            b'CDDA-Game-Launcher/' + version.encode('utf8'))
+        request.setRawHeader(b'Accept', cons.GITHUB_SHA_MEDIA_TYPE)
+
+        reply = self.qnam.get(request)
+        self.release_commit_reply = reply
+
+        def finished():
+            status_code = reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+            commit_sha = bytes(reply.readAll()).decode('ascii', 'replace').strip()
+
+            if status_code == 200 and re.fullmatch(r'[0-9a-f]{40}', commit_sha) is not None:
+                new_releases([{
+                    'commit_sha': commit_sha,
+                    'build': build_number,
+                    'released_on': released_on
+                }])
+            else:
+                logger.info('Could not resolve the commit of the %s release: HTTP %s', tag, status_code)
+
+            # Leave the remaining requests to the builds list
+            if reply.hasRawHeader(cons.GITHUB_XRL_REMAINING):
+                requests_remaining = tryint(bytes(reply.rawHeader(cons.GITHUB_XRL_REMAINING)).decode('ascii'))
+                if isinstance(requests_remaining, int) and requests_remaining <= 10:
+                    self.unresolved_releases.clear()
+
+            reply.deleteLater()
+            self.resolve_next_release()
+
+        reply.finished.connect(finished)
+
     def warn_rate_limit(self, requests_remaining, reset_dt):
         # Warn about remaining requests on GitHub API
         reset_dt_display = _('Unknown')
@@ -3097,6 +3428,8 @@ class UpdateGroupBox(QGroupBox):
 
         build_regex = re.compile(r'[Bb]uild #?(?P<build>[0-9\-]+)')
 
+        found_releases = []
+
         for release in releases:
             if any(x not in release for x in ('name', 'created_at')):
                 continue
@@ -3121,6 +3454,9 @@ class UpdateGroupBox(QGroupBox):
                     'date': arrow.get(release['created_at']).datetime
                 }
                 builds.append(build)
+                found_releases.append((release, build))
+
+        self.record_releases(found_releases)
 
         if len(builds) > 0:
             builds.sort(key=lambda x: (x['date'], x['number']), reverse=True)
@@ -30,6 +30,7 @@ from cddagl.i18n import proxy_gettext as _
 from cddagl.sql.functions import get_config_value, set_config_value, config_true
 from cddagl.ui.views.backups import BackupsTab
 from cddagl.ui.views.dialogs import AboutDialog, FaqDialog, LicenceDialog
+from cddagl.ui.views.installs import InstallsTab
 from cddagl.ui.views.main import MainTab
 from cddagl.ui.views.settings import SettingsTab
 from cddagl.ui.views.soundpacks import SoundpacksTab
@@ -423,6 +424,11 @@ class TabbedWindow(QMainWindow):
             else:
                 event.ignore()
         else:
+            self.central_widget.main_tab.game_dir_group_box.stop_relocating_saves()
+            self.central_widget.backups_tab.stop_background_backups(True)
+            self.central_widget.backups_tab.stop_verifying_backups()
+            self.central_widget.backups_tab.stop_mirroring_backups(True)
+
             self.save_geometry()
             event.accept()
 
@@ -432,17 +438,20 @@ class CentralWidget(QTabWidget):
         super(CentralWidget, self).__init__()
 
         self.create_main_tab()
+        self.create_installs_tab()
         self.create_backups_tab()
         self.create_soundpacks_tab()
         self.create_settings_tab()
 
     def set_text(self):
         self.setTabText(self.indexOf(self.main_tab), _('Main'))
+        self.setTabText(self.indexOf(self.installs_tab), _('Installs'))
         self.setTabText(self.indexOf(self.backups_tab), _('Backups'))
         self.setTabText(self.indexOf(self.soundpacks_tab), _('Soundpacks'))
         self.setTabText(self.indexOf(self.settings_tab), _('Settings'))
 
         self.main_tab.set_text()
+        self.installs_tab.set_text()
         self.backups_tab.set_text()
         self.soundpacks_tab.set_text()
         self.settings_tab.set_text()
@@ -452,6 +461,11 @@ class CentralWidget(QTabWidget):
         self.addTab(main_tab, _('Main'))
         self.main_tab = main_tab
 
+    def create_installs_tab(self):
+        installs_tab = InstallsTab()
+        self.addTab(installs_tab, _('Installs'))
+        self.installs_tab = installs_tab
+
     def create_backups_tab(self):
         backups_tab = BackupsTab()
         self.addTab(backups_tab, _('Backups'))
@@ -1,3 +1,4 @@
+import base64
 import os
 import sys
 
@@ -14,6 +15,7 @@ import win32api
 import win32event
 import win32pipe
 import win32con
+import win32crypt
 
 from pywintypes import error as WinError
 
@@ -279,6 +281,17 @@ kernel32.GetLastError.restype = DWORD
 kernel32.GetCurrentProcess.restype = HANDLE
 kernel32.CloseHandle.restype = BOOL
 
+kernel32.GetCurrentThread.restype = HANDLE
+kernel32.SetThreadPriority.restype = BOOL
+kernel32.SetThreadPriority.argtypes = (
+    HANDLE, # hThread
+    c_int)  # nPriority
+
+THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+THREAD_MODE_BACKGROUND_END = 0x00020000
+
+CRYPTPROTECT_UI_FORBIDDEN = 0x01
+
 
 class GUID(Structure):   # [1]
     _fields_ = [
@@ -532,6 +545,16 @@ def wait_for_pid(pid):
 
     return True
 
+# Lower the CPU, I/O and memory priorities of the current thread so that
+# background work does not slow down the game
+def set_thread_background_mode(enabled=True):
+    if enabled:
+        mode = THREAD_MODE_BACKGROUND_BEGIN
+    else:
+        mode = THREAD_MODE_BACKGROUND_END
+
+    return bool(kernel32.SetThreadPriority(kernel32.GetCurrentThread(), mode))
+
 # Find the process which is using the file handle
 def find_process_with_file_handle(path):
     # Check for drive absolute path
@@ -790,3 +813,20 @@ def write_named_pipe(name, value):
     finally:
         if fileh is not None:
             win32api.CloseHandle(fileh)
+
+def protect_string(value):
+    """Encrypt value for the current user with DPAPI, as base64 text."""
+    data = win32crypt.CryptProtectData(value.encode('utf8'), None, None,
+        None, None, CRYPTPROTECT_UI_FORBIDDEN)
+    return base64.b64encode(data).decode('ascii')
+
+def unprotect_string(value):
+    """Decrypt a value of protect_string. Returns None when it cannot be
+    decrypted, like when it was protected by another user."""
+    try:
+        description, data = win32crypt.CryptUnprotectData(
+            base64.b64decode(value), None, None, None,
+            CRYPTPROTECT_UI_FORBIDDEN)
+        return data.decode('utf8')
+    except (WinError, ValueError):
+        return None